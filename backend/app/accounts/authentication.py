@@ -0,0 +1,192 @@
+# backend/app/accounts/authentication.py
+"""
+JWT 認証 (ロールのクレームとステートレスなプリンシパル)
+
+アクセストークンに username と is_producer を含め、認証時は DB からユーザーを
+読まずにトークンのクレームから TokenPrincipal を作る。
+id / username / is_producer だけで判断できるビューは DB にアクセスしない。
+モデルとしてのユーザーが必要になったとき (FK への代入、email の参照など) に
+初めて get_cached_user で取得する (短い TTL でキャッシュ)。
+キャッシュするのは CACHED_USER_FIELDS だけで、パスワードのハッシュなどは含めない
+(それ以外の列は遅延読み込みになる)。
+
+- is_active の確認はユーザーを取得する時点で行う。無効化されたユーザーが
+  クレームだけで判断するビューにアクセスできるのはアクセストークンの有効期限まで。
+- is_producer はログイン時とトークンのリフレッシュ時に DB から設定する
+  (リフレッシュ時は RoleClaimsTokenRefreshSerializer がユーザーと Profile を 1 クエリで読む)。
+- クレームを含まない (この仕組みの導入前に発行された) トークンは従来どおり DB から読む。
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings  # type: ignore
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.cache import cache  # type: ignore
+from django.db import router  # type: ignore
+from django.utils.functional import SimpleLazyObject  # type: ignore
+from django.utils.translation import gettext_lazy as _  # type: ignore
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.profiles.models import Profile
+
+USERNAME_CLAIM = "username"
+PRODUCER_CLAIM = "is_producer"
+USER_CACHE_KEY = "accounts:user:{}"
+# 認証のキャッシュに保存する User の列 (password / last_login などは含めない)
+CACHED_USER_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+)
+
+
+def user_is_producer(user):
+    try:
+        return user.profile.is_producer
+    except Profile.DoesNotExist:
+        return False
+
+
+def check_user_is_active(user):
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    return user
+
+
+def get_cached_user(user_id):
+    """
+    ユーザーを取得する (CACHED_USER_FIELDS の値を settings.AUTH_USER_CACHE_TIMEOUT 秒キャッシュ)。
+    Profile は含めないため、必要なビューは自分で結合して取得する。
+    """
+    User = get_user_model()
+    # from_db には concrete_fields の順で値を渡す
+    field_names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in CACHED_USER_FIELDS
+    ]
+    key = USER_CACHE_KEY.format(user_id)
+    values = cache.get(key)
+    if values is None:
+        values = (
+            User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list(*field_names)
+            .first()
+        )
+        if values is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        cache.set(key, values, settings.AUTH_USER_CACHE_TIMEOUT)
+    user = User.from_db(router.db_for_read(User), field_names, values)
+    return check_user_is_active(user)
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id))
+
+
+class TokenPrincipal(SimpleLazyObject):
+    """
+    アクセストークンのクレームから作るユーザー。
+    id / pk / username / is_producer / is_authenticated の参照では DB にアクセスせず、
+    それ以外の属性やモデルとしての利用 (isinstance、比較、FK への代入) で
+    get_cached_user の結果に委譲する。
+    """
+
+    def __init__(self, token):
+        # simplejwt はユーザー ID を文字列でクレームに入れるため、モデルの型に戻す
+        user_id = (
+            get_user_model()
+            ._meta.get_field(api_settings.USER_ID_FIELD)
+            .to_python(token[api_settings.USER_ID_CLAIM])
+        )
+        super().__init__(lambda: get_cached_user(user_id))
+        # LazyObject の __setattr__ は委譲先に設定するため、__dict__ に直接保存する
+        self.__dict__["_claims"] = {
+            "id": user_id,
+            "username": token[USERNAME_CLAIM],
+            "is_producer": token[PRODUCER_CLAIM],
+        }
+
+    @property
+    def id(self):
+        return self._claims["id"]
+
+    pk = id
+
+    @property
+    def username(self):
+        return self._claims["username"]
+
+    @property
+    def is_producer(self):
+        return self._claims["is_producer"]
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def __bool__(self):
+        # IsAuthenticated の `request.user and ...` でユーザーを取得しないようにする
+        return True
+
+    def __str__(self):
+        return self.username
+
+
+class RoleClaimsRefreshToken(RefreshToken):
+    """username / is_producer のクレームを含むリフレッシュトークン (アクセストークンにも引き継ぐ)"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_role_claims(user)
+        return token
+
+    def set_role_claims(self, user):
+        self[USERNAME_CLAIM] = user.get_username()
+        self[PRODUCER_CLAIM] = user_is_producer(user)
+
+
+class RoleClaimsJWTAuthentication(JWTAuthentication):
+    """クレームを含むトークンは DB を参照せずに TokenPrincipal で認証する"""
+
+    @staticmethod
+    def has_role_claims(validated_token):
+        return all(
+            claim in validated_token
+            for claim in (api_settings.USER_ID_CLAIM, USERNAME_CLAIM, PRODUCER_CLAIM)
+        )
+
+    def get_user(self, validated_token):
+        if not self.has_role_claims(validated_token):
+            return super().get_user(validated_token)
+        return TokenPrincipal(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate の非同期版 (非同期ビュー用)。
+        クレームを含むトークンはイベントループ上で検証だけ行い、
+        含まないトークンのユーザー取得のみスレッドで実行する。
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if self.has_role_claims(validated_token):
+            return TokenPrincipal(validated_token), validated_token
+        user = await sync_to_async(self.get_user)(validated_token)
+        return user, validated_token
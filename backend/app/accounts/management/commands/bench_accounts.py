@@ -0,0 +1,105 @@
+# backend/app/accounts/management/commands/bench_accounts.py
+"""
+ユーザー登録・ログインのベンチマーク
+
+API (登録・トークン取得) と、User の保存を伴う操作 (last_login の更新・パスワード変更) の
+1 操作あたりのクエリ数とスループットを計測する。
+パスワードのハッシュ化 (PBKDF2) が処理時間の大半を占めるため、既定では
+高速なハッシュ (MD5) に差し替えて DB のコストを見えるようにする (--real-hasher で本来のハッシュ)。
+データはトランザクション内で作成し、計測後にロールバックする。
+
+    python manage.py bench_accounts --iterations 200
+"""
+
+import time
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.contrib.auth.models import update_last_login  # type: ignore
+from django.core.management.base import BaseCommand  # type: ignore
+from django.db import connection, transaction  # type: ignore
+from django.test.utils import CaptureQueriesContext, override_settings  # type: ignore
+from rest_framework.test import APIClient
+
+PASSWORD = "bench-Password-123"
+
+
+class StopBenchmark(Exception):
+    """計測後にロールバックさせるための例外"""
+
+
+class Command(BaseCommand):
+    help = "ユーザー登録・ログインの 1 操作あたりのクエリ数とスループットを計測する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument(
+            "--real-hasher",
+            action="store_true",
+            help="settings の PASSWORD_HASHERS をそのまま使う",
+        )
+
+    def handle(self, *args, **options):
+        overrides = {"ALLOWED_HOSTS": ["*"]}
+        if not options["real_hasher"]:
+            overrides["PASSWORD_HASHERS"] = [
+                "django.contrib.auth.hashers.MD5PasswordHasher"
+            ]
+        try:
+            with transaction.atomic(), override_settings(**overrides):
+                self._run(options["iterations"])
+                raise StopBenchmark
+        except StopBenchmark:
+            pass
+
+    def _run(self, iterations):
+        User = get_user_model()
+        client = APIClient()
+        users = []
+
+        def register(i):
+            response = client.post(
+                "/api/accounts/register/",
+                {
+                    "username": f"bench_account_{i}",
+                    "email": f"bench_account_{i}@example.com",
+                    "password": PASSWORD,
+                    "password2": PASSWORD,
+                },
+                format="json",
+            )
+            assert response.status_code == 201, response.content
+            users.append(User.objects.get(username=f"bench_account_{i}"))
+
+        def login(i):
+            response = client.post(
+                "/api/accounts/token/",
+                {"username": f"bench_account_{i}", "password": PASSWORD},
+                format="json",
+            )
+            assert response.status_code == 200, response.content
+
+        def touch_last_login(i):
+            # セッションログインなどで発生する User の保存
+            update_last_login(None, users[i])
+
+        def change_password(i):
+            users[i].set_password(PASSWORD)
+            users[i].save()
+
+        self.stdout.write(f"{'operation':<20}{'queries/op':>12}{'ops/s':>10}")
+        for label, operation, excluded in (
+            # 登録の計測値からは、確認用の User の取得 (1 クエリ) を除く
+            ("register", register, 1),
+            ("token obtain", login, 0),
+            ("last_login update", touch_last_login, 0),
+            ("password change", change_password, 0),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for i in range(iterations):
+                    operation(i)
+                elapsed = time.perf_counter() - started
+            per_op = len(queries.captured_queries) / iterations - excluded
+            self.stdout.write(
+                f"{label:<20}{per_op:>12.1f}{iterations / elapsed:>10.0f}"
+            )
@@ -1,3 +1,12 @@
-from django.db import models  # type: ignore
+from django.contrib.auth.models import User  # type: ignore
+from django.db.models.signals import post_delete, post_save  # type: ignore
+from django.dispatch import receiver  # type: ignore
+
+from .authentication import invalidate_cached_user
+
+
+# JWT 認証でキャッシュしたユーザーを変更時に破棄する
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
 
-# Create your models here.
@@ -4,7 +4,15 @@ from django.contrib.auth.models import User  # type: ignore # Django標準User
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password  # type: ignore
 from django.core.exceptions import ValidationError  # type: ignore
+from django.db import transaction  # type: ignore
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from app.profiles.models import Profile
+from .authentication import RoleClaimsRefreshToken
 
 # User = get_user_model() # カスタムUserモデルを使う場合
 
@@ -40,14 +48,18 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        user = User.objects.create(
+        user = User(
             username=validated_data["username"],
             email=validated_data["email"],
             first_name=validated_data.get("first_name", ""),
             last_name=validated_data.get("last_name", ""),
         )
         user.set_password(validated_data["password"])  # パスワードをハッシュ化
-        user.save()
+        # User と Profile をそれぞれ 1 回の INSERT で作成する
+        # (Profile.objects.create で user.profile もキャッシュされ、is_producer の取得にクエリは不要)
+        with transaction.atomic():
+            user.save()
+            Profile.objects.create(user=user)
         return user
 
     def get_is_producer(self, obj):
@@ -129,4 +141,41 @@ class UserDetailSerializer(serializers.ModelSerializer):
         except Profile.DoesNotExist: # User に Profile がまだない場合
             return False
         except AttributeError: # obj に profile 属性がない場合 (シグナル未作成など)
-            return False
\ No newline at end of file
+            return False
+
+# JWT の発行・リフレッシュ用シリアライザ (username / is_producer のクレームを含める)
+class RoleClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RoleClaimsRefreshToken
+
+
+class RoleClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RoleClaimsRefreshToken
+
+    def validate(self, attrs):
+        # リフレッシュ時点のロールを反映する (ログイン後に生産者になった場合など)。
+        # 有効なユーザーかの確認 (simplejwt と同じ) と共用し、ユーザーと Profile を 1 クエリで読む。
+        # ROTATE_REFRESH_TOKENS は使っていないため、アクセストークンのみを返す
+        refresh = self.token_class(attrs["refresh"])
+        user = (
+            User.objects.select_related("profile")
+            .only(
+                jwt_settings.USER_ID_FIELD,
+                User.USERNAME_FIELD,
+                "is_active",
+                "profile__is_producer",
+            )
+            .filter(
+                **{
+                    jwt_settings.USER_ID_FIELD: refresh.payload.get(
+                        jwt_settings.USER_ID_CLAIM
+                    )
+                }
+            )
+            .first()
+        )
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        refresh.set_role_claims(user)
+        return {"access": str(refresh.access_token)}
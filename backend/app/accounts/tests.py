@@ -1,3 +1,212 @@
+import os
+from unittest import mock
+
+from django.contrib.auth.models import User  # type: ignore
+from django.core.cache import cache  # type: ignore
+from django.core.management import call_command  # type: ignore
 from django.test import TestCase  # type: ignore
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from app.profiles.models import Profile
+
+from .authentication import (
+    USER_CACHE_KEY,
+    RoleClaimsJWTAuthentication,
+    RoleClaimsRefreshToken,
+    TokenPrincipal,
+    get_cached_user,
+)
+
+
+class AccountTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self, username, password="pw-Secret-123"):
+        response = self.client.post(
+            "/api/accounts/token/",
+            {"username": username, "password": password},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+
+class RegisterProfileTests(AccountTestCase):
+    """ユーザー登録時の Profile 作成と、登録 API 以外で作られたユーザー"""
+
+    def test_register_creates_exactly_one_profile(self):
+        response = self.client.post(
+            "/api/accounts/register/",
+            {
+                "username": "new_farmer",
+                "password": "pw-Secret-123",
+                "password2": "pw-Secret-123",
+                "email": "farmer@example.com",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIs(response.data["is_producer"], False)
+        user = User.objects.get(username="new_farmer")
+        self.assertEqual(Profile.objects.filter(user=user).count(), 1)
+        self.assertIs(user.profile.is_producer, False)
+
+    def test_invalid_registration_creates_nothing(self):
+        response = self.client.post(
+            "/api/accounts/register/",
+            {
+                "username": "new_farmer",
+                "password": "pw-Secret-123",
+                "password2": "different-123",
+                "email": "farmer@example.com",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(username="new_farmer").exists())
+        self.assertFalse(Profile.objects.exists())
+
+    def assert_profile_created_on_demand(self, username):
+        self.assertFalse(Profile.objects.filter(user__username=username).exists())
+        self.login(username)
+
+        response = self.client.get("/api/accounts/me/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["username"], username)
+        self.assertIs(response.data["is_producer"], False)
+
+        for _ in range(2):
+            response = self.client.get("/api/profiles/me/")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(Profile.objects.filter(user__username=username).count(), 1)
+        self.assertIs(Profile.objects.get(user__username=username).is_producer, False)
+
+    def test_create_user_without_profile(self):
+        User.objects.create_user(username="shell_user", password="pw-Secret-123")
+        self.assert_profile_created_on_demand("shell_user")
+
+    def test_createsuperuser_without_profile(self):
+        with mock.patch.dict(
+            os.environ, {"DJANGO_SUPERUSER_PASSWORD": "pw-Secret-123"}
+        ):
+            call_command(
+                "createsuperuser",
+                interactive=False,
+                username="admin",
+                email="admin@example.com",
+                verbosity=0,
+            )
+        self.assert_profile_created_on_demand("admin")
+
+
+class RoleClaimsAuthenticationTests(AccountTestCase):
+    """クレームによる認証 (app/accounts/authentication.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="farmer", password="pw-Secret-123", email="farmer@example.com"
+        )
+        Profile.objects.create(user=cls.user, is_producer=True)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return RoleClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_claims_token_authenticates_without_queries(self):
+        token = RoleClaimsRefreshToken.for_user(self.user).access_token
+        self.assertEqual(token["username"], "farmer")
+        self.assertIs(token["is_producer"], True)
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+            self.assertIsInstance(user, TokenPrincipal)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.username, "farmer")
+            self.assertIs(user.is_producer, True)
+            self.assertTrue(user and user.is_authenticated)
+        # モデルとしての属性はキャッシュしたユーザーに委譲する
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "farmer@example.com")
+
+    def test_legacy_token_without_claims_reads_the_database(self):
+        token = AccessToken.for_user(self.user)
+        self.assertNotIn("is_producer", token)
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        self.assertNotIsInstance(user, TokenPrincipal)
+        self.assertEqual(user, self.user)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get("/api/accounts/me/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.data["is_producer"], True)
+
+    def test_refresh_reflects_role_change(self):
+        refresh = self.login("farmer")["refresh"]
+        Profile.objects.filter(user=self.user).update(is_producer=False)
+        # ブラックリストの確認とユーザー (Profile を結合)
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                "/api/accounts/token/refresh/", {"refresh": refresh}, format="json"
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        access = AccessToken(response.data["access"])
+        self.assertIs(access["is_producer"], False)
+        self.assertEqual(access["username"], "farmer")
+
+    def test_refresh_adds_claims_to_legacy_refresh_token(self):
+        refresh = RoleClaimsRefreshToken()
+        refresh["user_id"] = str(self.user.pk)
+        response = self.client.post(
+            "/api/accounts/token/refresh/", {"refresh": str(refresh)}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        access = AccessToken(response.data["access"])
+        self.assertTrue(RoleClaimsJWTAuthentication.has_role_claims(access))
+        self.assertIs(access["is_producer"], True)
+
+    def test_inactive_user_is_rejected(self):
+        refresh = RoleClaimsRefreshToken.for_user(self.user)
+        claims_token = refresh.access_token
+        legacy_token = AccessToken.for_user(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.clear()
+
+        for token in (claims_token, legacy_token):
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+            for path in ("/api/accounts/me/", "/api/profiles/me/"):
+                with self.subTest(path=path, claims="is_producer" in token):
+                    self.assertEqual(self.client.get(path).status_code, 401)
+
+        self.client.credentials()
+        response = self.client.post(
+            "/api/accounts/token/refresh/", {"refresh": str(refresh)}, format="json"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_cache_does_not_hold_the_password_hash(self):
+        user = get_cached_user(self.user.pk)
+        cached = cache.get(USER_CACHE_KEY.format(self.user.pk))
+        self.assertNotIn(self.user.password, cached)
+        self.assertEqual(
+            user.get_deferred_fields(), {"password", "last_login", "date_joined"}
+        )
+        with self.assertNumQueries(0):
+            user = get_cached_user(self.user.pk)
+            self.assertEqual(
+                (user.pk, user.username, user.email, user.is_active),
+                (self.user.pk, "farmer", "farmer@example.com", True),
+            )
 
-# Create your tests here.
+    def test_cache_is_invalidated_on_user_save(self):
+        get_cached_user(self.user.pk)
+        self.user.email = "new@example.com"
+        self.user.save()
+        self.assertEqual(get_cached_user(self.user.pk).email, "new@example.com")
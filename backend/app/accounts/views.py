@@ -2,6 +2,7 @@ from django.contrib.auth.models import User  # type: ignore
 
 # from django.contrib.auth import get_user_model
 from rest_framework import generics, permissions
+from .authentication import check_user_is_active
 from .serializers import RegisterSerializer, UserSerializer
 from .serializers import RegisterSerializer, UserDetailSerializer, UserUpdateSerializer
 
@@ -19,7 +20,9 @@ class UserMeView(generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)  # 認証必須
 
     def get_object(self):
-        return self.request.user  # 自分自身の情報を返す
+        # 自分自身の情報を返す (認証のキャッシュは Profile を含まないため、結合して 1 クエリで取得)
+        user = User.objects.select_related("profile").get(pk=self.request.user.pk)
+        return check_user_is_active(user)
 
     def get_serializer_class(self):
         if self.request.method == "GET":
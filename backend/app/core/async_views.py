@@ -0,0 +1,185 @@
+# backend/app/core/async_views.py
+"""
+読み取り API (一覧・詳細) の非同期ビュー
+
+ASGI (entrypoint.sh の SERVER_MODE=asgi) で動かすと、DB の応答待ちの間も
+イベントループが他のリクエストを処理できるため、1 ワーカーで同時に扱える
+リクエスト数がスレッド数に縛られない。
+
+既存の ViewSet (viewset_class) のインスタンスを作り、権限・フィルタ・並び替え・
+シリアライザ・ページネーションはそのまま使う (レスポンスの内容は同期版と同じ)。
+DB へのアクセスだけを非同期 ORM (aget / acount / aiterator) に置き換える。
+
+- 認証は JWT のみ (RoleClaimsJWTAuthentication.aauthenticate)。セッション認証は行わない。
+- レンダラは JSON のみ (ブラウザブル API は同期版で表示する)。
+- GET / HEAD 以外 (作成・更新・削除、OPTIONS) は fallback の同期ビューに渡す。
+- ViewSet が ConditionalGetMixin を使っていれば、同期版と同じ検証子で 304 を返す。
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError  # type: ignore
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed  # type: ignore
+from django.views import View  # type: ignore
+from django.views.decorators.csrf import csrf_exempt  # type: ignore
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from app.accounts.authentication import RoleClaimsJWTAuthentication
+
+from .conditional import ConditionalGetMixin
+
+
+class AsyncReadOnlyViewSetView(View):
+    """
+    viewset_class の action ("list" / "retrieve") を非同期に処理するビュー。
+
+        ProductListAsyncView.as_view(fallback=ProductViewSet.as_view({...}))
+    """
+
+    viewset_class = None
+    action = None
+    fallback = None  # GET / HEAD 以外を処理する同期ビュー
+    view_is_async = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # DRF の APIView と同じく、CSRF の検証は認証クラス (SessionAuthentication) に任せる
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            if self.fallback is None:
+                return HttpResponseNotAllowed(["GET", "HEAD"])
+            return await sync_to_async(self.fallback)(request, *args, **kwargs)
+
+        viewset = self.make_viewset(request, args, kwargs)
+        drf_request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.request = drf_request
+        viewset.headers = viewset.default_response_headers
+        try:
+            await self.authenticate(drf_request)
+            viewset.initial(drf_request, *args, **kwargs)
+            handler = getattr(self, self.action)
+            response = await handler(viewset, drf_request)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        response = viewset.finalize_response(drf_request, response, *args, **kwargs)
+        return self.render(response)
+
+    def make_viewset(self, request, args, kwargs):
+        # ViewSetMixin.as_view() が作るインスタンスと同じ状態にする
+        viewset = self.viewset_class()
+        viewset.action_map = {"get": self.action, "head": self.action}
+        viewset.detail = self.action == "retrieve"
+        viewset.renderer_classes = [JSONRenderer]
+        viewset.request = request
+        viewset.args = args
+        viewset.kwargs = kwargs
+        return viewset
+
+    @staticmethod
+    async def authenticate(request):
+        # ユーザーを先に設定しておくと、DRF の Request は同期の認証クラスを実行しない
+        result = await RoleClaimsJWTAuthentication().aauthenticate(request)
+        if result is None:
+            request.user = (
+                api_settings.UNAUTHENTICATED_USER()
+                if api_settings.UNAUTHENTICATED_USER
+                else None
+            )
+            request.auth = None
+        else:
+            request.user, request.auth = result
+
+    async def filter_queryset(self, viewset, queryset):
+        """
+        viewset.filter_queryset を適用する (通常はクエリを組み立てるだけで DB にはアクセスしない)。
+        外部サービスへの問い合わせを伴う場合は run_filters_in_thread で True を返すこと。
+        """
+        if self.run_filters_in_thread(viewset.request):
+            return await sync_to_async(viewset.filter_queryset, thread_sensitive=False)(
+                queryset
+            )
+        return viewset.filter_queryset(queryset)
+
+    def run_filters_in_thread(self, request):
+        return False
+
+    async def list(self, viewset, request):
+        queryset = await self.filter_queryset(viewset, viewset.get_queryset())
+        validators = None
+        paged = False
+        if isinstance(viewset, ConditionalGetMixin):
+            if viewset.uses_keyset(request):
+                # キーセット方式は全体を集計せず、取得したページから検証子を作る
+                page = await self.paginate_queryset(viewset, queryset)
+                paged = True
+                validators = viewset.page_validators(request, page)
+            else:
+                values = await queryset.order_by().aaggregate(
+                    **viewset.list_aggregates()
+                )
+                validators = viewset.list_validators(request, values)
+            not_modified = viewset.not_modified_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+
+        if not paged:
+            page = await self.paginate_queryset(viewset, queryset)
+        if page is not None:
+            serializer = viewset.get_serializer(page, many=True)
+            response = viewset.get_paginated_response(serializer.data)
+        else:
+            rows = [row async for row in queryset.aiterator()]
+            response = Response(viewset.get_serializer(rows, many=True).data)
+        return self.patch_response(viewset, request, response, validators)
+
+    @staticmethod
+    def patch_response(viewset, request, response, validators):
+        if isinstance(viewset, ConditionalGetMixin):
+            viewset.patch_response(request, response, validators)
+        return response
+
+    @staticmethod
+    async def paginate_queryset(viewset, queryset):
+        paginator = viewset.paginator
+        if paginator is None:
+            return None
+        if hasattr(paginator, "apaginate_queryset"):
+            return await paginator.apaginate_queryset(
+                queryset, viewset.request, view=viewset
+            )
+        return await sync_to_async(viewset.paginate_queryset)(queryset)
+
+    async def retrieve(self, viewset, request):
+        # GenericAPIView.get_object と同じ検索・404・オブジェクト権限の確認
+        queryset = await self.filter_queryset(viewset, viewset.get_queryset())
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        filter_kwargs = {viewset.lookup_field: viewset.kwargs[lookup_url_kwarg]}
+        model = queryset.model
+        try:
+            instance = await queryset.aget(**filter_kwargs)
+        except (model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f"No {model._meta.object_name} matches the given query.")
+        viewset.check_object_permissions(request, instance)
+        validators = None
+        if isinstance(viewset, ConditionalGetMixin):
+            validators = viewset.object_validators(request, instance)
+            not_modified = viewset.not_modified_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+        response = Response(viewset.get_serializer(instance).data)
+        return self.patch_response(viewset, request, response, validators)
+
+    @staticmethod
+    def render(response):
+        if not isinstance(response, Response):  # 304 など、レンダリング済みの応答
+            return response
+        # ここでレンダリングしておく (遅延レンダリングの Response を返すと、
+        # Django がレンダリングのためだけに同期スレッドへ切り替えるため)
+        response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
@@ -0,0 +1,188 @@
+# backend/app/core/conditional.py
+"""
+一覧・詳細 API の条件付き GET (ETag / Last-Modified) と Cache-Control / Vary
+
+本文を組み立てる (シリアライズする) 前に検証子を計算し、If-None-Match /
+If-Modified-Since と一致すれば 304 を返す。
+
+- 一覧 (ページ番号方式・ページングなし): 絞り込み後のクエリセットの max(updated_at) と
+  件数 (1 クエリ。件数はページネーションの COUNT にも使う)。
+  ページングしていても全体で計算する (どのページの内容が変わっても検証子が変わる)。
+- 一覧 (キーセット方式): 全体を集計せず (COUNT をしないための方式のため)、取得したページの
+  行の pk と updated_at、前後のページの有無から作る。カーソルはパスに含まれる。
+- 詳細: 取得したオブジェクトの pk と updated_at。
+- ETag (弱い検証子) には、応答の内容を左右するホスト・パス・クエリパラメータ・
+  ユーザー・レスポンス形式と、ビューの etag_parts() も含める。
+- updated_at を更新しない変更 (QuerySet.update() で updated_at を指定しない場合、
+  ユーザー名の変更など) は検証子に反映されない。
+
+public_max_age を設定したビュー (公開カタログ) は、未ログインの応答に
+「Cache-Control: public, max-age=0, s-maxage=<秒>」を付け、リバースプロキシは
+その間キャッシュし、ブラウザは毎回 (304 で安く) 再検証する。それ以外とログイン中の応答は
+「private, no-cache」。いずれも Vary: Accept, Authorization を付ける。
+"""
+
+import hashlib
+import json
+
+from django.db.models import Count, Max  # type: ignore
+from django.utils.cache import (  # type: ignore
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date  # type: ignore
+from rest_framework.response import Response
+
+VARY_HEADERS = ("Accept", "Authorization")
+
+
+def _row_value(row, name):
+    if isinstance(row, dict):  # values() の行 (主キーは "id")
+        return row["id" if name == "pk" else name]
+    return getattr(row, name)
+
+
+class Validators:
+    """ETag と Last-Modified (UNIX 時刻、不明なら None)"""
+
+    def __init__(self, etag, last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def headers(self):
+        headers = {"ETag": self.etag}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = http_date(self.last_modified)
+        return headers
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet 用: list / retrieve を条件付き GET に対応させる。
+    AnonymousResponseCacheMixin と併用する場合はそちらを先 (外側) に置く。
+    """
+
+    last_modified_field = "updated_at"
+    public_max_age = None  # 公開カタログの s-maxage (秒)
+
+    def etag_parts(self):
+        """検証子に含める追加の値 (関連オブジェクトのキャッシュ世代など)"""
+        return []
+
+    def list_aggregates(self):
+        return {
+            "last_modified": Max(self.last_modified_field),
+            "count": Count("pk"),
+        }
+
+    def make_validators(self, request, kind, values, last_modified):
+        renderer = getattr(request, "accepted_renderer", None)
+        source = json.dumps(
+            [
+                kind,
+                request.get_host(),
+                request.get_full_path(),
+                request.user.pk if request.user.is_authenticated else None,
+                renderer.format if renderer else None,
+                values,
+                last_modified,  # マイクロ秒まで含める (Last-Modified は秒単位)
+                self.etag_parts(),
+            ],
+            default=str,
+        )
+        etag = f'W/"{hashlib.sha1(source.encode()).hexdigest()}"'
+        return Validators(
+            etag, int(last_modified.timestamp()) if last_modified else None
+        )
+
+    def list_validators(self, request, values):
+        """
+        values: list_aggregates() の集計結果。
+        件数はページネーション (app/core/pagination.py) の COUNT にも使う。
+        """
+        if hasattr(self.paginator, "known_count"):
+            self.paginator.known_count = values["count"]
+        return self.make_validators(
+            request, "list", [values["count"]], values["last_modified"]
+        )
+
+    def uses_keyset(self, request):
+        """キーセット方式でページングするか (app/core/pagination.py)"""
+        paginator = self.paginator
+        return hasattr(paginator, "use_keyset") and paginator.use_keyset(request)
+
+    def page_validators(self, request, page):
+        """キーセット方式: 取得したページの行 (モデルまたは values() の dict) から作る"""
+        keyset = self.paginator.keyset
+        rows = [
+            [_row_value(row, "pk"), _row_value(row, self.last_modified_field)]
+            for row in page
+        ]
+        last_modified = max((row[1] for row in rows), default=None)
+        return self.make_validators(
+            request, "page", [rows, keyset.has_next, keyset.has_previous], last_modified
+        )
+
+    def object_validators(self, request, instance):
+        last_modified = getattr(instance, self.last_modified_field)
+        return self.make_validators(request, "detail", [instance.pk], last_modified)
+
+    def not_modified_response(self, request, validators):
+        """検証子が一致すれば 304 (ヘッダー付き)、一致しなければ None"""
+        response = get_conditional_response(
+            request._request if hasattr(request, "_request") else request,
+            etag=validators.etag,
+            last_modified=validators.last_modified,
+        )
+        if response is not None:
+            self.patch_response(request, response, validators)
+        return response
+
+    def patch_response(self, request, response, validators=None):
+        if validators is not None and response.status_code in (200, 304):
+            for header, value in validators.headers.items():
+                response[header] = value
+        if self.public_max_age is not None and not request.user.is_authenticated:
+            patch_cache_control(
+                response, public=True, max_age=0, s_maxage=self.public_max_age
+            )
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, VARY_HEADERS)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        keyset = self.uses_keyset(request)
+        if keyset:
+            page = self.paginate_queryset(queryset)
+            validators = self.page_validators(request, page)
+        else:
+            validators = self.list_validators(
+                request, queryset.order_by().aggregate(**self.list_aggregates())
+            )
+        response = self.not_modified_response(request, validators)
+        if response is not None:
+            return response
+
+        # 以降は ListModelMixin.list と同じ
+        if not keyset:
+            page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        return self.patch_response(request, response, validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.object_validators(request, instance)
+        response = self.not_modified_response(request, validators)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return self.patch_response(request, Response(serializer.data), validators)
@@ -0,0 +1,216 @@
+# backend/app/core/images.py
+"""
+アップロード画像の派生サイズ (サムネイル・カード・詳細) の生成
+
+アップロードされた画像 (Product.image / Profile.image) はそのまま保存し、
+process_images コマンドのワーカー (プロセスプール) が後から次の処理を行う。
+
+- 元画像の正規化: EXIF の向きを画素に反映し、EXIF・XMP などのメタデータを除いて保存し直す
+  (JPEG / PNG / WebP のみ。位置情報などを公開しないため)。向きの指定もメタデータもない
+  画像は再エンコードせず、アップロードされたファイルをそのまま使う。
+- 派生画像の生成: IMAGE_VARIANT_SIZES の各サイズ (長辺の上限、拡大はしない) を
+  WebP と JPEG で保存する。保存先は「<元画像のディレクトリ>/derivatives/<ファイル名>/」。
+- 結果はモデルの image_variants (JSON) に保存する。
+    {"source": 元画像の name, "card": {"webp": name, "jpeg": name, "width": w, "height": h}, ...}
+  生成に失敗した場合は {"source": ..., "error": ...} を保存し、再試行しない。
+
+画像を差し替えて保存すると image_variants は空に戻り (reset_stale_variants)、
+ワーカーが改めて生成する。古い派生画像はコミット後に削除する。
+
+正規化した元画像は別名で保存し、結果の保存 (save_variants) と同時に image を付け替えてから
+古いファイルを削除する。結果の保存は「image が処理前と同じで image_variants が空」の行に
+限るため、処理中に画像が差し替えられた場合は結果を捨てて (作ったファイルも削除して) 次の
+バッチで新しい画像を処理する。同じ行を 2 回処理しないよう、ワーカーは 1 つだけ起動し、
+並列化はプロセスプール (process_images --workers) で行う。
+"""
+
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile  # type: ignore
+from django.core.files.storage import default_storage  # type: ignore
+from django.db import transaction  # type: ignore
+from django.db.models import Q  # type: ignore
+from django.utils import timezone  # type: ignore
+from PIL import ExifTags, Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# サイズ名: 長辺の上限 (px)
+IMAGE_VARIANT_SIZES = {
+    "thumbnail": 160,
+    "card": 480,
+    "detail": 1200,
+}
+# 出力形式: (Pillow の形式名, 拡張子, 保存オプション)
+IMAGE_VARIANT_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+# 派生画像の生成待ち (画像があり、image_variants が空) の条件
+PENDING_IMAGE_VARIANTS = Q(image_variants={}) & Q(image__isnull=False) & ~Q(image="")
+# 正規化して保存し直す元画像の形式
+NORMALIZED_FORMATS = {"JPEG", "PNG", "WEBP"}
+# 展開後の画素数の上限 (巨大な画像によるメモリ枯渇を防ぐ)
+MAX_IMAGE_PIXELS = 50_000_000
+
+
+def variant_dir(source_name):
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "derivatives", stem)
+
+
+def variant_names(variants):
+    """image_variants に含まれる派生画像の name の一覧"""
+    return [
+        name
+        for size in IMAGE_VARIANT_SIZES
+        for fmt in IMAGE_VARIANT_FORMATS
+        if (name := (variants or {}).get(size, {}).get(fmt))
+    ]
+
+
+def delete_variant_files(variants):
+    for name in variant_names(variants):
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.warning("Failed to delete image variant %s", name, exc_info=True)
+
+
+def reset_stale_variants(instance, update_fields=None):
+    """
+    モデルの save() から呼ぶ。画像が差し替えられていれば image_variants を空にして
+    ワーカーの処理対象に戻し、古い派生画像をコミット後に削除する。
+    保存するフィールドの一覧 (update_fields) を返す。
+    """
+    if update_fields is not None and "image" not in update_fields:
+        return update_fields
+    variants = instance.image_variants
+    if variants and variants.get("source") != (instance.image.name or None):
+        instance.image_variants = {}
+        transaction.on_commit(lambda: delete_variant_files(variants))
+        if update_fields is not None:
+            update_fields = {*update_fields, "image_variants"}
+    return update_fields
+
+
+def _open(source_name):
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    with default_storage.open(source_name, "rb") as f:
+        image = Image.open(f)
+        image.load()
+    return image
+
+
+def _has_metadata(image):
+    return bool(image.getexif()) or any(
+        key in image.info for key in ("exif", "xmp", "XML:com.adobe.xmp", "comment")
+    )
+
+
+def _encode(image, fmt, options):
+    if fmt == "JPEG":
+        if image.mode in ("RGBA", "LA", "P"):
+            # 透過部分は白で埋める
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    buffer = io.BytesIO()
+    # exif / icc_profile を渡さないため、メタデータは書き出されない
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def _needs_rotation(image):
+    return image.getexif().get(ExifTags.Base.Orientation, 1) != 1
+
+
+def _normalize_source(source_name, image, transposed):
+    """
+    向きの反映とメタデータの除去をして元画像を保存し直し、保存後の name を返す。
+    向きの指定もメタデータもない画像は再エンコードせず (画質の劣化を避けるため)、そのまま使う。
+    """
+    if image.format not in NORMALIZED_FORMATS:
+        return source_name
+    # exif_transpose は向きの指定がなくても複製を返すため、画像のデータで判定する
+    if not _needs_rotation(image) and not _has_metadata(image):
+        return source_name
+    options = {"quality": 90} if image.format in ("JPEG", "WEBP") else {}
+    data = _encode(transposed, image.format, options)
+    # 元のファイルは save_variants で image を付け替えた後に削除する
+    return default_storage.save(source_name, ContentFile(data))
+
+
+def build_variants(source_name):
+    """
+    元画像を正規化し、派生画像を保存して image_variants の値を返す。
+    DB にはアクセスしないため、ワーカープロセスで実行できる。
+    """
+    image = _open(source_name)
+    transposed = ImageOps.exif_transpose(image)
+    source_name = _normalize_source(source_name, image, transposed)
+
+    directory = variant_dir(source_name)
+    variants = {"source": source_name}
+    for size_name, max_side in IMAGE_VARIANT_SIZES.items():
+        resized = transposed.copy()
+        resized.thumbnail(
+            (max_side, max_side), Image.Resampling.LANCZOS, reducing_gap=3.0
+        )
+        entry = {}
+        for fmt_name, (fmt, extension, options) in IMAGE_VARIANT_FORMATS.items():
+            entry[fmt_name] = default_storage.save(
+                posixpath.join(directory, f"{size_name}.{extension}"),
+                ContentFile(_encode(resized, fmt, options)),
+            )
+        entry["width"], entry["height"] = resized.size
+        variants[size_name] = entry
+    return variants
+
+
+def build_variants_safely(source_name):
+    """build_variants の例外を {"source": ..., "error": ...} にして返す (プロセスプール用)"""
+    try:
+        return build_variants(source_name)
+    except Exception as exc:
+        return {"source": source_name, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def pending_rows(model, batch_size):
+    """派生画像の生成待ちの行 [(pk, image の name)]"""
+    return list(
+        model.objects.filter(PENDING_IMAGE_VARIANTS)
+        .order_by("pk")
+        .values_list("pk", "image")[:batch_size]
+    )
+
+
+def save_variants(model, pk, source_name, variants):
+    """
+    build_variants の結果を保存する。処理中に画像が差し替えられていた場合は保存せず、
+    作成したファイルを削除して False を返す。
+    """
+    # update() は auto_now を更新しないため明示する (条件付き GET の検証子に反映させる)
+    updates = {"image_variants": variants, "updated_at": timezone.now()}
+    normalized = variants["source"] != source_name
+    if normalized:
+        updates["image"] = variants["source"]
+    updated = model.objects.filter(
+        PENDING_IMAGE_VARIANTS, pk=pk, image=source_name
+    ).update(**updates)
+    if updated:
+        if normalized:
+            default_storage.delete(source_name)
+        return True
+    delete_variant_files(variants)
+    if normalized:
+        default_storage.delete(variants["source"])
+    return False
@@ -0,0 +1,159 @@
+# backend/app/core/management/commands/generate_synthetic_data.py
+"""
+負荷試験用の合成データを一括登録する (app/core/synthetic.py)
+
+    python manage.py generate_synthetic_data                       # 小規模 (既定値)
+    python manage.py generate_synthetic_data --producers 100000 --buyers 500000 \\
+        --products-per-producer 20 --orders 3400000 --items-per-order 3 --workers 8
+
+ユーザー名は <prefix>_producer<番号> / <prefix>_buyer<番号>、パスワードは全員
+--password (benchmarks/load_mix.py のログインに使う)。同じ prefix のユーザーが
+既にいる場合は登録しない (作り直す場合は DB を作り直すか、別の --prefix を使う)。
+
+ユーザー → 商品 → 注文・明細・お気に入り の順に、それぞれ --batch-size 件ずつの
+チャンクを --workers 個のプロセスで並列に COPY する。登録後に売上集計
+(ProductDailySales) を作り直し、ANALYZE で統計情報を更新する。
+外部検索インデックス (ELASTICSEARCH_HOST) を使う場合は reindex_products を実行すること。
+"""
+
+import dataclasses
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django  # type: ignore
+from django.conf import settings  # type: ignore
+from django.contrib.auth import get_user_model  # type: ignore
+from django.contrib.auth.hashers import make_password  # type: ignore
+from django.core.management import call_command  # type: ignore
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+from django.db import connection, connections  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from app.core.synthetic import PHASES, Plan, chunks, generate_chunk, reserve_ids
+from app.favorites.models import FavoriteProduct
+from app.orders.models import Order, OrderItem
+from app.products.cache import invalidate_product_cache
+from app.products.models import Product
+from app.profiles.models import Profile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "負荷試験用のユーザー・商品・注文・お気に入りを一括登録する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--producers", type=int, default=200)
+        parser.add_argument("--buyers", type=int, default=1000)
+        parser.add_argument("--products-per-producer", type=int, default=20)
+        parser.add_argument("--orders", type=int, default=20000)
+        parser.add_argument(
+            "--items-per-order", type=int, default=3, help="1 注文あたりの平均明細数"
+        )
+        parser.add_argument("--favorites-per-buyer", type=int, default=5)
+        parser.add_argument(
+            "--days", type=int, default=365, help="注文日時を分散させる日数"
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--prefix", default="synthetic", help="ユーザー名の接頭辞")
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="並列に登録するプロセス数",
+        )
+        parser.add_argument(
+            "--skip-rollup", action="store_true", help="売上集計を作り直さない"
+        )
+
+    def handle(self, *args, **options):
+        for name in ("producers", "buyers", "products_per_producer", "orders"):
+            if options[name] < 0:
+                raise CommandError(f"--{name.replace('_', '-')} must not be negative")
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be at least 1")
+        if options["items_per_order"] < 1 or options["days"] < 1:
+            raise CommandError("--items-per-order and --days must be at least 1")
+        if options["orders"] and not (
+            options["buyers"]
+            and options["producers"]
+            and options["products_per_producer"]
+        ):
+            raise CommandError("Orders need at least one buyer and one product")
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(
+                f"Users with the prefix {options['prefix']!r} already exist "
+                f"(use another --prefix or a fresh database)"
+            )
+
+        plan = Plan(
+            prefix=options["prefix"],
+            producers=options["producers"],
+            buyers=options["buyers"],
+            products_per_producer=options["products_per_producer"],
+            orders=options["orders"],
+            items_per_order=options["items_per_order"],
+            favorites_per_buyer=options["favorites_per_buyer"],
+            days=options["days"],
+            seed=options["seed"],
+            password=make_password(options["password"]),
+            now=timezone.now(),
+        )
+        plan = dataclasses.replace(
+            plan,
+            first_user_id=reserve_ids(User, plan.users),
+            first_product_id=reserve_ids(Product, plan.products),
+            first_order_id=reserve_ids(Order, plan.orders),
+        )
+
+        started = time.perf_counter()
+        # 子プロセスはそれぞれ DB に接続する (fork で接続を引き継がないよう spawn で起動)
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            for kinds in PHASES:
+                self._run_phase(executor, plan, kinds, options["batch_size"])
+
+        if not options["skip_rollup"] and plan.orders:
+            self.stdout.write("Rebuilding the daily sales rollup...")
+            call_command("backfill_sales_rollup", stdout=self.stdout)
+        self._analyze()
+        invalidate_product_cache()
+        self.stdout.write(
+            self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s")
+        )
+        if settings.ELASTICSEARCH_HOST:
+            self.stdout.write("Run `manage.py reindex_products` to index the products.")
+
+    def _run_phase(self, executor, plan, kinds, batch_size):
+        started = time.perf_counter()
+        rows = dict.fromkeys(kinds, 0)
+        futures = [
+            executor.submit(generate_chunk, plan, *chunk)
+            for chunk in chunks(plan, kinds, batch_size)
+        ]
+        for future in as_completed(futures):
+            kind, count = future.result()
+            rows[kind] += count
+        elapsed = time.perf_counter() - started
+        total = sum(rows.values())
+        self.stdout.write(
+            f"{' + '.join(kinds)}: {total} rows in {elapsed:.1f}s "
+            f"({total / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+
+    @staticmethod
+    def _analyze():
+        # 一括登録の直後は統計情報が古く、実行計画が実際のデータ量に合わないため
+        with connection.cursor() as cursor:
+            for model in (User, Profile, Product, Order, OrderItem, FavoriteProduct):
+                cursor.execute(
+                    f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}"
+                )
@@ -0,0 +1,94 @@
+# backend/app/core/management/commands/process_images.py
+"""
+商品画像・プロフィール画像の派生画像 (app/core/images.py) を生成するワーカー
+
+    python manage.py process_images                # 生成待ちがなくなるまで処理して終了
+    python manage.py process_images --loop         # 常駐して一定間隔で処理
+    python manage.py process_images --workers 4    # 画像の変換を 4 プロセスで並列に行う
+
+画像の変換 (Pillow) は CPU を使うため、プロセスプールで並列に行う。
+DB の読み書きはこのプロセスだけが行い、子プロセスはストレージのファイルだけを扱う。
+同じ行を二重に処理しないよう、このコマンドは 1 つだけ起動すること。
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django  # type: ignore
+from django.apps import apps  # type: ignore
+from django.core.management.base import BaseCommand  # type: ignore
+from django.db import close_old_connections  # type: ignore
+
+from app.core.images import build_variants_safely, pending_rows, save_variants
+from app.products.cache import invalidate_product_cache
+
+# 対象のモデルと、結果を保存した後の処理
+# (update() は post_save を送らないため、匿名向けの商品一覧キャッシュはここで破棄する)
+TARGETS = {
+    "products.Product": invalidate_product_cache,
+    "profiles.Profile": None,
+}
+
+
+class Command(BaseCommand):
+    help = "アップロード画像の派生画像 (サムネイル・カード・詳細) を生成する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="画像を変換するプロセス数",
+        )
+        parser.add_argument("--loop", action="store_true", help="常駐して処理し続ける")
+        parser.add_argument(
+            "--interval", type=float, default=5.0, help="生成待ちがないときの待機秒数"
+        )
+
+    def handle(self, *args, **options):
+        # fork した子プロセスに DB 接続を引き継がないよう spawn で起動する
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            while True:
+                for label, after_update in TARGETS.items():
+                    self._drain(
+                        apps.get_model(label),
+                        executor,
+                        options["batch_size"],
+                        after_update,
+                    )
+                if not options["loop"]:
+                    return
+                time.sleep(options["interval"])
+                close_old_connections()
+
+    def _drain(self, model, executor, batch_size, after_update):
+        while True:
+            rows = pending_rows(model, batch_size)
+            if not rows:
+                return
+            results = executor.map(build_variants_safely, [name for _, name in rows])
+            saved = failed = skipped = 0
+            for (pk, name), variants in zip(rows, results):
+                if not save_variants(model, pk, name, variants):
+                    skipped += 1
+                elif "error" in variants:
+                    failed += 1
+                    self.stderr.write(
+                        f"{model._meta.label} pk={pk}: {variants['error']}"
+                    )
+                else:
+                    saved += 1
+            if after_update and saved + failed:
+                after_update()
+            self.stdout.write(
+                f"{model._meta.label}: saved={saved} failed={failed} skipped={skipped}"
+            )
+            if len(rows) < batch_size:
+                return
@@ -0,0 +1,335 @@
+# backend/app/core/pagination.py
+"""
+一覧 API 共通のページネーション
+
+- ページ番号方式 (?page=): 総件数 (count) が必要なクライアント向け。COUNT(*) + OFFSET を実行する。
+- キーセット方式 (?pagination=cursor / ?cursor=): 並び順のキー (例: created_at, id) の
+  続きから取得するため、何ページ目でも COUNT や OFFSET のコストがかからない。
+- 呼び出し側が件数を数え済みの場合 (条件付き GET の集計、app/core/conditional.py) は
+  known_count に入れておくと、ページ番号方式の COUNT を省略する。
+"""
+
+import base64
+import datetime
+import json
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import (  # type: ignore
+    FieldDoesNotExist,
+    ValidationError,
+)
+from django.core.paginator import InvalidPage  # type: ignore
+from django.db.models import F, Field, Func, Q, Value  # type: ignore
+from django.db.models.constants import LOOKUP_SEP  # type: ignore
+from django.db.models.lookups import GreaterThan, LessThan  # type: ignore
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_position_value(value):
+    # DjangoJSONEncoder はマイクロ秒をミリ秒に切り詰めるため、キーの値は独自に変換する
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} はカーソルに使用できません。")
+
+
+class _Row(Func):
+    """行値 (a, b, ...)。LessThan / GreaterThan で行どうしを比較する"""
+
+    function = ""
+    output_field = Field()
+
+
+class KeysetPagination(BasePagination):
+    """
+    キーセット (シーク) 方式のページネーション。
+    クエリセットの order_by (OrderingFilter 適用後) の各列に主キーを加えたものをキーとし、
+    「最後に表示した行より後ろ」の条件で次ページを取得する。
+    ソートキーの列は NULL を含まないこと。
+    """
+
+    page_size = 12
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "無効なカーソルです。"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.build_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset の非同期版 (非同期ビュー用)"""
+        queryset = self.page_queryset(queryset, request)
+        return self.build_page([row async for row in queryset.aiterator()])
+
+    def page_queryset(self, queryset, request):
+        """カーソルの続きから 1 ページ + 1 件を取得するクエリセット"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        self.ordering = self.get_ordering(queryset)
+        self.cursor = cursor = self.decode_cursor(request, queryset)
+        self.reverse = bool(cursor and cursor.get("r"))
+
+        ordering = self.ordering
+        if self.reverse:  # 前のページは逆順に取得してから並べ直す
+            ordering = [(name, not descending) for name, descending in ordering]
+        queryset = queryset.order_by(
+            *[f"-{name}" if descending else name for name, descending in ordering]
+        )
+        if cursor:
+            queryset = queryset.filter(self.seek_filter(ordering, cursor["p"]))
+
+        # 1 件多く取得して次 (逆順なら前) のページの有無を判定する
+        return queryset[: self.page_size + 1]
+
+    def build_page(self, rows):
+        cursor = self.cursor
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = bool(cursor) if not self.reverse else has_more
+        self.first_position = self.get_position(rows[0]) if rows else None
+        self.last_position = self.get_position(rows[-1]) if rows else None
+        if not rows:
+            self.has_next = self.has_previous = False
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        # [(フィールド名, 降順か)] + 主キー (同値の行の順序を一意にするため)
+        pk_name = queryset.model._meta.pk.attname
+        terms = queryset.query.order_by or queryset.model._meta.ordering or []
+        ordering = []
+        for term in terms:
+            if not isinstance(term, str) or term == "?":
+                continue  # 式やランダム順はキーにできない
+            name = term.lstrip("-")
+            ordering.append((pk_name if name == "pk" else name, term.startswith("-")))
+        if not any(name == pk_name for name, _ in ordering):
+            ordering.append((pk_name, ordering[0][1] if ordering else True))
+        return ordering
+
+    @staticmethod
+    def seek_filter(ordering, position):
+        """
+        「キーが position より後ろ」の条件。
+        全列が同じ向きなら行値の比較 (a, b, id) < (va, vb, vid) を使い、インデックスを
+        カーソルの位置から読めるようにする。向きが混在する場合は
+        a < va OR (a = va AND b > vb) OR ... に展開し、先頭の列の範囲 (a <= va) を
+        AND で加える (OR だけではインデックスの開始位置にならないため)。
+        """
+        directions = {descending for _, descending in ordering}
+        if len(directions) == 1:
+            lookup = LessThan if directions.pop() else GreaterThan
+            return lookup(
+                _Row(*[F(name) for name, _ in ordering]),
+                _Row(*[Value(value) for value in position]),
+            )
+        clauses = []
+        for index, (name, descending) in enumerate(ordering):
+            equal = {prev: position[i] for i, (prev, _) in enumerate(ordering[:index])}
+            lookup = f"{name}__lt" if descending else f"{name}__gt"
+            clauses.append(Q(**equal, **{lookup: position[index]}))
+        first, descending = ordering[0]
+        bound = Q(**{f"{first}__lte" if descending else f"{first}__gte": position[0]})
+        return bound & reduce(or_, clauses)
+
+    def get_position(self, row):
+        # 行 (モデルインスタンスまたは values() の dict) からキーの値を取り出す
+        if isinstance(row, dict):
+            return [row[name] for name, _ in self.ordering]
+        return [getattr(row, name) for name, _ in self.ordering]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps(
+            {"p": position, "r": reverse}, default=_encode_position_value
+        )
+        token = base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    @staticmethod
+    def get_key_field(queryset, name):
+        """並び順のキーの列のフィールド (注釈ならその output_field、不明なら None)"""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        model, field = queryset.model, None
+        try:
+            for part in name.split(LOOKUP_SEP):
+                field = model._meta.get_field(part)
+                model = field.related_model
+        except (FieldDoesNotExist, AttributeError):
+            return None
+        return field
+
+    def decode_cursor(self, request, queryset):
+        """
+        カーソルを {"p": [キーの値], "r": 逆順か} に戻す。キーの値は各列のフィールドの
+        to_python で変換する (改ざんされた値をそのまま WHERE 句に使うと 500 になるため)。
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+            if len(cursor["p"]) != len(self.ordering):
+                raise ValueError
+            position = []
+            for (name, _), value in zip(self.ordering, cursor["p"]):
+                if value is None or isinstance(value, (list, dict)):
+                    raise ValueError  # ソートキーの列は NULL を含まない
+                field = self.get_key_field(queryset, name)
+                position.append(field.to_python(value) if field else value)
+            cursor["p"] = position
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            UnicodeEncodeError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    ページ番号方式を基本とし、?pagination=cursor または ?cursor= が指定された場合は
+    キーセット方式でページングする。
+    paginate_by_default = False の場合、ページ関連のパラメータがなければページングしない
+    (配列をそのまま返す既存クライアント向け)。
+    """
+
+    page_size = 12
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    mode_query_param = "pagination"
+    paginate_by_default = True
+    keyset_class = KeysetPagination
+    known_count = None  # queryset の件数 (分かっている場合)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.make_keyset()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        if not self.should_paginate(request):
+            return None
+        if self.known_count is None:
+            return super().paginate_queryset(queryset, request, view)
+        page = self.page_with_count(queryset, request, self.known_count)
+        return None if page is None else list(page)
+
+    def use_keyset(self, request):
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == "cursor"
+            or self.keyset_class.cursor_query_param in params
+        )
+
+    def make_keyset(self):
+        keyset = self.keyset_class()
+        keyset.page_size = self.page_size
+        keyset.page_size_query_param = self.page_size_query_param
+        keyset.max_page_size = self.max_page_size
+        return keyset
+
+    def should_paginate(self, request):
+        params = request.query_params
+        return self.paginate_by_default or (
+            self.page_query_param in params or self.page_size_query_param in params
+        )
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset の非同期版 (非同期ビュー用)。
+        件数とページの行は非同期 ORM (acount / aiterator) で取得し、ページ番号の検証や
+        リンクの生成は PageNumberPagination の処理をそのまま使う。
+        """
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.make_keyset()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        if not self.should_paginate(request):
+            return None
+
+        count = self.known_count
+        if count is None:
+            count = await queryset.acount()
+        page = self.page_with_count(queryset, request, count)
+        if page is None:
+            return None
+        page.object_list = [row async for row in page.object_list.aiterator()]
+        return list(page)
+
+    def page_with_count(self, queryset, request, count):
+        """
+        PageNumberPagination.paginate_queryset と同じ処理で self.page を作る
+        (行はまだ取得しない)。件数は count を使い、COUNT を実行しない。
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count (cached_property) に先に値を入れておく
+        paginator.__dict__["count"] = count
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class StandardResultsSetPagination(PageNumberOrKeysetPagination):
+    """一覧 API 標準のページネーション (12 件/ページ)"""
+
+    page_size = 12
@@ -0,0 +1,48 @@
+# backend/app/core/serializers.py
+"""
+複数のアプリで使うシリアライザのフィールド
+"""
+
+from django.core.files.storage import default_storage  # type: ignore
+from rest_framework import serializers
+
+from app.core.images import IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_SIZES
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    image_variants (app/core/images.py) をサイズごとの URL にして返す。
+
+        {"thumbnail": {"webp": URL, "jpeg": URL, "width": 160, "height": 120}, "card": {...}, ...}
+
+    派生画像がまだない (生成待ち・失敗) 場合は None を返すので、クライアントは image を使う。
+    URL は FileField と同じく、request があれば絶対 URL にする。
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        kwargs.setdefault("source", "image_variants")
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value or "error" in value:
+            return None
+        request = self.context.get("request")
+        urls = {}
+        for size in IMAGE_VARIANT_SIZES:
+            entry = value.get(size)
+            if not entry:
+                return None
+            urls[size] = {
+                fmt: self._url(entry[fmt], request) for fmt in IMAGE_VARIANT_FORMATS
+            }
+            urls[size]["width"] = entry["width"]
+            urls[size]["height"] = entry["height"]
+        return urls
+
+    @staticmethod
+    def _url(name, request):
+        url = default_storage.url(name)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -0,0 +1,145 @@
+# backend/app/core/spreadsheets.py
+"""
+表形式データ (CSV / .xlsx) を少しずつ書き出すジェネレーター
+
+StreamingHttpResponse に渡し、行を読みながら送信する。どちらも一定量 (FLUSH_BYTES)
+たまるごとに bytes を返すため、行数によらずメモリ使用量は一定で、最初の行から送信を始められる。
+
+- CSV: UTF-8 (BOM 付き。Excel で文字化けしないため)。
+  =, +, -, @, タブ, CR で始まる文字列は、表計算ソフトで数式として実行されないよう
+  先頭に ' を付ける (CSV インジェクション対策。数値はそのまま)。
+- .xlsx: openpyxl はブック全体を書き終えてから保存するため使わず、ZIP (zipfile) に
+  ワークシートの XML を直接書き込む。文字列はインライン文字列 (共有文字列表を作らない)、
+  スタイルは持たない (日時は文字列で渡す)。
+"""
+
+import csv
+import io
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+FLUSH_BYTES = 64 * 1024
+
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class _Chunks:
+    """書き込まれた bytes をためておき、take() で取り出す (ZipFile の出力先)"""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return data
+
+
+# 表計算ソフトが数式の開始とみなす文字
+_CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, str) and value.startswith(_CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+# XML 1.0 で使えない制御文字 (タブ・改行以外)
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>\
+</Relationships>"""
+
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>"""
+
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>\
+</Relationships>"""
+
+_SHEET_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>"""
+
+_SHEET_END = "</sheetData></worksheet>"
+
+
+def _xlsx_cell(value):
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_ILLEGAL_XML_CHARS.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(row):
+    return f"<row>{''.join(map(_xlsx_cell, row))}</row>"
+
+
+def stream_xlsx(header, rows, sheet_name="Sheet1"):
+    output = _Chunks()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as book:
+        book.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        book.writestr("_rels/.rels", _ROOT_RELS)
+        book.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name)))
+        book.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        # 行数が多いとサイズが 4 GB を超えうるため ZIP64 で書く
+        with book.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((_SHEET_START + _xlsx_row(header)).encode())
+            pending = []
+            pending_size = 0
+            for row in rows:
+                xml = _xlsx_row(row)
+                pending.append(xml)
+                pending_size += len(xml)
+                if pending_size >= FLUSH_BYTES:
+                    sheet.write("".join(pending).encode())
+                    pending = []
+                    pending_size = 0
+                    if output.size:
+                        yield output.take()
+            sheet.write(("".join(pending) + _SHEET_END).encode())
+    yield output.take()
@@ -0,0 +1,505 @@
+# backend/app/core/synthetic.py
+"""
+負荷試験用の合成データ (generate_synthetic_data コマンドで使用)
+
+ユーザー (生産者・購入者) とプロフィール、商品、注文・明細、お気に入りを
+PostgreSQL の COPY で一括登録する。
+
+- 主キーは最初にテーブルごとにまとめて予約し (reserve_ids)、各行の ID を
+  「先頭の ID + 番号」で決める。登録済みの行を読み戻さずに外部キーを組み立てられるため、
+  チャンク (batch_size 行ずつ) を複数のワーカープロセスで並列に登録できる。
+- 乱数はチャンクごとに (seed, 種類, 先頭の番号) から作る。ワーカー数によらず
+  同じ引数なら同じデータになる (ID の先頭と注文 ID の UUID を除く)。
+- 商品の属性 (名前・価格など) は番号だけで決まる関数 (product_attrs) で作り、
+  明細の商品名・購入時単価も DB を読まずに同じ関数で求める。
+- 商品は一時テーブルに COPY してから INSERT … SELECT で search_vector を付けて登録する
+  (app/products/search.py の SEARCH_VECTOR_SQL と同じ式)。
+- COPY は save() やシグナルを通らないため、売上集計 (ProductDailySales) の作り直し、
+  レスポンスキャッシュの無効化、外部検索インデックスの更新は呼び出し側で行う。
+"""
+
+import datetime
+import math
+import random
+import uuid
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.db import connection, transaction  # type: ignore
+
+from app.favorites.models import FavoriteProduct
+from app.orders.models import Order, OrderItem
+from app.products.models import Product
+from app.products.search import SEARCH_VECTOR_SQL, tokenize
+from app.profiles.models import Profile
+
+User = get_user_model()
+
+PREFECTURES = [
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県", "茨城県",
+    "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県", "新潟県", "富山県",
+    "石川県", "福井県", "山梨県", "長野県", "岐阜県", "静岡県", "愛知県", "三重県",
+    "滋賀県", "京都府", "大阪府", "兵庫県", "奈良県", "和歌山県", "鳥取県", "島根県",
+    "岡山県", "広島県", "山口県", "徳島県", "香川県", "愛媛県", "高知県", "福岡県",
+    "佐賀県", "長崎県", "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
+]  # fmt: skip
+SURNAMES = [
+    "佐藤",
+    "鈴木",
+    "高橋",
+    "田中",
+    "伊藤",
+    "渡辺",
+    "山本",
+    "中村",
+    "小林",
+    "加藤",
+]
+GIVEN_NAMES = ["翔", "陽菜", "蓮", "結衣", "大和", "さくら", "湊", "葵", "悠真", "美咲"]
+# (品目, カテゴリ, 単位, 基準価格)
+CROPS = [
+    ("トマト", "野菜", "kg", 600),
+    ("ミニトマト", "野菜", "pack", 400),
+    ("きゅうり", "野菜", "kg", 500),
+    ("なす", "野菜", "kg", 500),
+    ("ピーマン", "野菜", "pack", 300),
+    ("じゃがいも", "野菜", "kg", 400),
+    ("にんじん", "野菜", "kg", 350),
+    ("玉ねぎ", "野菜", "kg", 350),
+    ("キャベツ", "野菜", "piece", 250),
+    ("レタス", "野菜", "piece", 250),
+    ("ほうれん草", "野菜", "bundle", 200),
+    ("大根", "野菜", "piece", 200),
+    ("りんご", "果物", "kg", 900),
+    ("みかん", "果物", "kg", 800),
+    ("いちご", "果物", "pack", 700),
+    ("ぶどう", "果物", "kg", 2500),
+    ("桃", "果物", "piece", 500),
+    ("梨", "果物", "kg", 900),
+    ("米", "米・穀物", "kg", 600),
+    ("もち米", "米・穀物", "kg", 800),
+    ("卵", "畜産物", "pack", 450),
+    ("はちみつ", "加工品", "g", 1500),
+]
+VARIETIES = ["", "有機", "朝採れ", "訳あり", "特選", "大玉", "減農薬", "新物"]
+CULTIVATION_METHODS = [value for value, _ in Product.CULTIVATION_CHOICES]
+ORDER_STATUS_WEIGHTS = [
+    (Order.ORDER_STATUS_COMPLETED, 70),
+    (Order.ORDER_STATUS_SHIPPED, 10),
+    (Order.ORDER_STATUS_PROCESSING, 6),
+    (Order.ORDER_STATUS_PENDING, 6),
+    (Order.ORDER_STATUS_CANCELLED, 7),
+    (Order.ORDER_STATUS_REFUNDED_ORDER, 1),
+]
+PAYMENT_STATUS_FOR = {
+    Order.ORDER_STATUS_PENDING: Order.PAYMENT_STATUS_PENDING,
+    Order.ORDER_STATUS_CANCELLED: Order.PAYMENT_STATUS_FAILED,
+    Order.ORDER_STATUS_REFUNDED_ORDER: Order.PAYMENT_STATUS_REFUNDED_PAYMENT,
+}
+PAYMENT_METHODS = [value for value, _ in Order.PAYMENT_METHOD_CHOICES]
+# 商品の在庫 (負荷試験の注文で売り切れないよう多めにする)
+PRODUCT_STOCK = 100000
+
+# チャンクの種類 (登録する順。前の段階の行を外部キーで参照する)
+PHASES = [("users",), ("products",), ("orders", "favorites")]
+
+
+@dataclass(frozen=True)
+class Plan:
+    """生成する件数と、予約した主キーの先頭"""
+
+    prefix: str
+    producers: int
+    buyers: int
+    products_per_producer: int
+    orders: int
+    items_per_order: int  # 1 注文あたりの平均明細数
+    favorites_per_buyer: int
+    days: int  # 注文日時を過去何日に分散させるか
+    seed: int
+    password: str  # ハッシュ化したパスワード (全ユーザー共通)
+    now: datetime.datetime
+    first_user_id: int = 0
+    first_product_id: int = 0
+    first_order_id: int = 0
+
+    @property
+    def users(self):
+        return self.producers + self.buyers
+
+    @property
+    def products(self):
+        return self.producers * self.products_per_producer
+
+    def count(self, kind):
+        """チャンクに分ける単位の件数 (users / products / orders / favorites は購入者数)"""
+        return {
+            "users": self.users,
+            "products": self.products,
+            "orders": self.orders,
+            "favorites": self.buyers if self.products else 0,
+        }[kind]
+
+    def producer_username(self, index):
+        return f"{self.prefix}_producer{index}"
+
+    def buyer_username(self, index):
+        return f"{self.prefix}_buyer{index}"
+
+
+def reserve_ids(model, count):
+    """
+    model の主キーを count 個予約し、先頭の ID を返す。
+    テーブルをロックしてからシーケンスを進めるため、並行する INSERT と重ならない
+    (fixture などで明示した ID がシーケンスより大きくても、その後ろから予約する)。
+    """
+    if not count:
+        return 0
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    pk = model._meta.pk.column
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(table)} IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute(
+            f"SELECT GREATEST(nextval(pg_get_serial_sequence(%s, %s)), "
+            f"COALESCE(MAX({qn(pk)}), 0) + 1) FROM {qn(table)}",
+            [table, pk],
+        )
+        first = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, %s), %s)",
+            [table, pk, first + count - 1],
+        )
+    return first
+
+
+class Copier:
+    """
+    model に columns (attname) の値の行を COPY する。
+    columns 以外の列 (主キーを除く) にはフィールドの既定値を入れる。
+    extra_columns は table (一時テーブル) にだけある列で、各行の末尾に値を渡す。
+    """
+
+    def __init__(self, model, columns, table=None, extra_columns=()):
+        self.width = len(columns)
+        fields = [
+            field
+            for field in model._meta.concrete_fields
+            if field.attname not in columns and not field.primary_key
+        ]
+        fixed = []
+        for field in fields:
+            value = field.get_db_prep_save(field.get_default(), connection)
+            if value is None and not field.null:
+                raise ValueError(f"{model.__name__}.{field.name} has no default")
+            fixed.append(value)
+        self.fixed = tuple(fixed)
+        qn = connection.ops.quote_name
+        # モデルの列 (columns の順、続いて既定値の列)
+        self.model_columns = [
+            qn(model._meta.get_field(name).column) for name in columns
+        ] + [qn(field.column) for field in fields]
+        self.sql = (
+            f"COPY {qn(table or model._meta.db_table)} "
+            f"({', '.join([*self.model_columns, *extra_columns])}) FROM STDIN"
+        )
+
+    def copy(self, cursor, rows):
+        count = 0
+        with cursor.copy(self.sql) as copy:
+            for row in rows:
+                copy.write_row((*row[: self.width], *self.fixed, *row[self.width :]))
+                count += 1
+        return count
+
+
+def _rng(plan, kind, start):
+    return random.Random(f"{plan.seed}:{kind}:{start}")
+
+
+def _person(rng):
+    return rng.choice(SURNAMES), rng.choice(GIVEN_NAMES)
+
+
+# --- ユーザー・プロフィール ---
+
+USER_COLUMNS = [
+    "id", "username", "email", "password", "first_name", "last_name", "date_joined",
+]  # fmt: skip
+PROFILE_COLUMNS = [
+    "user_id", "is_producer", "farm_name", "location_prefecture", "location_city",
+    "bio", "prefecture", "city", "address1", "postal_code", "phone_number_user",
+    "created_at", "updated_at",
+]  # fmt: skip
+
+
+def _user_rows(plan, start, stop):
+    rng = _rng(plan, "users", start)
+    users, profiles = [], []
+    for index in range(start, stop):
+        is_producer = index < plan.producers
+        username = (
+            plan.producer_username(index)
+            if is_producer
+            else plan.buyer_username(index - plan.producers)
+        )
+        surname, given_name = _person(rng)
+        joined = plan.now - datetime.timedelta(
+            days=rng.uniform(plan.days, plan.days * 3)
+        )
+        prefecture = rng.choice(PREFECTURES)
+        user_id = plan.first_user_id + index
+        users.append(
+            (
+                user_id,
+                username,
+                f"{username}@example.com",
+                plan.password,
+                given_name,
+                surname,
+                joined,
+            )
+        )
+        profiles.append(
+            (
+                user_id,
+                is_producer,
+                f"{surname}農園" if is_producer else "",
+                prefecture if is_producer else "",
+                f"{surname}町" if is_producer else "",
+                (
+                    f"{prefecture}で{rng.choice(CROPS)[0]}を育てています。"
+                    if is_producer
+                    else ""
+                ),
+                prefecture,
+                f"{given_name}市",
+                f"{rng.randint(1, 9)}-{rng.randint(1, 30)}",
+                f"{rng.randint(100, 999)}-{rng.randint(0, 9999):04d}",
+                f"0{rng.randint(10, 99)}0000{rng.randint(0, 9999):04d}",
+                joined,
+                joined,
+            )
+        )
+    return users, profiles
+
+
+# --- 商品 ---
+
+PRODUCT_COLUMNS = [
+    "id", "producer_id", "name", "description", "category", "price", "quantity",
+    "unit", "cultivation_method", "status", "created_at", "updated_at",
+]  # fmt: skip
+
+
+def _mix(value):
+    """番号から決まる疑似乱数 (32 ビット)"""
+    value = (value * 2654435761 + 0x9E3779B9) & 0xFFFFFFFF
+    return (value ^ (value >> 16)) * 0x45D9F3B & 0xFFFFFFFF
+
+
+def product_attrs(index):
+    """番号 index の商品の (名前, カテゴリ, 単位, 価格, 栽培方法, 状態)"""
+    crop, category, unit, base_price = CROPS[index % len(CROPS)]
+    hashed = _mix(index)
+    variety = VARIETIES[(index // len(CROPS)) % len(VARIETIES)]
+    price = base_price * (50 + hashed % 150) // 1000 * 10 or 10
+    if hashed % 100 < 88:
+        status = Product.STATUS_ACTIVE
+    elif hashed % 100 < 95:
+        status = Product.STATUS_INACTIVE
+    else:
+        status = Product.STATUS_DRAFT
+    method = CULTIVATION_METHODS[(hashed >> 8) % len(CULTIVATION_METHODS)]
+    return f"{variety}{crop}", category, unit, price, method, status
+
+
+def _product_rows(plan, start, stop):
+    rng = _rng(plan, "products", start)
+    for index in range(start, stop):
+        name, category, unit, price, method, status = product_attrs(index)
+        created = plan.now - datetime.timedelta(days=rng.uniform(0, plan.days))
+        description = (
+            f"{category}の{name}です。{rng.choice(PREFECTURES)}から直送します。"
+        )
+        yield (
+            plan.first_product_id + index,
+            plan.first_user_id + index // plan.products_per_producer,
+            name,
+            description,
+            category,
+            price,
+            PRODUCT_STOCK,
+            unit,
+            method,
+            status,
+            created,
+            created,
+            # 検索用 (一時テーブルのみ)
+            " ".join(tokenize(name)),
+            " ".join(tokenize(category)),
+            " ".join(tokenize(description)),
+        )
+
+
+def _copy_products(cursor, plan, start, stop):
+    """一時テーブルに COPY し、search_vector を付けて商品テーブルに登録する"""
+    qn = connection.ops.quote_name
+    table = qn(Product._meta.db_table)
+    staging = "synthetic_products"
+    token_columns = ["search_name", "search_category", "search_description"]
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+        f"(LIKE {table} INCLUDING DEFAULTS, "
+        f"{', '.join(f'{column} text' for column in token_columns)}) "
+        f"ON COMMIT DELETE ROWS"
+    )
+    copier = Copier(Product, PRODUCT_COLUMNS, staging, token_columns)
+    count = copier.copy(cursor, _product_rows(plan, start, stop))
+    search_vector = qn(Product._meta.get_field("search_vector").column)
+    values = [
+        (
+            SEARCH_VECTOR_SQL % tuple(token_columns)
+            if column == search_vector
+            else column
+        )
+        for column in copier.model_columns
+    ]
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(copier.model_columns)}) "
+        f"SELECT {', '.join(values)} FROM {staging}"
+    )
+    return count
+
+
+# --- 注文・明細 ---
+
+ORDER_COLUMNS = [
+    "id", "order_id", "user_id", "created_at", "updated_at", "shipping_full_name",
+    "shipping_postal_code", "shipping_prefecture", "shipping_city",
+    "shipping_address1", "shipping_phone_number", "total_amount", "payment_method",
+    "payment_status", "order_status",
+]  # fmt: skip
+ITEM_COLUMNS = [
+    "order_id",
+    "product_id",
+    "product_name",
+    "price_at_purchase",
+    "quantity",
+]
+
+
+class _Popularity:
+    """
+    商品の番号を人気に偏らせて選ぶ (上位の商品ほど多く注文される)。
+    人気の順位を番号に写す乗数を商品数と互いに素にして、人気の商品を生産者に分散させる。
+    """
+
+    def __init__(self, count, skew=2.0):
+        self.count = count
+        self.skew = skew
+        self.multiplier = 7919
+        while math.gcd(self.multiplier, count) != 1:
+            self.multiplier += 2
+
+    def choice(self, rng):
+        rank = int(self.count * rng.random() ** self.skew)
+        return (rank * self.multiplier + 13) % self.count
+
+
+def _order_rows(plan, start, stop):
+    rng = _rng(plan, "orders", start)
+    popularity = _Popularity(plan.products)
+    statuses, weights = zip(*ORDER_STATUS_WEIGHTS)
+    orders, items = [], []
+    for index in range(start, stop):
+        order_id = plan.first_order_id + index
+        created = plan.now - datetime.timedelta(days=plan.days * rng.random() ** 1.5)
+        age_days = (plan.now - created).days
+        status = (
+            rng.choices(statuses, weights)[0]
+            if age_days > 7
+            else rng.choice([Order.ORDER_STATUS_PENDING, Order.ORDER_STATUS_PROCESSING])
+        )
+        lines = {}
+        for _ in range(rng.randint(1, 2 * plan.items_per_order - 1)):
+            product_index = popularity.choice(rng)
+            lines[product_index] = lines.get(product_index, 0) + rng.randint(1, 3)
+        total = 0
+        for product_index, quantity in lines.items():
+            name, _, _, price, _, _ = product_attrs(product_index)
+            items.append(
+                (
+                    order_id,
+                    plan.first_product_id + product_index,
+                    name,
+                    price,
+                    quantity,
+                )
+            )
+            total += price * quantity
+        surname, given_name = _person(rng)
+        orders.append(
+            (
+                order_id,
+                str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                plan.first_user_id + plan.producers + rng.randrange(plan.buyers),
+                created,
+                created + datetime.timedelta(days=min(age_days, rng.randint(0, 5))),
+                f"{surname} {given_name}",
+                f"{rng.randint(100, 999)}-{rng.randint(0, 9999):04d}",
+                rng.choice(PREFECTURES),
+                f"{given_name}市",
+                f"{rng.randint(1, 9)}-{rng.randint(1, 30)}",
+                f"0{rng.randint(10, 99)}0000{rng.randint(0, 9999):04d}",
+                total,
+                rng.choice(PAYMENT_METHODS),
+                PAYMENT_STATUS_FOR.get(status, Order.PAYMENT_STATUS_PAID),
+                status,
+            )
+        )
+    return orders, items
+
+
+def _favorite_rows(plan, start, stop):
+    rng = _rng(plan, "favorites", start)
+    count = min(plan.favorites_per_buyer, plan.products)
+    for buyer in range(start, stop):
+        user_id = plan.first_user_id + plan.producers + buyer
+        created = plan.now - datetime.timedelta(days=rng.uniform(0, plan.days))
+        for product_index in rng.sample(range(plan.products), count):
+            yield (user_id, plan.first_product_id + product_index, created)
+
+
+def generate_chunk(plan, kind, start, stop):
+    """
+    kind の start 番目から stop 番目の手前までを 1 トランザクションで登録し、
+    (kind, 登録した行数) を返す (ワーカープロセスで実行する)。
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if kind == "users":
+            users, profiles = _user_rows(plan, start, stop)
+            rows = Copier(User, USER_COLUMNS).copy(cursor, users)
+            rows += Copier(Profile, PROFILE_COLUMNS).copy(cursor, profiles)
+        elif kind == "products":
+            rows = _copy_products(cursor, plan, start, stop)
+        elif kind == "orders":
+            orders, items = _order_rows(plan, start, stop)
+            rows = Copier(Order, ORDER_COLUMNS).copy(cursor, orders)
+            rows += Copier(OrderItem, ITEM_COLUMNS).copy(cursor, items)
+        elif kind == "favorites":
+            rows = Copier(
+                FavoriteProduct, ["user_id", "product_id", "created_at"]
+            ).copy(cursor, _favorite_rows(plan, start, stop))
+        else:
+            raise ValueError(f"Unknown kind: {kind}")
+    return kind, rows
+
+
+def chunks(plan, kinds, batch_size):
+    """[(kind, start, stop)]"""
+    return [
+        (kind, start, min(start + batch_size, plan.count(kind)))
+        for kind in kinds
+        for start in range(0, plan.count(kind), batch_size)
+    ]
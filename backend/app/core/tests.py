@@ -1,3 +1,309 @@
-from django.test import TestCase
+"""
+公開 API ごとの SQL クエリ数の上限 (クエリ予算)
 
-# Create your tests here.
+一覧は複数の生産者・商品・注文・明細のデータで呼び出し、件数に比例してクエリが増える
+変更 (N+1。シリアライザでの user.profile の参照、ページネーション外の count() など) を
+検出する。上限を超えた場合は実行した SQL を一覧にして失敗する。
+
+認証は本番と同じ JWT (RoleClaimsJWTAuthentication) で行う (force_authenticate は
+ユーザーの取得を省略するため使わない)。外部サービスは使わない (キャッシュはプロセス内メモリ、
+検索は PostgreSQL の search_vector)。
+"""
+
+import base64
+import json
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.db import connection  # type: ignore
+from django.test import TestCase  # type: ignore
+from django.test.utils import CaptureQueriesContext  # type: ignore
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from app.accounts.authentication import RoleClaimsRefreshToken
+from app.favorites.models import FavoriteProduct
+from app.core.pagination import KeysetPagination
+from app.orders.models import Order, OrderItem
+from app.products.cache import get_cache
+from app.products.models import Product
+from app.profiles.models import Profile
+
+User = get_user_model()
+
+
+class QueryBudgetTestCase(TestCase):
+    """assertMaxQueries: ブロック内のクエリ数が budget 以下であること"""
+
+    @contextmanager
+    def assertMaxQueries(self, budget, label=""):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = "\n".join(
+                f"{index}. {query['sql']}"
+                for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f"{label}: {executed} queries executed, budget is {budget}\n{queries}"
+            )
+
+
+class EndpointQueryBudgetTests(QueryBudgetTestCase):
+    """公開 API のクエリ予算 (一覧の件数によらず一定であること)"""
+
+    PRODUCERS = 3
+    PRODUCTS_PER_PRODUCER = 6
+    ORDERS = 6
+    ITEMS_PER_ORDER = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producers = []
+        for index in range(cls.PRODUCERS):
+            producer = User.objects.create_user(
+                username=f"budget_farm{index}", password="pw"
+            )
+            Profile.objects.create(
+                user=producer,
+                is_producer=True,
+                farm_name=f"農園{index}",
+                location_prefecture="長野県",
+            )
+            cls.producers.append(producer)
+        cls.buyer = User.objects.create_user(username="budget_buyer", password="pw")
+        Profile.objects.create(user=cls.buyer)
+
+        products = [
+            Product(
+                producer=producer,
+                name=f"トマト{index}",
+                description="説明",
+                category="野菜",
+                price=100 + index,
+                quantity=1000,
+                unit="kg",
+                status=Product.STATUS_ACTIVE,
+            )
+            for producer in cls.producers
+            for index in range(cls.PRODUCTS_PER_PRODUCER)
+        ]
+        for product in products:
+            product.search_vector = product.get_search_vector()
+        cls.products = Product.objects.bulk_create(products)
+
+        # 各注文に全生産者の商品を含める (生産者の受注一覧も複数件・複数明細になる)
+        for index in range(cls.ORDERS):
+            order = Order.objects.create(
+                user=cls.buyer,
+                shipping_full_name="山田 花子",
+                shipping_postal_code="100-0001",
+                shipping_prefecture="東京都",
+                shipping_city="千代田区",
+                shipping_address1="1-1",
+                shipping_phone_number="0300000000",
+                payment_method="bank_transfer",
+            )
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order=order,
+                    product=product,
+                    product_name=product.name,
+                    price_at_purchase=product.price,
+                    quantity=1,
+                )
+                for product in cls.products[index :: cls.ORDERS][: cls.ITEMS_PER_ORDER]
+            )
+        FavoriteProduct.objects.bulk_create(
+            FavoriteProduct(user=cls.buyer, product=product)
+            for product in cls.products[:10]
+        )
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            token = RoleClaimsRefreshToken.for_user(user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def assertWithinBudget(self, budget, method, path, user=None, data=None):
+        client = self.client_for(user)
+        get_cache().clear()  # レスポンス・認証ユーザーのキャッシュを使わない状態で数える
+        with self.assertMaxQueries(budget, f"{method.upper()} {path}"):
+            response = getattr(client, method)(path, data, format="json")
+        self.assertLess(response.status_code, 300, getattr(response, "data", None))
+        return response
+
+    def test_products(self):
+        product = self.products[0]
+        for budget, path, user in [
+            (2, "/api/products/", None),
+            (2, "/api/products/?page=1&page_size=5", None),
+            # キーセット方式は全体の集計 (条件付き GET の検証子) をしない
+            (1, "/api/products/?pagination=cursor&page_size=5", None),
+            (2, "/api/products/?search=トマト&ordering=price", None),
+            (1, f"/api/products/{product.pk}/", None),
+            (2, "/api/products/?owner=me", self.producers[0]),
+            (1, f"/api/products/{product.pk}/", self.buyer),
+            (1, "/api/products/facets/", None),
+        ]:
+            with self.subTest(path=path, authenticated=user is not None):
+                self.assertWithinBudget(budget, "get", path, user)
+
+    def test_order_create(self):
+        items = [{"product_id": product.pk, "quantity": 2} for product in self.products]
+        self.assertWithinBudget(
+            13,
+            "post",
+            "/api/my-orders/",
+            self.buyer,
+            {
+                "shipping_full_name": "山田 花子",
+                "shipping_postal_code": "100-0001",
+                "shipping_prefecture": "東京都",
+                "shipping_city": "千代田区",
+                "shipping_address1": "1-1",
+                "shipping_phone_number": "0300000000",
+                "payment_method": "bank_transfer",
+                "items": items,
+            },
+        )
+
+    def test_orders(self):
+        producer = self.producers[0]
+        order = Order.objects.for_producer(producer).first()
+        for budget, path, user in [
+            # OrderViewSet の一覧も (現状) 生産者の商品を含む注文を返す
+            (3, "/api/my-orders/", producer),
+            # 件数・最終更新日時の集計 (ページングの件数と共用)、注文、明細
+            (3, "/api/producer-orders/", producer),
+            (
+                3,
+                "/api/producer-orders/?order_status=pending_order&search=トマト",
+                producer,
+            ),
+            (2, f"/api/producer-orders/{order.order_id}/", producer),
+        ]:
+            with self.subTest(path=path):
+                self.assertWithinBudget(budget, "get", path, user)
+
+    def test_favorites_and_profiles(self):
+        for budget, path, user in [
+            (1, "/api/favorites/products/", self.buyer),
+            (2, "/api/profiles/", None),
+            (1, f"/api/profiles/{self.producers[0].username}/", None),
+            (1, "/api/profiles/me/", self.producers[0]),
+            (1, "/api/accounts/me/", self.producers[0]),
+        ]:
+            with self.subTest(path=path):
+                self.assertWithinBudget(budget, "get", path, user)
+
+
+class KeysetPaginationTests(TestCase):
+    """キーセット方式のページネーション (?pagination=cursor、app/core/pagination.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        producer = User.objects.create_user(username="keyset_farm", password="pw")
+        # 価格が同じ (ソートキーが同値の) 商品をページの境目にまたがるように並べる
+        cls.products = Product.objects.bulk_create(
+            Product(
+                producer=producer,
+                name=f"商品{index}",
+                description="説明",
+                price=price,
+                quantity=1,
+                unit="kg",
+                status=Product.STATUS_ACTIVE,
+            )
+            for index, price in enumerate([300, 100, 200, 100, 100, 300, 200])
+        )
+
+    def setUp(self):
+        get_cache().clear()
+
+    def get(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, getattr(response, "data", None))
+        return response.data
+
+    @staticmethod
+    def relative(url):
+        parts = urlsplit(url)
+        return f"{parts.path}?{parts.query}"
+
+    def walk(self, ordering):
+        """次ページのリンクを最後までたどり、各ページの ID の一覧を返す"""
+        pages = []
+        data = self.get(
+            f"/api/products/?pagination=cursor&page_size=2&ordering={ordering}"
+        )
+        pages.append([product["id"] for product in data["results"]])
+        self.assertIsNone(data["previous"])
+        while data["next"]:
+            data = self.get(self.relative(data["next"]))
+            pages.append([product["id"] for product in data["results"]])
+        return pages, data
+
+    def test_next_and_previous_with_ties(self):
+        for ordering, key in [
+            ("price", lambda p: (p.price, p.pk)),
+            ("-price", lambda p: (-p.price, -p.pk)),
+            ("-created_at", lambda p: (-p.created_at.timestamp(), -p.pk)),
+        ]:
+            with self.subTest(ordering=ordering):
+                pages, last = self.walk(ordering)
+                expected = [p.pk for p in sorted(self.products, key=key)]
+                self.assertEqual(sum(pages, []), expected)
+                self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+
+                # 最後のページから前のページをたどると同じページを逆順に返す
+                backwards = []
+                data = last
+                while data["previous"]:
+                    data = self.get(self.relative(data["previous"]))
+                    backwards.append([product["id"] for product in data["results"]])
+                self.assertEqual(backwards, pages[-2::-1])
+                self.assertIsNotNone(data["next"])
+
+    def test_invalid_cursor_is_not_found(self):
+        def token(payload):
+            raw = json.dumps(payload).encode()
+            return base64.urlsafe_b64encode(raw).decode()
+
+        for cursor in [
+            "not-base64!",
+            token(["x", 1]),
+            token({"p": [1]}),  # キーの数が違う
+            token({"p": ["x", 1]}),  # 日時でない値
+            token({"p": [None, 1]}),
+            token({"p": ["2026-01-01T00:00:00+00:00", "abc"]}),
+            token({"p": [{"a": 1}, 1]}),
+        ]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f"/api/products/?cursor={cursor}")
+                self.assertEqual(response.status_code, 404)
+
+    def test_deep_cursor_starts_the_index_scan_at_the_cursor(self):
+        # 行数が少ないとシーケンシャルスキャンが選ばれるため、無効にして計画を確認する
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+        for ordering, column in [("-created_at", "created_at"), ("price", "price")]:
+            with self.subTest(ordering=ordering):
+                _, last = self.walk(ordering)
+                request = Request(
+                    APIRequestFactory().get(self.relative(last["previous"]))
+                )
+                queryset = KeysetPagination().page_queryset(
+                    Product.objects.filter(status=Product.STATUS_ACTIVE).order_by(
+                        ordering
+                    ),
+                    request,
+                )
+                plan = queryset.explain()
+                self.assertIn("Index Scan", plan)
+                # 先頭のキーの範囲がインデックスの条件に入っている (フィルタで捨てない)
+                self.assertRegex(plan, rf"Index Cond: .*\b{column}\b")
@@ -17,7 +17,7 @@ class FavoriteProductViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # 常に自分の FavoriteProduct のみを返す
-        return FavoriteProduct.objects.filter(user=self.request.user).select_related(
+        return FavoriteProduct.objects.filter(user_id=self.request.user.pk).select_related(
             "product", "product__producer"
         )  # N+1 対策
 
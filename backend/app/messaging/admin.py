@@ -1,3 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin  # type: ignore
 
-# Register your models here.
+from .models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "to")
+    readonly_fields = ("created_at", "sent_at")
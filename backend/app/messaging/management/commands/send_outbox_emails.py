@@ -0,0 +1,45 @@
+# backend/app/messaging/management/commands/send_outbox_emails.py
+"""
+アウトボックス (OutboxEmail) の送信待ちメールを送信するワーカー
+
+    python manage.py send_outbox_emails            # 送信待ちがなくなるまで送信して終了
+    python manage.py send_outbox_emails --loop     # 常駐して一定間隔で送信
+"""
+
+import time
+
+from django.core.management.base import BaseCommand  # type: ignore
+from django.db import close_old_connections  # type: ignore
+
+from app.messaging.outbox import DEFAULT_BATCH_SIZE, DEFAULT_MAX_ATTEMPTS, send_pending
+
+
+class Command(BaseCommand):
+    help = "送信待ちのメールを送信する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+        parser.add_argument("--loop", action="store_true", help="常駐して送信し続ける")
+        parser.add_argument(
+            "--interval", type=float, default=5.0, help="送信待ちがないときの待機秒数"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self._drain(options["batch_size"], options["max_attempts"])
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
+            close_old_connections()
+
+    def _drain(self, batch_size, max_attempts):
+        # 1 バッチ = 1 接続。バッチが埋まっている間は続けて送信する
+        while True:
+            result = send_pending(batch_size=batch_size, max_attempts=max_attempts)
+            if result.total:
+                self.stdout.write(
+                    f"sent={result.sent} retried={result.retried} failed={result.failed}"
+                )
+            if result.total < batch_size or result.sent == 0:
+                return
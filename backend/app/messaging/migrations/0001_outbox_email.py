@@ -0,0 +1,84 @@
+# Generated by Django 5.2 on 2026-10-17 20:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=255, verbose_name="件名")),
+                ("body", models.TextField(verbose_name="本文")),
+                (
+                    "from_email",
+                    models.CharField(blank=True, max_length=255, verbose_name="送信元"),
+                ),
+                ("to", models.JSONField(default=list, verbose_name="送信先")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "送信待ち"),
+                            ("sent", "送信済み"),
+                            ("failed", "送信失敗"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="送信状況",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="送信試行回数"),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="次回送信日時"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="最後のエラー"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="作成日時"),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="送信日時"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "送信メール",
+                "verbose_name_plural": "送信メール",
+                "ordering": ["next_attempt_at", "id"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "pending")),
+                        fields=["next_attempt_at", "id"],
+                        name="outbox_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,54 @@
-from django.db import models
+# backend/app/messaging/models.py
+from django.db import models  # type: ignore
+from django.utils import timezone  # type: ignore
 
-# Create your models here.
+
+class OutboxEmail(models.Model):
+    """
+    送信待ちメール (トランザクショナル・アウトボックス)
+    業務データの更新と同じトランザクションで登録し、送信はワーカー
+    (python manage.py send_outbox_emails) が行う。
+    """
+
+    STATUS_PENDING = "pending"  # 送信待ち (再試行待ちを含む)
+    STATUS_SENT = "sent"  # 送信済み
+    STATUS_FAILED = "failed"  # 再試行の上限に達した
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "送信待ち"),
+        (STATUS_SENT, "送信済み"),
+        (STATUS_FAILED, "送信失敗"),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name="件名")
+    body = models.TextField(verbose_name="本文")
+    from_email = models.CharField(max_length=255, blank=True, verbose_name="送信元")
+    to = models.JSONField(default=list, verbose_name="送信先")
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="送信状況",
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="送信試行回数")
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name="次回送信日時"
+    )
+    last_error = models.TextField(blank=True, verbose_name="最後のエラー")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="作成日時")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="送信日時")
+
+    class Meta:
+        verbose_name = "送信メール"
+        verbose_name_plural = "送信メール"
+        ordering = ["next_attempt_at", "id"]
+        indexes = [
+            # ワーカーが送信対象 (status='pending' AND next_attempt_at <= now) を古い順に取得する
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                name="outbox_pending_idx",
+                condition=models.Q(status="pending"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
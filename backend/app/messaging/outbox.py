@@ -0,0 +1,136 @@
+# backend/app/messaging/outbox.py
+"""
+メールのアウトボックス
+
+API のリクエスト内では送信せず OutboxEmail に登録だけ行い (業務データと同じ
+トランザクションなので、ロールバックされた処理のメールは送られない)、
+send_pending (send_outbox_emails コマンド) がまとめて送信する。
+
+- 1 バッチにつき SMTP 接続は 1 つだけ開き、バッチ内のメールで使い回す。
+- 送信に失敗したメールは指数バックオフで再試行し、上限回数で failed にする。
+- 送信対象の行は SELECT … FOR UPDATE SKIP LOCKED で取得するため、
+  ワーカーを複数起動しても同じメールを二重に送らない。
+- 送信後にコミットできなかった場合は再送されうる (少なくとも 1 回の配信)。
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings  # type: ignore
+from django.core.mail import EmailMessage, get_connection  # type: ignore
+from django.db import transaction  # type: ignore
+from django.template.loader import render_to_string  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = timedelta(seconds=30)  # 1 回目の失敗後の待ち時間 (以降 2 倍ずつ)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+
+@dataclass
+class BatchResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    @property
+    def total(self):
+        return self.sent + self.retried + self.failed
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    """送信メールを登録する (呼び出し側のトランザクションに含まれる)"""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        to=list(to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def enqueue_template_email(subject_template, body_template, context, to):
+    """テンプレートから件名・本文を作成して登録する (件名の改行は除去)"""
+    subject = " ".join(render_to_string(subject_template, context).split())
+    body = render_to_string(body_template, context)
+    return enqueue_email(subject, body, to)
+
+
+def retry_delay(attempts):
+    """attempts 回失敗した後の待ち時間 (30 秒, 60 秒, 120 秒, … 最大 1 時間)"""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def send_pending(
+    batch_size=DEFAULT_BATCH_SIZE, max_attempts=DEFAULT_MAX_ATTEMPTS, connection=None
+):
+    """
+    送信時刻を過ぎた送信待ちメールを最大 batch_size 件送信し、結果を記録する。
+    connection を省略した場合は settings.EMAIL_BACKEND の接続を 1 つ開いて使う。
+    """
+    result = BatchResult()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=timezone.now()
+            )
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if not emails:
+            return result
+
+        connection = connection or get_connection()
+        try:
+            connection.open()
+        except Exception as e:  # 接続できなければバッチ全体を再試行に回す
+            logger.warning("Failed to open email connection", exc_info=True)
+            for email in emails:
+                _record_failure(email, e, max_attempts, result)
+            return result
+
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email or settings.DEFAULT_FROM_EMAIL,
+                    email.to,
+                    connection=connection,
+                )
+                try:
+                    message.send(fail_silently=False)
+                except Exception as e:
+                    logger.warning(
+                        "Failed to send outbox email %s", email.pk, exc_info=True
+                    )
+                    _record_failure(email, e, max_attempts, result)
+                else:
+                    email.status = OutboxEmail.STATUS_SENT
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ""
+                    email.save(
+                        update_fields=["status", "attempts", "sent_at", "last_error"]
+                    )
+                    result.sent += 1
+        finally:
+            connection.close()
+    return result
+
+
+def _record_failure(email, error, max_attempts, result):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= max_attempts:
+        email.status = OutboxEmail.STATUS_FAILED
+        result.failed += 1
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        result.retried += 1
+    email.save(update_fields=["status", "attempts", "last_error", "next_attempt_at"])
@@ -1,3 +1,143 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core import mail  # type: ignore
+from django.core.mail.backends.locmem import EmailBackend  # type: ignore
+from django.test import TestCase  # type: ignore
+from django.utils import timezone  # type: ignore
+from rest_framework.test import APIClient
+
+from app.orders.models import Order, OrderItem
+from app.products.models import Product
+
+from .models import OutboxEmail
+from .outbox import enqueue_email, retry_delay, send_pending
+
+User = get_user_model()
+
+
+class CountingBackend(EmailBackend):
+    """open() の回数を数える locmem バックエンド"""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class OutboxSendTests(TestCase):
+    # Django のテストランナーは EMAIL_BACKEND を locmem に置き換える (ネットワーク不要)
+
+    def test_batch_uses_one_connection(self):
+        for i in range(3):
+            enqueue_email(f"subject {i}", "body", [f"user{i}@example.com"])
+        CountingBackend.opened = 0
+
+        result = send_pending(batch_size=10, connection=CountingBackend())
+
+        self.assertEqual(result.sent, 3)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(
+            OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists()
+        )
+
+    def test_failed_send_is_retried_with_backoff(self):
+        email = enqueue_email("subject", "body", ["user@example.com"])
+        with mock.patch.object(
+            EmailBackend, "send_messages", side_effect=OSError
+        ), self.assertLogs("app.messaging.outbox", "WARNING"):
+            result = send_pending()
+
+        email.refresh_from_db()
+        self.assertEqual(result.retried, 1)
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("OSError", email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # 再試行時刻までは送信しない
+        self.assertEqual(send_pending().total, 0)
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_pending().sent, 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(email.attempts, 2)
+
+    def test_gives_up_after_max_attempts(self):
+        email = enqueue_email("subject", "body", ["user@example.com"])
+        OutboxEmail.objects.filter(pk=email.pk).update(attempts=2)
+        with mock.patch.object(
+            EmailBackend, "send_messages", side_effect=OSError
+        ), self.assertLogs("app.messaging.outbox", "WARNING"):
+            result = send_pending(max_attempts=3)
+
+        email.refresh_from_db()
+        self.assertEqual(result.failed, 1)
+        self.assertEqual(email.status, OutboxEmail.STATUS_FAILED)
+
+    def test_retry_delay_is_exponential_and_capped(self):
+        self.assertEqual(retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(retry_delay(2), timedelta(seconds=60))
+        self.assertEqual(retry_delay(20), timedelta(hours=1))
+
+
+class MarkAsShippedOutboxTests(TestCase):
+    def setUp(self):
+        self.producer = User.objects.create(username="producer")
+        buyer = User.objects.create(username="buyer", email="buyer@example.com")
+        product = Product.objects.create(
+            producer=self.producer,
+            name="トマト",
+            description="",
+            price=300,
+            quantity=10,
+            unit="kg",
+            status=Product.STATUS_ACTIVE,
+        )
+        self.order = Order.objects.create(
+            user=buyer,
+            shipping_full_name="購入者",
+            shipping_postal_code="1000001",
+            shipping_prefecture="東京都",
+            shipping_city="千代田区",
+            shipping_address1="1-1",
+            shipping_phone_number="0000000000",
+        )
+        OrderItem.objects.create(
+            order=self.order,
+            product=product,
+            product_name=product.name,
+            price_at_purchase=product.price,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def test_request_enqueues_instead_of_sending(self):
+        response = self.client.post(
+            f"/api/producer-orders/{self.order.order_id}/mark-shipped/"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, ["buyer@example.com"])
+        self.assertIn(str(self.order.order_id), email.subject)
+        self.assertNotIn("\n", email.subject)
+
+        send_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("トマト", mail.outbox[0].body)
+
+    def test_already_shipped_enqueues_nothing(self):
+        Order.objects.filter(pk=self.order.pk).update(
+            order_status=Order.ORDER_STATUS_SHIPPED
+        )
+        response = self.client.post(
+            f"/api/producer-orders/{self.order.order_id}/mark-shipped/"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(OutboxEmail.objects.exists())
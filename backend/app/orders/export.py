@@ -0,0 +1,102 @@
+# backend/app/orders/export.py
+"""
+生産者の受注の書き出し (CSV / .xlsx。ProducerOrderViewSet.export で使用)
+
+1 行 = 1 明細 (生産者自身の商品の明細のみ。同じ注文の他の生産者の明細は含めない)。
+注文の絞り込み (order_status / payment_status / search) は受注一覧と同じ filter_queryset を
+通した注文のクエリセットを受け取り、サブクエリ (order_id IN …) として使う。
+生産者の絞り込みは明細側 (product__producer_id) で行う。
+
+明細は values_list(...).iterator(chunk_size=CHUNK_SIZE) でサーバーサイドカーソルから
+少しずつ読み、app/core/spreadsheets.py のジェネレーターで書き出す。
+OrderSerializer (明細ごとに ProductSerializer を含む) は通さない。
+"""
+
+from django.db import transaction  # type: ignore
+from django.db.models import F  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from app.core.spreadsheets import (
+    CSV_CONTENT_TYPE,
+    XLSX_CONTENT_TYPE,
+    stream_csv,
+    stream_xlsx,
+)
+
+from .models import Order, OrderItem
+
+FORMATS = {
+    "csv": (CSV_CONTENT_TYPE, stream_csv),
+    "xlsx": (XLSX_CONTENT_TYPE, stream_xlsx),
+}
+CHUNK_SIZE = 2000
+
+# (見出し, values_list の列)
+EXPORT_COLUMNS = [
+    ("注文ID", "order__order_id"),
+    ("注文日時", "order__created_at"),
+    ("注文状況", "order__order_status"),
+    ("支払い状況", "order__payment_status"),
+    ("支払い方法", "order__payment_method"),
+    ("注文者", "order__user__username"),
+    ("配送先氏名", "order__shipping_full_name"),
+    ("配送先郵便番号", "order__shipping_postal_code"),
+    ("配送先都道府県", "order__shipping_prefecture"),
+    ("配送先市区町村", "order__shipping_city"),
+    ("配送先住所1", "order__shipping_address1"),
+    ("配送先住所2", "order__shipping_address2"),
+    ("配送先電話番号", "order__shipping_phone_number"),
+    ("商品ID", "product_id"),
+    ("商品名", "product_name"),
+    ("購入時単価", "price_at_purchase"),
+    ("数量", "quantity"),
+    ("小計", "subtotal"),
+    ("備考欄", "order__notes"),
+]
+EXPORT_HEADER = [label for label, _ in EXPORT_COLUMNS]
+
+
+def export_items(producer_id, orders):
+    """orders (Order のクエリセット) に含まれる、生産者の商品の明細 (values_list)"""
+    return (
+        OrderItem.objects.filter(
+            order__in=orders.order_by().values("pk"),
+            product__producer_id=producer_id,
+        )
+        .annotate(subtotal=F("price_at_purchase") * F("quantity"))
+        .order_by("-order__created_at", "-order_id", "id")
+        .values_list(*(column for _, column in EXPORT_COLUMNS))
+    )
+
+
+def _display_converter(field_name):
+    labels = dict(Order._meta.get_field(field_name).flatchoices)
+    return lambda value: labels.get(value, value)
+
+
+def export_rows(queryset):
+    """values_list の行を書き出す値 (表示名・ローカル時刻) に変換しながら返す"""
+    columns = [column for _, column in EXPORT_COLUMNS]
+    converters = {
+        columns.index("order__created_at"): lambda value: timezone.localtime(
+            value
+        ).strftime("%Y-%m-%d %H:%M:%S"),
+        columns.index("order__order_status"): _display_converter("order_status"),
+        columns.index("order__payment_status"): _display_converter("payment_status"),
+        columns.index("order__payment_method"): _display_converter("payment_method"),
+    }
+    # 自動コミットのままだとカーソルが WITH HOLD になり、最初の行を返す前に
+    # 結果の全体をサーバー側で作ってしまうため、トランザクション内で読む
+    with transaction.atomic():
+        for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+            row = list(row)
+            for index, convert in converters.items():
+                if row[index] is not None:
+                    row[index] = convert(row[index])
+            yield row
+
+
+def stream_export(queryset, fmt):
+    """(Content-Type, bytes のジェネレーター)"""
+    content_type, stream = FORMATS[fmt]
+    return content_type, stream(EXPORT_HEADER, export_rows(queryset))
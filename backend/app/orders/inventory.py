@@ -0,0 +1,82 @@
+# backend/app/orders/inventory.py
+"""
+注文時の在庫引き当て
+
+在庫数を読んでから減らす (SELECT → 判定 → UPDATE) と、同時に注文された場合に
+判定後に他の注文が在庫を減らして売り越しになる。そこで
+UPDATE … SET quantity = quantity - n WHERE id = … AND quantity >= n
+の 1 文で判定と減算を行い、更新件数が 0 なら在庫不足とする。
+
+- 複数商品の注文は、先に SELECT … ORDER BY id FOR UPDATE で商品 ID の昇順に
+  行ロックを取ってから、全商品を unnest で結合した 1 文の UPDATE で減算する
+  (商品数によらず 2 文)。ロックを取る順序が全トランザクションで同じになるため、
+  商品の組み合わせが重なる注文同士でもデッドロックしない。
+- 呼び出し側のトランザクション (transaction.atomic) の中で実行すること。
+  InsufficientStock が送出されたらトランザクションごとロールバックされ、
+  それまでに減らした在庫も元に戻る。
+- 行ロックはコミットまで保持されるため、トランザクションの最後に呼ぶのが望ましい。
+"""
+
+from collections import defaultdict
+
+from django.db import connection, transaction  # type: ignore
+
+from app.products.cache import invalidate_product_cache
+from app.products.models import Product
+
+
+class InsufficientStock(Exception):
+    """在庫不足 (product は不足した商品)"""
+
+    def __init__(self, product, requested):
+        self.product = product
+        self.requested = requested
+        super().__init__(f"Insufficient stock for product {product.pk}")
+
+
+def reserve_stock(lines):
+    """
+    lines: [(Product, 数量)] の在庫を引き当てる (同じ商品が複数行あれば合算)。
+    在庫が足りない商品があれば InsufficientStock を送出する。
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError("reserve_stock must be called inside transaction.atomic")
+
+    requested = defaultdict(int)
+    products = {}
+    for product, quantity in lines:
+        requested[product.pk] += quantity
+        products[product.pk] = product
+
+    product_ids = sorted(requested)
+    # ロック順序を固定する (UPDATE … FROM の結合順は保証されないため)
+    list(
+        Product.objects.filter(pk__in=product_ids)
+        .order_by("pk")
+        .select_for_update()
+        .values_list("pk", flat=True)
+    )
+    updated = _decrement(product_ids, [requested[pk] for pk in product_ids])
+    for product_id in product_ids:
+        if product_id not in updated:
+            raise InsufficientStock(products[product_id], requested[product_id])
+
+    # update() は post_save を発行しないため、在庫表示のキャッシュを明示的に無効化する
+    invalidate_product_cache()
+
+
+def _decrement(product_ids, quantities):
+    """在庫が足りる商品だけ減らし、減らした商品 ID の集合を返す"""
+    meta = Product._meta
+    qn = connection.ops.quote_name
+    quantity = qn(meta.get_field("quantity").column)
+    pk = qn(meta.pk.column)
+    sql = (
+        f"UPDATE {qn(meta.db_table)} AS p SET {quantity} = p.{quantity} - r.quantity "
+        f"FROM unnest(%s::{meta.pk.db_type(connection)}[], "
+        f"%s::{meta.get_field('quantity').db_type(connection)}[]) AS r(id, quantity) "
+        f"WHERE p.{pk} = r.id AND p.{quantity} >= r.quantity RETURNING p.{pk}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [product_ids, quantities])
+        return {row[0] for row in cursor.fetchall()}
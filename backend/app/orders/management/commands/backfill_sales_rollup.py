@@ -0,0 +1,68 @@
+# backend/app/orders/management/commands/backfill_sales_rollup.py
+"""
+生産者・商品・日ごとの売上集計 (ProductDailySales) を注文明細から作り直す
+(app/orders/rollup.py。導入時の初回作成と、集計のずれの修正に使う)
+
+    python manage.py backfill_sales_rollup                          # 注文がある全期間
+    python manage.py backfill_sales_rollup --since 2025-04-01 --until 2025-04-30
+
+--days 日ずつ 1 トランザクションで作り直す。作り直している間、その区間の
+注文の作成・状況の変更は集計表のロックを待つ。
+"""
+
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+
+from app.orders.rollup import DEFAULT_REBUILD_DAYS, order_date_range, rebuild_range
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r} (use YYYY-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = "日別売上の集計を注文明細から作り直す"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since", help="開始日 (YYYY-MM-DD)。省略時は最初の注文の日"
+        )
+        parser.add_argument(
+            "--until", help="終了日 (YYYY-MM-DD)。省略時は最後の注文の日"
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=DEFAULT_REBUILD_DAYS,
+            help="1 トランザクションで作り直す日数",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1")
+        bounds = order_date_range()
+        if bounds is None and not (options["since"] and options["until"]):
+            self.stdout.write("No orders.")
+            return
+        start = _date(options["since"]) if options["since"] else bounds[0]
+        end = _date(options["until"]) if options["until"] else bounds[1]
+        if start > end:
+            raise CommandError("--since must not be after --until")
+
+        started = time.perf_counter()
+
+        def progress(chunk_start, chunk_end, total):
+            self.stdout.write(f"{chunk_start}..{chunk_end}: {total} rows")
+
+        total = rebuild_range(start, end, days=options["days"], on_chunk=progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {start}..{end}: {total} rows in {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,137 @@
+# backend/app/orders/management/commands/bench_checkout_contention.py
+"""
+在庫引き当ての競合ベンチマーク
+
+人気商品 (--products 個) に複数スレッドから同時に注文 (各商品 1 点ずつ) を出し、
+在庫がなくなるまで (最長 --duration 秒) のスループットを計測する。
+カートの商品の並びはスレッドごとにランダムにし、ロック順序の固定で
+デッドロックが起きないことも確認する。
+
+- conditional: reserve_stock (商品 ID 順に行ロックを取り、UPDATE … WHERE quantity >= n を 1 文で実行)
+- select_for_update: 比較用。SELECT … FOR UPDATE で行をロックし、在庫を確認してから
+  保存する (カートの並び順のままロックする)
+
+スレッドごとに別の DB 接続を使うため、データはコミットして投入し、終了時に削除する。
+
+    python manage.py bench_checkout_contention --threads 16 --stock 2000 --products 2
+"""
+
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+from django.db import DatabaseError, connection, transaction  # type: ignore
+
+from app.orders.inventory import InsufficientStock, reserve_stock
+from app.products.models import Product
+
+MODES = ("conditional", "select_for_update")
+
+
+class Command(BaseCommand):
+    help = "人気商品への同時注文での在庫引き当てのスループットを計測する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--stock", type=int, default=2000)
+        parser.add_argument(
+            "--products", type=int, default=1, help="1 注文に含める人気商品の数"
+        )
+        parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+        parser.add_argument(
+            "--duration", type=float, default=30.0, help="1 方式あたりの最長計測秒数"
+        )
+
+    def handle(self, *args, **options):
+        producer = get_user_model().objects.create(username="bench_checkout")
+        try:
+            self.stdout.write(
+                f"{'mode':<20}{'orders/s':>10}{'ok':>8}{'sold out':>10}"
+                f"{'errors':>8}{'final stock':>13}"
+            )
+            for mode in options["modes"]:
+                products = Product.objects.bulk_create(
+                    Product(
+                        producer=producer,
+                        name=f"人気商品 {i}",
+                        description="",
+                        price=1000,
+                        quantity=options["stock"],
+                        unit="ko",
+                        status=Product.STATUS_ACTIVE,
+                    )
+                    for i in range(options["products"])
+                )
+                self._run(
+                    mode,
+                    products,
+                    options["threads"],
+                    options["stock"],
+                    options["duration"],
+                )
+        finally:
+            producer.delete()
+
+    def _run(self, mode, products, threads, stock, duration):
+        checkout = getattr(self, f"_checkout_{mode}")
+        counts = {"ok": 0, "sold_out": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                while time.monotonic() < deadline:
+                    cart = [(product, 1) for product in products]
+                    rng.shuffle(cart)
+                    try:
+                        with transaction.atomic():
+                            checkout(cart)
+                        result = "ok"
+                    except InsufficientStock:
+                        result = "sold_out"
+                    except DatabaseError:  # デッドロックなど
+                        result = "errors"
+                    with lock:
+                        counts[result] += 1
+                    if result == "sold_out":
+                        return
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        final = list(
+            Product.objects.filter(pk__in=[p.pk for p in products]).values_list(
+                "quantity", flat=True
+            )
+        )
+        # 売り越し (在庫がマイナス、または成功件数と減少数の不一致) がないこと
+        if any(quantity != stock - counts["ok"] for quantity in final):
+            raise CommandError(f"{mode}: stock mismatch {final} (ok={counts['ok']})")
+        self.stdout.write(
+            f"{mode:<20}{counts['ok'] / elapsed:>10.0f}{counts['ok']:>8}"
+            f"{counts['sold_out']:>10}{counts['errors']:>8}"
+            f"{', '.join(str(int(q)) for q in final):>13}"
+        )
+
+    @staticmethod
+    def _checkout_conditional(cart):
+        reserve_stock(cart)
+
+    @staticmethod
+    def _checkout_select_for_update(cart):
+        for product, quantity in cart:
+            locked = Product.objects.select_for_update().get(pk=product.pk)
+            if locked.quantity < quantity:
+                raise InsufficientStock(product, quantity)
+            locked.quantity -= quantity
+            locked.save(update_fields=["quantity"])
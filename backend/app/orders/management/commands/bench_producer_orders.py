@@ -0,0 +1,170 @@
+# backend/app/orders/management/commands/bench_producer_orders.py
+"""
+生産者向け受注一覧のベンチマーク
+
+旧来の get_queryset (items__product__producer の JOIN + DISTINCT、Profile の参照、
+ログ出力のための COUNT) と、Order.objects.for_producer (EXISTS) を比較する。
+どちらもページ番号方式の 1 ページ目 (COUNT + 10 件) を取得し、
+新方式はキーセット方式 (COUNT なし) も計測する。
+合成データはトランザクション内で投入し、計測後にロールバックする。
+
+    python manage.py bench_producer_orders --orders 100000 --other-orders 100000
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.management.base import BaseCommand  # type: ignore
+from django.db import connection, transaction  # type: ignore
+
+from app.orders.models import Order, OrderItem
+from app.products.models import Product
+from app.profiles.models import Profile
+
+PAGE_SIZE = 10
+
+
+class StopBenchmark(Exception):
+    """計測後にロールバックさせるための例外"""
+
+
+class Command(BaseCommand):
+    help = "生産者向け受注一覧の JOIN + DISTINCT と EXISTS のレイテンシを比較する"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--orders", type=int, default=100_000, help="計測対象の生産者の注文数"
+        )
+        parser.add_argument(
+            "--other-orders", type=int, default=100_000, help="他の生産者の注文数"
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                producer = self._seed(
+                    options["orders"], options["other_orders"], options["batch_size"]
+                )
+                self._run(producer, options["repeat"])
+                raise StopBenchmark
+        except StopBenchmark:
+            pass
+
+    def _seed(self, orders, other_orders, batch_size):
+        User = get_user_model()
+        started = time.perf_counter()
+        producer = User.objects.create(username="bench_orders_producer")
+        other = User.objects.create(username="bench_orders_other")
+        buyer = User.objects.create(username="bench_orders_buyer")
+        products = {
+            user.pk: Product.objects.bulk_create(
+                Product(
+                    producer=user,
+                    name=f"{user.username} {i}",
+                    description="",
+                    price=100 * (i + 1),
+                    quantity=1000,
+                    unit="kg",
+                    status=Product.STATUS_ACTIVE,
+                )
+                for i in range(20)
+            )
+            for user in (producer, other)
+        }
+        rng = random.Random(orders)
+        plan = [producer.pk] * orders + [other.pk] * other_orders
+        rng.shuffle(plan)
+        for start in range(0, len(plan), batch_size):
+            owners = plan[start : start + batch_size]
+            created = Order.objects.bulk_create(
+                Order(
+                    user=buyer,
+                    shipping_full_name="bench",
+                    shipping_postal_code="0000000",
+                    shipping_prefecture="東京都",
+                    shipping_city="千代田区",
+                    shipping_address1="1-1",
+                    shipping_phone_number="0000000000",
+                )
+                for _ in owners
+            )
+            items = []
+            for order, owner in zip(created, owners):
+                # 1〜3 明細 (同じ生産者の商品を複数含む注文で JOIN が重複する)
+                for product in rng.sample(products[owner], rng.randint(1, 3)):
+                    items.append(
+                        OrderItem(
+                            order=order,
+                            product=product,
+                            product_name=product.name,
+                            price_at_purchase=product.price,
+                        )
+                    )
+            OrderItem.objects.bulk_create(items)
+        with connection.cursor() as cursor:
+            # auto_now_add で同一時刻になるため、注文日時を過去に散らす
+            cursor.execute(
+                f"UPDATE {Order._meta.db_table} "
+                "SET created_at = created_at - (id %% 500000) * interval '1 minute' "
+                "WHERE user_id = %s",
+                [buyer.pk],
+            )
+            cursor.execute(f"ANALYZE {Order._meta.db_table}")
+            cursor.execute(f"ANALYZE {OrderItem._meta.db_table}")
+        self.stdout.write(
+            f"== {orders:,} orders for the producer, {other_orders:,} for others "
+            f"(seeded in {time.perf_counter() - started:.1f}s)"
+        )
+        return producer
+
+    def _run(self, producer, repeat):
+        def legacy():
+            # 旧 get_queryset: Profile の参照 + ログ用の COUNT
+            Profile.objects.filter(user=producer).first()
+            queryset = (
+                Order.objects.filter(items__product__producer=producer)
+                .distinct()
+                .prefetch_related("items", "items__product", "user")
+                .order_by("-created_at")
+            )
+            queryset.count()
+            # ページネーション: COUNT + 1 ページ目
+            queryset.count()
+            return list(queryset[:PAGE_SIZE])
+
+        def exists_page():
+            queryset = Order.objects.for_producer(producer).with_items()
+            queryset.count()
+            return list(queryset.order_by("-created_at", "-id")[:PAGE_SIZE])
+
+        def exists_keyset():
+            queryset = Order.objects.for_producer(producer).with_items()
+            return list(queryset.order_by("-created_at", "-id")[: PAGE_SIZE + 1])
+
+        if {order.pk for order in legacy()} != {order.pk for order in exists_page()}:
+            self.stderr.write("warning: first pages differ (same created_at?)")
+
+        self.stdout.write(f"{'query':<28}{'p50 ms':>10}{'p95 ms':>10}")
+        for label, run in (
+            ("JOIN + DISTINCT (legacy)", legacy),
+            ("EXISTS + page number", exists_page),
+            ("EXISTS + keyset", exists_keyset),
+        ):
+            p50, p95 = self._measure(run, repeat)
+            self.stdout.write(f"{label:<28}{p50:>10.1f}{p95:>10.1f}")
+
+    @staticmethod
+    def _measure(run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        p95 = (
+            statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        )
+        return statistics.median(timings), p95
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_list_indexes'),
+        ('products', '0009_product_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('order_count', models.IntegerField(default=0, verbose_name='注文数')),
+                ('quantity', models.BigIntegerField(default=0, verbose_name='数量')),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='売上金額')),
+                ('producer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='生産者')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product', verbose_name='商品')),
+            ],
+            options={
+                'verbose_name': '日別売上',
+                'verbose_name_plural': '日別売上',
+                'constraints': [models.UniqueConstraint(fields=('producer', 'date', 'product'), name='product_daily_sales_unique')],
+            },
+        ),
+    ]
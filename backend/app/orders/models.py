@@ -1,12 +1,39 @@
 # backend/app/orders/models.py
 from django.db import models  # type: ignore
 from django.conf import settings  # type: ignore
+from django.db.models.signals import post_save, pre_delete  # type: ignore
+from django.dispatch import receiver  # type: ignore
 from app.products.models import Product  # 商品モデルをインポート
 import uuid  # 注文ID用に (任意)
 
 User = settings.AUTH_USER_MODEL
 
 
+class OrderQuerySet(models.QuerySet):
+    def for_producer(self, producer):
+        """
+        producer (User または pk) の商品を含む注文。
+        items__product__producer で JOIN すると注文が商品数だけ重複し、全列の DISTINCT が
+        必要になるため、EXISTS (準結合) で絞り込む。
+        """
+        return self.filter(
+            models.Exists(
+                OrderItem.objects.filter(
+                    order=models.OuterRef("pk"), product__producer=producer
+                )
+            )
+        )
+
+    def with_items(self):
+        """OrderSerializer の出力に必要な関連 (注文者・明細・商品・生産者) をまとめて取得"""
+        return self.select_related("user").prefetch_related(
+            models.Prefetch(
+                "items",
+                queryset=OrderItem.objects.select_related("product__producer"),
+            )
+        )
+
+
 class Order(models.Model):
     # --- 注文ステータス定数 ---
     ORDER_STATUS_PENDING = "pending_order"
@@ -24,6 +51,15 @@ class Order(models.Model):
         (ORDER_STATUS_CANCELLED, "キャンセル済み"),
         (ORDER_STATUS_REFUNDED_ORDER, "注文返金済み"),
     ]
+    # 売上として集計する注文状況 (キャンセル・返金は含めない)
+    SALES_STATUSES = frozenset(
+        {
+            ORDER_STATUS_PENDING,
+            ORDER_STATUS_PROCESSING,
+            ORDER_STATUS_SHIPPED,
+            ORDER_STATUS_COMPLETED,
+        }
+    )
 
     # --- 支払いステータス定数 ---
     PAYMENT_STATUS_PENDING = "pending_payment"
@@ -111,16 +147,42 @@ class Order(models.Model):
 
     notes = models.TextField(blank=True, verbose_name="備考欄")  # ユーザーからの備考
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         verbose_name = "注文"
         verbose_name_plural = "注文"
         ordering = ["-created_at"]
+        indexes = [
+            # 受注一覧 (新しい順) を created_at の順に走査し、EXISTS で生産者を判定する
+            models.Index(fields=["-created_at", "-id"], name="order_created_idx"),
+        ]
 
     def __str__(self):
         return (
             f"Order {self.order_id} by {self.user.username if self.user else 'Guest'}"
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 売上集計の増減を判定するため、読み込んだ時点の注文状況を覚えておく
+        instance._loaded_order_status = instance.__dict__.get("order_status")
+        return instance
+
+    def lock_for_status_change(self):
+        """
+        注文状況を変更する前に行をロックし、コミット済みの注文状況を読み直す
+        (トランザクション内で呼ぶ)。読み込み時点の注文状況を基準にすると、同じ注文への
+        同時の変更が売上集計を二重に増減させるため、ロック後の値を基準にする。
+        """
+        current = (
+            Order.objects.select_for_update()
+            .values_list("order_status", flat=True)
+            .get(pk=self.pk)
+        )
+        self.order_status = self._loaded_order_status = current
+
     # def calculate_total(self):
     #     # OrderItem の合計金額を計算するメソッド (任意)
     #     pass
@@ -130,7 +192,11 @@ class OrderItem(models.Model):
     """注文商品モデル"""
 
     order = models.ForeignKey(
-        Order, on_delete=models.CASCADE, related_name="items", verbose_name="注文"
+        Order,
+        on_delete=models.CASCADE,
+        related_name="items",
+        verbose_name="注文",
+        db_index=False,  # Meta.indexes の (order, product) で代用
     )
     product = models.ForeignKey(
         Product, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="商品"
@@ -147,9 +213,77 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = "注文商品"
         verbose_name_plural = "注文商品"
+        indexes = [
+            # 注文ごとの EXISTS (order_id = ? AND product_id = ...) と明細の prefetch 用
+            models.Index(fields=["order", "product"], name="orderitem_order_product_idx"),
+        ]
 
     def __str__(self):
         return f"{self.quantity} x {self.product_name or 'Unknown Product'} for Order {self.order.order_id}"
 
     # def get_subtotal(self):
     #     return self.price_at_purchase * self.quantity
+
+
+class ProductDailySales(models.Model):
+    """
+    生産者・商品・日 (注文日時の日付) ごとの売上集計 (app/orders/rollup.py が更新する)。
+    Order.SALES_STATUSES の注文だけを数える。生産者向けダッシュボードはこの表だけを読む。
+    """
+
+    producer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="生産者",
+        db_index=False,  # Meta.constraints の (producer, date, product) で代用
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,  # 明細の product が NULL になり集計の対象外になるため
+        related_name="+",
+        verbose_name="商品",
+    )
+    date = models.DateField(verbose_name="日付")
+    order_count = models.IntegerField(default=0, verbose_name="注文数")
+    quantity = models.BigIntegerField(default=0, verbose_name="数量")
+    revenue = models.DecimalField(
+        max_digits=14, decimal_places=0, default=0, verbose_name="売上金額"
+    )
+
+    class Meta:
+        verbose_name = "日別売上"
+        verbose_name_plural = "日別売上"
+        constraints = [
+            # 加算の UPSERT (ON CONFLICT) と、生産者の期間指定の読み取りに使う
+            models.UniqueConstraint(
+                fields=["producer", "date", "product"],
+                name="product_daily_sales_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} product={self.product_id}: {self.revenue}"
+
+
+# 注文状況の変更・注文の削除を日別売上に反映する
+# (注文の作成は明細の bulk_create の後に OrderSerializer.create から反映する)
+@receiver(post_save, sender=Order)
+def update_sales_for_status(sender, instance, created, raw=False, **kwargs):
+    from .rollup import apply_status_change  # rollup が models を import するため
+
+    previous = getattr(instance, "_loaded_order_status", None)
+    instance._loaded_order_status = instance.order_status
+    update_fields = kwargs.get("update_fields")
+    if created or raw or previous is None:
+        return
+    if update_fields is not None and "order_status" not in update_fields:
+        return
+    apply_status_change(instance, previous)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_sales_for_order(sender, instance, **kwargs):
+    from .rollup import remove_order  # rollup が models を import するため
+
+    remove_order(instance)  # 明細が CASCADE で削除される前に差し引く
@@ -0,0 +1,240 @@
+# backend/app/orders/rollup.py
+"""
+生産者・商品・日ごとの売上集計 (ProductDailySales)
+
+生産者向けダッシュボードは明細 (OrderItem) を集計せず、この表だけを読む。
+集計する注文は Order.SALES_STATUSES のもの。日付は注文日時 (created_at) の
+ローカル時刻 (settings.TIME_ZONE) の日付、order_count は「その商品を含む注文の数」。
+
+- 注文の作成: OrderSerializer.create が明細の作成後に record_order を呼ぶ。
+- 注文状況の変更: Order の post_save で、集計対象に入った注文を加算・外れた注文を減算する
+  (apply_status_change)。読み込んだ時点の状況 (Order.from_db) と比べるため、
+  QuerySet.update() による変更は反映されない。
+- 注文の削除: Order の pre_delete で減算する (remove_order)。
+- いずれも注文と同じトランザクションで、INSERT … ON CONFLICT DO UPDATE により加算する。
+  同じ日・商品の注文が同時に確定しても加算が失われない。
+- 集計のずれ (管理画面での明細の直接編集など) は backfill_sales_rollup コマンドで
+  期間を指定して明細から作り直す (rebuild)。
+"""
+
+import datetime
+from dataclasses import dataclass
+
+from django.conf import settings  # type: ignore
+from django.db import connection, transaction  # type: ignore
+from django.db.models import F, Sum  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from app.products.models import Product
+
+from .models import Order, OrderItem, ProductDailySales
+
+# rebuild で 1 トランザクションに含める日数
+DEFAULT_REBUILD_DAYS = 31
+
+_COLUMNS = ["producer", "product", "date", "order_count", "quantity", "revenue"]
+
+
+@dataclass(frozen=True)
+class SalesDelta:
+    producer_id: int
+    product_id: int
+    date: datetime.date
+    order_count: int
+    quantity: int
+    revenue: object  # Decimal
+
+
+def is_sales_status(order_status):
+    return order_status in Order.SALES_STATUSES
+
+
+def order_deltas(order, sign=1):
+    """注文 1 件分の (生産者, 商品, 日) ごとの増減。商品が削除された明細は含めない"""
+    date = timezone.localdate(order.created_at)
+    rows = (
+        OrderItem.objects.filter(order=order, product__isnull=False)
+        .values("product_id", "product__producer_id")
+        .annotate(
+            total_quantity=Sum("quantity"),
+            total_revenue=Sum(F("price_at_purchase") * F("quantity")),
+        )
+        .order_by()
+    )
+    return [
+        SalesDelta(
+            producer_id=row["product__producer_id"],
+            product_id=row["product_id"],
+            date=date,
+            order_count=sign,
+            quantity=sign * row["total_quantity"],
+            revenue=sign * row["total_revenue"],
+        )
+        for row in rows
+    ]
+
+
+def add_sales(deltas):
+    """
+    deltas を 1 文の INSERT … ON CONFLICT DO UPDATE で加算する。
+    行ロックの順序を揃えてデッドロックを避けるため、キーの順に並べてから渡す。
+    """
+    if not deltas:
+        return
+    deltas = sorted(deltas, key=lambda d: (d.producer_id, d.date, d.product_id))
+    model_fields = [ProductDailySales._meta.get_field(name) for name in _COLUMNS]
+    columns = [connection.ops.quote_name(f.column) for f in model_fields]
+    table = connection.ops.quote_name(ProductDailySales._meta.db_table)
+    counters = columns[3:]
+    sql = (
+        f"INSERT INTO {table} AS s ({', '.join(columns)}) "
+        f"SELECT * FROM unnest("
+        f"{', '.join(f'%s::{f.rel_db_type(connection) if f.is_relation else f.db_type(connection)}[]' for f in model_fields)}) "
+        f"ON CONFLICT ({', '.join(columns[:3])}) DO UPDATE SET "
+        + ", ".join(f"{column} = s.{column} + EXCLUDED.{column}" for column in counters)
+    )
+    values = [[getattr(delta, f.attname) for delta in deltas] for f in model_fields]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values)
+
+
+def record_order(order):
+    """作成した注文 (明細の作成後) を加算する"""
+    if is_sales_status(order.order_status):
+        add_sales(order_deltas(order))
+
+
+def apply_status_change(order, previous_status):
+    """previous_status から order.order_status への変更を反映する"""
+    sign = int(is_sales_status(order.order_status)) - int(
+        is_sales_status(previous_status)
+    )
+    if sign:
+        add_sales(order_deltas(order, sign))
+
+
+def remove_order(order):
+    """削除する注文を差し引く (明細が削除される前に呼ぶ)"""
+    status = getattr(order, "_loaded_order_status", None) or order.order_status
+    if is_sales_status(status):
+        add_sales(order_deltas(order, -1))
+
+
+def _local_midnight(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def rebuild(start, end):
+    """
+    start〜end (両端を含む) の集計を明細から作り直し、作成した行数を返す。
+
+    集計表を SHARE ROW EXCLUSIVE でロックし、作り直している間の加算 (注文の作成・
+    状況の変更) を待たせる。ロックを取った後の文はそれまでにコミットされた注文をすべて読み、
+    待たされた加算は作り直した後の行に加わるため、二重計上も計上漏れも起きない。
+    """
+    table = connection.ops.quote_name(ProductDailySales._meta.db_table)
+    columns = ", ".join(
+        connection.ops.quote_name(ProductDailySales._meta.get_field(name).column)
+        for name in _COLUMNS
+    )
+    item, order, product = (
+        connection.ops.quote_name(model._meta.db_table)
+        for model in (OrderItem, Order, Product)
+    )
+    sql = f"""
+        INSERT INTO {table} ({columns})
+        SELECT p.producer_id, i.product_id,
+               (o.created_at AT TIME ZONE %s)::date AS day,
+               COUNT(DISTINCT o.id), SUM(i.quantity),
+               SUM(i.price_at_purchase * i.quantity)
+        FROM {item} i
+        JOIN {order} o ON o.id = i.order_id
+        JOIN {product} p ON p.id = i.product_id
+        WHERE o.created_at >= %s AND o.created_at < %s
+          AND o.order_status = ANY(%s)
+        GROUP BY 1, 2, 3
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+            ProductDailySales.objects.filter(date__range=(start, end)).delete()
+            cursor.execute(
+                sql,
+                [
+                    settings.TIME_ZONE,
+                    _local_midnight(start),
+                    _local_midnight(end + datetime.timedelta(days=1)),
+                    sorted(Order.SALES_STATUSES),
+                ],
+            )
+            return cursor.rowcount
+
+
+def rebuild_range(start, end, days=DEFAULT_REBUILD_DAYS, on_chunk=None):
+    """start〜end を days 日ずつ (1 区間 1 トランザクション) 作り直し、作成した行数を返す"""
+    total = 0
+    while start <= end:
+        chunk_end = min(start + datetime.timedelta(days=days - 1), end)
+        total += rebuild(start, chunk_end)
+        if on_chunk:
+            on_chunk(start, chunk_end, total)
+        start = chunk_end + datetime.timedelta(days=1)
+    return total
+
+
+def order_date_range():
+    """注文がある最初と最後の日 (注文がなければ None)"""
+    first = Order.objects.order_by("created_at").values_list("created_at", flat=True)
+    last = Order.objects.order_by("-created_at").values_list("created_at", flat=True)
+    first, last = first.first(), last.first()
+    if first is None:
+        return None
+    return timezone.localdate(first), timezone.localdate(last)
+
+
+def sales_summary(producer_id, start, end):
+    """生産者の start〜end の日別・商品別の売上 (ProductDailySales だけを読む)"""
+    rows = ProductDailySales.objects.filter(
+        producer_id=producer_id, date__range=(start, end)
+    )
+    daily = list(
+        rows.values("date")
+        .annotate(total_quantity=Sum("quantity"), total_revenue=Sum("revenue"))
+        .order_by("date")
+    )
+    products = list(
+        rows.values("product_id", "product__name")
+        .annotate(
+            total_order_count=Sum("order_count"),
+            total_quantity=Sum("quantity"),
+            total_revenue=Sum("revenue"),
+        )
+        .filter(total_order_count__gt=0)  # 期間内の注文がすべて取り消された商品は除く
+        .order_by("-total_revenue", "product_id")
+    )
+    return {
+        "date_from": start,
+        "date_to": end,
+        "totals": {
+            "quantity": sum(row["total_quantity"] for row in daily),
+            "revenue": str(sum(row["total_revenue"] for row in daily)),
+        },
+        "daily": [
+            {
+                "date": row["date"],
+                "quantity": row["total_quantity"],
+                "revenue": str(row["total_revenue"]),
+            }
+            for row in daily
+        ],
+        "products": [
+            {
+                "product_id": row["product_id"],
+                "product_name": row["product__name"],
+                "order_count": row["total_order_count"],
+                "quantity": row["total_quantity"],
+                "revenue": str(row["total_revenue"]),
+            }
+            for row in products
+        ],
+    }
@@ -1,14 +1,76 @@
 # backend/app/orders/serializers.py
+import datetime
+from collections.abc import Mapping
 from rest_framework import serializers
 from django.db import transaction  # type: ignore
+from django.utils import timezone  # type: ignore
+from .inventory import InsufficientStock, reserve_stock
+from .rollup import record_order
 from .models import Order, OrderItem
 from app.products.models import Product
 from app.products.serializers import ProductSerializer
 
 
+# BigAutoField の範囲 (範囲外の値は通常の PrimaryKeyRelatedField の処理に任せる)
+_MAX_PK = 2**63 - 1
+
+
+def _product_pk(value):
+    """一括取得に使う pk (int)。int 以外・bool・範囲外は None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            return None
+    if isinstance(value, int) and 0 < value <= _MAX_PK:
+        return value
+    return None
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    親の OrderItemListSerializer が全行分をまとめて取得した商品 (prefetched) から
+    解決する PrimaryKeyRelatedField (行ごとの SELECT をしない)。
+    取得結果にない pk は存在しない (または販売中でない) ものとして、
+    PrimaryKeyRelatedField と同じエラーメッセージを返す。
+    """
+
+    prefetched = None
+
+    def to_internal_value(self, data):
+        pk = _product_pk(data)
+        if self.prefetched is None or pk is None:
+            return super().to_internal_value(data)
+        try:
+            return self.prefetched[pk]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class OrderItemListSerializer(serializers.ListSerializer):
+    """注文明細の一覧。全行の product_id を 1 クエリで解決してから各行を検証する"""
+
+    def to_internal_value(self, data):
+        field = self.child.fields["product_id"]
+        if isinstance(data, list):  # list 以外は親クラスでエラーにする
+            pks = {
+                _product_pk(item.get("product_id"))
+                for item in data
+                if isinstance(item, Mapping)
+            }
+            pks.discard(None)
+            field.prefetched = field.get_queryset().in_bulk(pks)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            field.prefetched = None
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)  # 詳細表示用
-    product_id = serializers.PrimaryKeyRelatedField(
+    product_id = PrefetchedPrimaryKeyRelatedField(
         queryset=Product.objects.filter(
             status=Product.STATUS_ACTIVE
         ),  # 販売中の商品のみを対象にする
@@ -24,6 +86,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = OrderItem
+        list_serializer_class = OrderItemListSerializer
         # product_name, price_at_purchase は作成時に自動設定するので fields には含めないことが多い
         fields = [
             "id",
@@ -104,12 +167,6 @@ class OrderSerializer(serializers.ModelSerializer):
                 ]  # OrderItemSerializer の source='product' で Product インスタンスが入る
                 quantity_ordered = item_data["quantity"]
 
-                # 在庫チェック (より厳密なものは別途)
-                if product_instance.quantity < quantity_ordered:
-                    raise serializers.ValidationError(
-                        f"商品「{product_instance.name}」の在庫が不足しています。"
-                    )
-
                 order_items_to_create.append(
                     OrderItem(
                         order=order,
@@ -121,10 +178,6 @@ class OrderSerializer(serializers.ModelSerializer):
                 )
                 calculated_total_amount += product_instance.price * quantity_ordered
 
-                # 在庫を減らす (ここで実行するか、シグナルなどを使う)
-                # product_instance.quantity -= quantity_ordered
-                # product_instance.save(update_fields=['quantity'])
-
             # OrderItem をバルクで作成
             OrderItem.objects.bulk_create(order_items_to_create)
             print(
@@ -145,4 +198,45 @@ class OrderSerializer(serializers.ModelSerializer):
                 f"[OrderSerializer Create] Order ID {order.id} finalized. Total: {order.total_amount}"
             )
 
-        return order
+            # 生産者・商品・日ごとの売上集計に加算する (app/orders/rollup.py)
+            record_order(order)
+
+            # 在庫を引き当てる (在庫数の確認と減算を条件付き UPDATE で同時に行う)
+            # 商品の行ロックをコミットまでの最短時間にするため最後に実行する
+            # 不足時は例外でトランザクション全体 (注文・明細・引き当て済みの在庫) をロールバック
+            try:
+                reserve_stock(
+                    (item.product, item.quantity) for item in order_items_to_create
+                )
+            except InsufficientStock as e:
+                raise serializers.ValidationError(
+                    f"商品「{e.product.name}」の在庫が不足しています。"
+                )
+
+        # レスポンス (明細ごとの商品・生産者) を明細の数によらず一定のクエリ数で作る
+        return Order.objects.with_items().get(pk=order.pk)
+
+
+class SalesSummaryQuerySerializer(serializers.Serializer):
+    """生産者の売上集計 (ProducerOrderViewSet.sales_summary) のクエリパラメータ"""
+
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 366
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        date_to = attrs.get("date_to") or timezone.localdate()
+        date_from = attrs.get("date_from") or date_to - datetime.timedelta(
+            days=self.DEFAULT_DAYS - 1
+        )
+        if date_from > date_to:
+            raise serializers.ValidationError(
+                "date_from は date_to 以前の日付を指定してください。"
+            )
+        if (date_to - date_from).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                f"期間は {self.MAX_DAYS} 日以内で指定してください。"
+            )
+        return {"date_from": date_from, "date_to": date_to}
@@ -1,3 +1,544 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.management import call_command  # type: ignore
+from django.db import connection, transaction  # type: ignore
+from django.test import TestCase, TransactionTestCase  # type: ignore
+from django.utils import timezone  # type: ignore
+from openpyxl import load_workbook
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from app.core.spreadsheets import stream_csv
+from app.products.models import Product
+
+from .export import EXPORT_HEADER
+from .inventory import InsufficientStock, reserve_stock
+from .models import Order, ProductDailySales
+from .rollup import rebuild_range
+from .serializers import OrderSerializer
+from .views import ProducerOrderViewSet
+
+User = get_user_model()
+
+
+class OrderAPITestCase(TestCase):
+    """生産者 1 人・商品 2 つと、注文者の API 呼び出し"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producer = User.objects.create_user(username="order_farm", password="pw")
+        cls.customer = User.objects.create_user(username="order_buyer", password="pw")
+        cls.tomato, cls.potato = Product.objects.bulk_create(
+            Product(
+                producer=cls.producer,
+                name=name,
+                description="説明",
+                price=price,
+                quantity=100,
+                unit="kg",
+                status=Product.STATUS_ACTIVE,
+            )
+            for name, price in [("トマト", 300), ("じゃがいも", 200)]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def place_order(self, items, notes=""):
+        self.client.force_authenticate(self.customer)
+        response = self.client.post(
+            "/api/my-orders/",
+            {
+                "shipping_full_name": "山田 花子",
+                "shipping_postal_code": "100-0001",
+                "shipping_prefecture": "東京都",
+                "shipping_city": "千代田区",
+                "shipping_address1": "1-1",
+                "shipping_phone_number": "0300000000",
+                "payment_method": "bank_transfer",
+                "notes": notes,
+                "items": [
+                    {"product_id": product.pk, "quantity": quantity}
+                    for product, quantity in items
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data["order_id"]
+
+    def set_status(self, order_id, order_status):
+        self.client.force_authenticate(self.producer)
+        response = self.client.patch(
+            f"/api/producer-orders/{order_id}/",
+            {"order_status": order_status},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+
+class SalesRollupTests(OrderAPITestCase):
+    """生産者・商品・日ごとの売上集計 (ProductDailySales) と sales-summary"""
+
+    def rollup(self):
+        return {
+            row.product_id: (row.order_count, row.quantity, row.revenue)
+            for row in ProductDailySales.objects.filter(date=timezone.localdate())
+        }
+
+    def test_incremental_updates_match_backfill(self):
+        first = self.place_order([(self.tomato, 2), (self.potato, 1)])
+        self.place_order([(self.tomato, 1)])
+        self.assertEqual(
+            self.rollup(),
+            {
+                self.tomato.pk: (2, 3, Decimal(900)),
+                self.potato.pk: (1, 1, Decimal(200)),
+            },
+        )
+
+        # キャンセルで差し引き、集計対象の状況に戻すと再び加算する
+        self.set_status(first, Order.ORDER_STATUS_CANCELLED)
+        self.assertEqual(self.rollup()[self.tomato.pk], (1, 1, Decimal(300)))
+        self.assertEqual(self.rollup()[self.potato.pk], (0, 0, Decimal(0)))
+        self.set_status(first, Order.ORDER_STATUS_PROCESSING)
+        self.set_status(first, Order.ORDER_STATUS_SHIPPED)  # 集計対象どうしの変更
+        incremental = self.rollup()
+
+        today = timezone.localdate()
+        ProductDailySales.objects.all().delete()
+        rebuild_range(today - datetime.timedelta(days=3), today, days=2)
+        self.assertEqual(self.rollup(), incremental)
+
+        # 注文の削除で差し引く
+        Order.objects.get(order_id=first).delete()
+        self.assertEqual(self.rollup()[self.tomato.pk], (1, 1, Decimal(300)))
+        call_command("backfill_sales_rollup", stdout=io.StringIO())
+        self.assertEqual(self.rollup()[self.tomato.pk], (1, 1, Decimal(300)))
+        self.assertNotIn(self.potato.pk, self.rollup())
+
+    def test_sales_summary_reads_only_the_rollup(self):
+        self.place_order([(self.tomato, 2), (self.potato, 1)])
+        self.client.force_authenticate(self.producer)
+        # 日別・商品別の集計 2 クエリだけで返す (明細は読まない)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/producer-orders/sales-summary/")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["totals"], {"quantity": 3, "revenue": "800"})
+        self.assertEqual(
+            response.data["daily"],
+            [{"date": timezone.localdate(), "quantity": 3, "revenue": "800"}],
+        )
+        self.assertEqual(
+            [row["product_name"] for row in response.data["products"]],
+            ["トマト", "じゃがいも"],
+        )
+
+        # 他の生産者には表示しない
+        self.client.force_authenticate(self.customer)
+        response = self.client.get("/api/producer-orders/sales-summary/")
+        self.assertEqual(response.data["products"], [])
+
+        response = self.client.get(
+            "/api/producer-orders/sales-summary/",
+            {"date_from": "2025-02-01", "date_to": "2025-01-01"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ProducerOrderExportTests(OrderAPITestCase):
+    """受注の書き出し (producer-orders/export)"""
+
+    def export(self, **params):
+        self.client.force_authenticate(self.producer)
+        response = self.client.get("/api/producer-orders/export/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_csv_rows_per_item_with_filters(self):
+        other = User.objects.create_user(username="order_other", password="pw")
+        carrot = Product.objects.create(
+            producer=other,
+            name="にんじん",
+            description="説明",
+            price=150,
+            quantity=10,
+            unit="kg",
+            status=Product.STATUS_ACTIVE,
+        )
+        first = self.place_order(
+            [(self.tomato, 2), (self.potato, 1), (carrot, 1)], notes='改行\n"引用"'
+        )
+        second = self.place_order([(self.tomato, 1)])
+        self.set_status(second, Order.ORDER_STATUS_SHIPPED)
+
+        content = self.export().decode("utf-8-sig")
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], EXPORT_HEADER)
+        # 新しい注文から。他の生産者の明細 (にんじん) は含めない
+        self.assertEqual(
+            [(row[0], row[2], row[14], row[17]) for row in rows[1:]],
+            [
+                (second, "発送済み", "トマト", "300"),
+                (first, "注文受付/支払い待ち", "トマト", "600"),
+                (first, "注文受付/支払い待ち", "じゃがいも", "200"),
+            ],
+        )
+        self.assertEqual(rows[2][-1], '改行\n"引用"')
+
+        content = self.export(order_status=Order.ORDER_STATUS_SHIPPED).decode(
+            "utf-8-sig"
+        )
+        self.assertEqual(len(list(csv.reader(io.StringIO(content)))), 2)
+
+    def test_csv_escapes_formula_cells(self):
+        formulas = ['=HYPERLINK("http://x")', "+1", "-1", "@SUM(A1)"]
+        for notes in formulas:
+            self.place_order([(self.tomato, 1)], notes=notes)
+        self.potato.name = "=1+1"
+        self.potato.save()
+        self.place_order([(self.potato, 1)], notes="普通の備考")
+
+        rows = list(csv.reader(io.StringIO(self.export().decode("utf-8-sig"))))
+        self.assertEqual(rows[1][14:], ["'=1+1", "200", "1", "200", "普通の備考"])
+        self.assertEqual(
+            [row[-1] for row in reversed(rows[2:])],
+            ["'" + notes for notes in formulas],
+        )
+
+        # 先頭のタブ・CR は入力時に取り除かれるが、書き出し側でも扱う
+        content = b"".join(
+            stream_csv(["a", "b", "c"], [["\t=1", "\r=1", Decimal("-5")]])
+        )
+        self.assertEqual(
+            list(csv.reader(io.StringIO(content.decode("utf-8-sig"))))[1],
+            ["'\t=1", "'\r=1", "-5"],
+        )
+
+        # .xlsx はインライン文字列のため数式にならず、そのまま書き出す
+        workbook = load_workbook(io.BytesIO(self.export(file_format="xlsx")))
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(rows[1][14], "=1+1")
+
+    def test_xlsx(self):
+        order_id = self.place_order([(self.tomato, 2)], notes="\x01制御文字")
+        workbook = load_workbook(io.BytesIO(self.export(file_format="xlsx")))
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), EXPORT_HEADER)
+        self.assertEqual(rows[1][0], order_id)
+        self.assertEqual(rows[1][15:], (300, 2, 600, "制御文字"))
+
+        self.client.force_authenticate(self.producer)
+        response = self.client.get(
+            "/api/producer-orders/export/", {"file_format": "pdf"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ProducerOrderConditionalGetTests(OrderAPITestCase):
+    """受注一覧の条件付き GET"""
+
+    def test_not_modified_until_status_changes(self):
+        order_id = self.place_order([(self.tomato, 1)])
+        self.client.force_authenticate(self.producer)
+        response = self.client.get("/api/producer-orders/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+        etag = response["ETag"]
+        response = self.client.get("/api/producer-orders/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.set_status(order_id, Order.ORDER_STATUS_PROCESSING)
+        response = self.client.get("/api/producer-orders/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class StockReservationTests(OrderAPITestCase):
+    """注文時の在庫引き当て (app/orders/inventory.py)"""
+
+    def test_insufficient_stock_rolls_back_the_order(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.post(
+            "/api/my-orders/",
+            {
+                "shipping_full_name": "山田 花子",
+                "shipping_postal_code": "100-0001",
+                "shipping_prefecture": "東京都",
+                "shipping_city": "千代田区",
+                "shipping_address1": "1-1",
+                "shipping_phone_number": "0300000000",
+                "payment_method": "bank_transfer",
+                "items": [
+                    {"product_id": self.tomato.pk, "quantity": 1},
+                    {"product_id": self.potato.pk, "quantity": 101},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("じゃがいも", str(response.data))
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(
+            list(Product.objects.order_by("pk").values_list("quantity", flat=True)),
+            [100, 100],
+        )
+
+        self.place_order([(self.tomato, 60), (self.potato, 100)])
+        self.assertEqual(
+            list(Product.objects.order_by("pk").values_list("quantity", flat=True)),
+            [40, 0],
+        )
+
+    def quantities(self):
+        return list(Product.objects.order_by("pk").values_list("quantity", flat=True))
+
+    def test_rejects_oversell(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            with transaction.atomic():
+                reserve_stock([(self.tomato, 101)])
+        self.assertEqual(raised.exception.product, self.tomato)
+        self.assertEqual(raised.exception.requested, 101)
+        self.assertEqual(self.quantities(), [100, 100])
+
+    def test_sums_lines_of_the_same_product(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            with transaction.atomic():
+                reserve_stock([(self.tomato, 60), (self.potato, 1), (self.tomato, 41)])
+        self.assertEqual(raised.exception.requested, 101)
+        self.assertEqual(self.quantities(), [100, 100])
+
+        with transaction.atomic():
+            reserve_stock([(self.tomato, 60), (self.potato, 1), (self.tomato, 40)])
+        self.assertEqual(self.quantities(), [0, 99])
+
+    def test_multi_item_reservation_is_all_or_nothing(self):
+        # 先に判定される商品 (ID が小さい方) が足りても、他の商品の不足で全体が戻る
+        with self.assertRaises(InsufficientStock) as raised:
+            with transaction.atomic():
+                reserve_stock([(self.potato, 101), (self.tomato, 100)])
+        self.assertEqual(raised.exception.product, self.potato)
+        self.assertEqual(self.quantities(), [100, 100])
+
+
+class ConcurrentStockReservationTests(TransactionTestCase):
+    """同時に注文しても在庫を超えて引き当てない (別々の接続・トランザクション)"""
+
+    def test_concurrent_orders_do_not_oversell(self):
+        producer = User.objects.create_user(username="race_farm", password="pw")
+        products = Product.objects.bulk_create(
+            Product(
+                producer=producer,
+                name=f"商品{index}",
+                description="説明",
+                price=100,
+                quantity=10,
+                unit="kg",
+                status=Product.STATUS_ACTIVE,
+            )
+            for index in range(3)
+        )
+        results = []
+        barrier = threading.Barrier(8)
+
+        def order(lines):
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    reserve_stock(lines)
+                results.append(True)
+            except InsufficientStock:
+                results.append(False)
+            finally:
+                connection.close()
+
+        # 並びの異なる (ロック順序が逆になりうる) 3 商品の注文を 8 件。在庫は 3 件分
+        threads = [
+            threading.Thread(
+                target=order,
+                args=([(product, 3) for product in products[:: 1 if i % 2 else -1]],),
+            )
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 3)
+        self.assertEqual(
+            list(Product.objects.order_by("pk").values_list("quantity", flat=True)),
+            [1, 1, 1],
+        )
+
+
+class ConcurrentStatusChangeTests(TransactionTestCase):
+    """同じ注文の状況を同時に変更しても売上集計がずれない (別々の接続・トランザクション)"""
+
+    def rollup(self):
+        # 差し引いて 0 になった行は作り直しでは作られないため除く
+        return {
+            row.product_id: (row.order_count, row.quantity, row.revenue)
+            for row in ProductDailySales.objects.exclude(order_count=0)
+        }
+
+    def test_concurrent_status_changes_keep_the_rollup_exact(self):
+        producer = User.objects.create_user(username="status_farm", password="pw")
+        customer = User.objects.create_user(username="status_buyer", password="pw")
+        product = Product.objects.create(
+            producer=producer,
+            name="トマト",
+            description="説明",
+            price=300,
+            quantity=100,
+            unit="kg",
+            status=Product.STATUS_ACTIVE,
+        )
+        client = APIClient()
+        client.force_authenticate(customer)
+        get_object = ProducerOrderViewSet.get_object
+
+        for statuses in [
+            (Order.ORDER_STATUS_CANCELLED, Order.ORDER_STATUS_CANCELLED),  # 二重送信
+            (Order.ORDER_STATUS_CANCELLED, Order.ORDER_STATUS_PROCESSING),
+            (Order.ORDER_STATUS_PROCESSING, Order.ORDER_STATUS_CANCELLED),
+        ]:
+            with self.subTest(statuses=statuses):
+                response = client.post(
+                    "/api/my-orders/",
+                    {
+                        "shipping_full_name": "山田 花子",
+                        "shipping_postal_code": "100-0001",
+                        "shipping_prefecture": "東京都",
+                        "shipping_city": "千代田区",
+                        "shipping_address1": "1-1",
+                        "shipping_phone_number": "0300000000",
+                        "payment_method": "bank_transfer",
+                        "items": [{"product_id": product.pk, "quantity": 2}],
+                    },
+                    format="json",
+                )
+                self.assertEqual(response.status_code, 201, response.data)
+                order_id = response.data["order_id"]
+                # 両方のリクエストが (変更前の) 注文を読み込んでから更新する
+                barrier = threading.Barrier(2)
+
+                def loaded_together(view):
+                    order = get_object(view)
+                    barrier.wait()
+                    return order
+
+                def patch(order_status):
+                    try:
+                        producer_client = APIClient()
+                        producer_client.force_authenticate(producer)
+                        producer_client.patch(
+                            f"/api/producer-orders/{order_id}/",
+                            {"order_status": order_status},
+                            format="json",
+                        )
+                    finally:
+                        connection.close()
+
+                with mock.patch.object(
+                    ProducerOrderViewSet, "get_object", loaded_together
+                ):
+                    threads = [
+                        threading.Thread(target=patch, args=(order_status,))
+                        for order_status in statuses
+                    ]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+
+                # 明細から作り直した集計と一致する
+                incremental = self.rollup()
+                ProductDailySales.objects.all().delete()
+                today = timezone.localdate()
+                rebuild_range(today - datetime.timedelta(days=1), today, days=2)
+                self.assertEqual(incremental, self.rollup())
+
+
+class ReferenceItemSerializer(serializers.Serializer):
+    """比較用: 明細ごとに商品を取得する通常の PrimaryKeyRelatedField"""
+
+    product_id = serializers.PrimaryKeyRelatedField(
+        queryset=Product.objects.filter(status=Product.STATUS_ACTIVE)
+    )
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OrderItemValidationTests(OrderAPITestCase):
+    """注文明細の商品 ID の一括解決 (OrderItemListSerializer) とエラーメッセージ"""
+
+    def order_data(self, items):
+        return {
+            "shipping_full_name": "山田 花子",
+            "shipping_postal_code": "100-0001",
+            "shipping_prefecture": "東京都",
+            "shipping_city": "千代田区",
+            "shipping_address1": "1-1",
+            "shipping_phone_number": "0300000000",
+            "payment_method": "bank_transfer",
+            "items": items,
+        }
+
+    def test_errors_match_per_item_lookup_and_keep_their_index(self):
+        draft = Product.objects.create(
+            producer=self.producer,
+            name="下書き",
+            description="説明",
+            price=100,
+            quantity=10,
+            unit="kg",
+        )
+        items = [
+            {"product_id": self.tomato.pk, "quantity": 1},
+            {"product_id": 999999, "quantity": 1},  # 存在しない
+            {"product_id": draft.pk, "quantity": 1},  # 販売中でない
+            {"product_id": str(self.potato.pk), "quantity": 2},  # 文字列の ID は有効
+            {"product_id": "abc", "quantity": 1},
+            {"product_id": True, "quantity": 1},
+            {"product_id": None, "quantity": 1},
+            {"product_id": 1.5, "quantity": 1},
+            {"product_id": -1, "quantity": 1},
+            {"product_id": 2**70, "quantity": 1},
+            {"product_id": {"id": 1}, "quantity": 1},
+            {"quantity": 1},
+            {"product_id": self.potato.pk, "quantity": -1},
+        ]
+        serializer = OrderSerializer(data=self.order_data(items))
+        self.assertFalse(serializer.is_valid())
+
+        reference = ReferenceItemSerializer(data=items, many=True)
+        self.assertFalse(reference.is_valid())
+        errors = serializer.errors["items"]
+        self.assertEqual(len(errors), len(items))
+        for index, (actual, expected) in enumerate(zip(errors, reference.errors)):
+            with self.subTest(index=index, item=items[index]):
+                self.assertEqual(actual.get("product_id"), expected.get("product_id"))
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[3], {})
+        self.assertIn("999999", str(errors[1]["product_id"][0]))
+        self.assertEqual(errors[12].keys(), {"quantity"})
+
+    def test_products_are_resolved_in_one_query(self):
+        items = [
+            {"product_id": product.pk, "quantity": 1}
+            for product in (self.tomato, self.potato, self.tomato)
+        ]
+        serializer = OrderSerializer(data=self.order_data(items))
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(
+            [item["product"] for item in serializer.validated_data["items"]],
+            [self.tomato, self.potato, self.tomato],
+        )
@@ -2,18 +2,28 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from app.products.views import StandardResultsSetPagination
+from app.core.conditional import ConditionalGetMixin
+from app.core.pagination import (
+    PageNumberOrKeysetPagination,
+    StandardResultsSetPagination,
+)
 from .models import Order, OrderItem
-from .serializers import OrderSerializer
-from app.profiles.models import Profile
+from .export import FORMATS as EXPORT_FORMATS, export_items, stream_export
+from .rollup import sales_summary
+from .serializers import OrderSerializer, SalesSummaryQuerySerializer
 from django_filters.rest_framework import DjangoFilterBackend  # type: ignore
-from rest_framework.pagination import PageNumberPagination
-from django.core.mail import send_mail  # type: ignore # ★ メール送信のため
-from django.template.loader import render_to_string  # type: ignore # ★ テンプレートからメール本文生成
-from django.conf import settings  # type: ignore # ★ DEFAULT_FROM_EMAIL を使うため
+from django.db import transaction  # type: ignore
+from django.http import StreamingHttpResponse  # type: ignore
+from django.utils import timezone  # type: ignore
 from django.contrib.auth import get_user_model # type: ignore
+from app.messaging.outbox import enqueue_template_email
+from app.products.cache import get_generation
+import logging
 
-class OrderPagination(PageNumberPagination):
+logger = logging.getLogger(__name__)
+
+
+class OrderPagination(PageNumberOrKeysetPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
@@ -39,35 +49,8 @@ class OrderViewSet(viewsets.ModelViewSet):
     lookup_url_kwarg = "order_id"
 
     def get_queryset(self):
-        user = self.request.user
-        print(
-            f"[ProducerOrderViewSet get_queryset] START - User: {user.username}, IsAuth: {user.is_authenticated}"
-        )
-        try:
-            if not user.profile.is_producer:
-                print("[ProducerOrderViewSet get_queryset] User is NOT a producer.")
-                return Order.objects.none()
-        except Profile.DoesNotExist:
-            print("[ProducerOrderViewSet get_queryset] Profile DOES NOT exist.")
-            return Order.objects.none()
-        except AttributeError:
-            print(
-                "[ProducerOrderViewSet get_queryset] User has no 'profile' attribute."
-            )
-            return Order.objects.none()
-
-        print(
-            f"[ProducerOrderViewSet get_queryset] User IS a producer. Filtering orders..."
-        )
-        queryset = (
-            Order.objects.filter(items__product__producer=user)
-            .distinct()
-            .prefetch_related("items", "items__product", "user")
-        )
-        print(
-            f"[ProducerOrderViewSet get_queryset] END - Found orders: {queryset.count()}"
-        )
-        return queryset
+        # 生産者でなければ該当する明細がないため空になる (Profile の参照は不要)
+        return Order.objects.for_producer(self.request.user.pk).with_items()
 
     def get_serializer_context(self):
         # シリアライザにリクエスト情報を渡す (create で user を使うため)
@@ -90,7 +73,8 @@ class OrderViewSet(viewsets.ModelViewSet):
 
 
 # 生産者向け注文管理 ViewSet
-class ProducerOrderViewSet(viewsets.ModelViewSet):  # 基本は読み取りと部分更新
+class ProducerOrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    # 基本は読み取りと部分更新。一覧・詳細は条件付き GET に対応 (app/core/conditional.py)
     lookup_field = "order_id"
     lookup_url_kwarg = "order_id"
     serializer_class = OrderSerializer  # 同じシリアライザを流用 (必要なら専用を作成)
@@ -111,38 +95,17 @@ class ProducerOrderViewSet(viewsets.ModelViewSet):  # 基本は読み取りと
         "items__product_name",
     ]
 
-    def get_queryset(self):  # ★このメソッド定義のインデント
-        user = self.request.user
-        print(
-            f"[ProducerOrderViewSet get_queryset] User: {user.username}, IsAuth: {user.is_authenticated}"
-        )
-        try:
-            if not user.profile.is_producer:
-                print("[ProducerOrderViewSet get_queryset] User is not a producer.")
-                return Order.objects.none()
-        except Profile.DoesNotExist:
-            print(
-                "[ProducerOrderViewSet get_queryset] Profile does not exist for user."
-            )
-            return Order.objects.none()
-        except AttributeError:  # user に profile がない場合も考慮
-            print("[ProducerOrderViewSet get_queryset] User has no profile attribute.")
-            return Order.objects.none()
-
-        queryset = (
-            Order.objects.filter(items__product__producer=user)
-            .distinct()
-            .prefetch_related("items", "items__product", "user")
-        )
-        print(
-            f"[ProducerOrderViewSet get_queryset] Found orders for producer: {queryset.count()}"
-        )
-        # ↓↓↓ この return が get_queryset メソッド内に正しくインデントされていること ↓↓↓
-        return queryset
+    def get_queryset(self):
+        # 自分の商品を含む注文。件数の取得 (COUNT) はページネーションに任せる
+        return Order.objects.for_producer(self.request.user.pk).with_items()
 
     def get_serializer_context(self):
         return {"request": self.request}
 
+    def etag_parts(self):
+        # 明細に含める商品 (ProductSerializer) の変更は商品キャッシュの世代に反映される
+        return [get_generation()]
+
     # ★ ステータス更新用の partial_update を許可 ★
     # ModelViewSet はデフォルトで partial_update を持つが、フィールドを制限したい場合は
     # 専用のシリアライザを用意するか、ここで処理を記述
@@ -171,16 +134,20 @@ class ProducerOrderViewSet(viewsets.ModelViewSet):  # 基本は読み取りと
             )
 
         # データベースの更新処理
-        # シリアライザ経由で更新
-        serializer = self.get_serializer(
-            order_instance, data={"order_status": new_status_from_request}, partial=True
-        )
-        if serializer.is_valid(raise_exception=True):
-            serializer.save()  # ★ これでDBが更新される
-            print(
-                f"[Producer PATCH] Status updated to: {serializer.data.get('order_status')}"
+        # シリアライザ経由で更新 (行をロックし、売上集計の増減はロック後の状況から計算する)
+        with transaction.atomic():
+            order_instance.lock_for_status_change()
+            serializer = self.get_serializer(
+                order_instance,
+                data={"order_status": new_status_from_request},
+                partial=True,
             )
-            return Response(serializer.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()  # ★ これでDBが更新される
+        print(
+            f"[Producer PATCH] Status updated to: {serializer.data.get('order_status')}"
+        )
+        return Response(serializer.data)
 
     # create, update (フル), destroy は許可しない
     def create(self, request, *args, **kwargs):
@@ -192,6 +159,45 @@ class ProducerOrderViewSet(viewsets.ModelViewSet):  # 基本は読み取りと
     def destroy(self, request, *args, **kwargs):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    # 売上集計 (ダッシュボード用)。明細ではなく日別売上 (ProductDailySales) だけを読むため、
+    # 注文履歴が増えても期間の日数・商品数に応じたコストで返せる
+    @action(detail=False, methods=["get"], url_path="sales-summary")
+    def sales_summary(self, request):
+        params = SalesSummaryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(
+            sales_summary(
+                request.user.pk,
+                params.validated_data["date_from"],
+                params.validated_data["date_to"],
+            )
+        )
+
+    # 受注の書き出し (1 行 = 1 明細)。?file_format=csv|xlsx と受注一覧と同じ絞り込み
+    # (order_status / payment_status / search) を受け付け、明細を読みながら送信する
+    # (format は DRF の形式指定と重なるため使わない)
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        fmt = request.query_params.get("file_format", "csv")
+        if fmt not in EXPORT_FORMATS:
+            return Response(
+                {
+                    "file_format": [
+                        f"{', '.join(EXPORT_FORMATS)} のいずれかを指定してください。"
+                    ]
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # 生産者の絞り込みは明細 (product__producer) で行うため、注文側の EXISTS は付けない
+        orders = self.filter_queryset(Order.objects.all())
+        content_type, content = stream_export(
+            export_items(request.user.pk, orders), fmt
+        )
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f"orders-{timezone.localdate():%Y%m%d}.{fmt}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
     # 発送完了通知アクション
     @action(
         detail=True,
@@ -214,62 +220,47 @@ class ProducerOrderViewSet(viewsets.ModelViewSet):  # 基本は読み取りと
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        if order.order_status == Order.STATUS_SHIPPED:
-            return Response(
-                {"detail": "この注文は既に発送済みです。"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if (
-            order.order_status == Order.STATUS_COMPLETED
-            or order.order_status == Order.STATUS_CANCELLED
-        ):
-            return Response(
-                {
-                    "detail": "完了またはキャンセル済みの注文のステータスは変更できません。"
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # 1. 注文ステータスを「発送済み」に更新
-        order.order_status = Order.STATUS_SHIPPED
-        order.save(update_fields=["order_status"])
-        print(f"Order {order.order_id} marked as SHIPPED by {request.user.username}")
-
-        # 2. 注文者にメールを送信
-        if (
-            order.user and order.user.email
-        ):  # 注文者にユーザーとメールアドレスがある場合
-            try:
-                subject = render_to_string(
-                    "orders/email/shipment_notification_subject.txt", {"order": order}
-                ).strip()
-                # strip() で改行を除去
-                message_context = {
-                    "user": order.user,  # 注文者ユーザーオブジェクト
-                    "order": order,  # 注文オブジェクト
-                    # 他にテンプレートで使いたい変数があれば追加
-                }
-                message_txt = render_to_string(
-                    "orders/email/shipment_notification_body.txt", message_context
+        # 状況の確認・更新と発送通知メールの登録を同じトランザクションで行う
+        # (行をロックし、同時の操作で通知が二重に登録されたり売上集計がずれたりしないようにする。
+        # メールはリクエスト内では送信せず、send_outbox_emails ワーカーが送信する)
+        with transaction.atomic():
+            order.lock_for_status_change()
+            if order.order_status == Order.ORDER_STATUS_SHIPPED:
+                return Response(
+                    {"detail": "この注文は既に発送済みです。"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
-                # HTMLメールも送信する場合
-                # message_html = render_to_string('orders/email/shipment_notification_body.html', message_context)
-
-                send_mail(
-                    subject,
-                    message_txt,
-                    settings.DEFAULT_FROM_EMAIL,  # 送信元
-                    [order.user.email],  # 送信先リスト
-                    # html_message=message_html, # HTMLメールの場合
-                    fail_silently=False,  # エラー時に例外を発生させる
+            if (
+                order.order_status == Order.ORDER_STATUS_COMPLETED
+                or order.order_status == Order.ORDER_STATUS_CANCELLED
+            ):
+                return Response(
+                    {
+                        "detail": "完了またはキャンセル済みの注文のステータスは変更できません。"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
-                print(
-                    f"Shipment notification email sent to {order.user.email} for order {order.order_id}"
+
+            # 1. 注文ステータスを「発送済み」に更新
+            order.order_status = Order.ORDER_STATUS_SHIPPED
+            order.save(update_fields=["order_status", "updated_at"])
+
+            # 2. 注文者への発送通知メールをアウトボックスに登録
+            if (
+                order.user and order.user.email
+            ):  # 注文者にユーザーとメールアドレスがある場合
+                enqueue_template_email(
+                    "orders/email/shipment_notification_subject.txt",
+                    "orders/email/shipment_notification_body.txt",
+                    {
+                        "user": order.user,  # 注文者ユーザーオブジェクト
+                        "order": order,  # 注文オブジェクト
+                    },
+                    [order.user.email],
                 )
-            except Exception as e:
-                # メール送信失敗はログに残すが、APIとしては成功として返すことも検討
-                print(f"ERROR sending shipment email for order {order.order_id}: {e}")
-                # return Response({'detail': 'ステータスは更新されましたが、メール送信に失敗しました。'}, status=status.HTTP_207_MULTI_STATUS)
+        logger.info(
+            "Order %s marked as shipped by %s", order.order_id, request.user.username
+        )
 
         serializer = self.get_serializer(order)  # 更新後の注文情報を返す
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,57 @@
+# backend/app/products/async_views.py
+"""
+商品一覧・詳細の非同期ビュー (ASGI 用、app/core/async_views.py)
+
+ProductViewSet の list / retrieve と同じレスポンスを返す。
+未ログインのレスポンスキャッシュ (cache.py) も同期版と共有する。
+キャッシュは同期 API のまま呼ぶ (Django の非同期キャッシュ API は内部で
+1 本のスレッドに切り替えて実行するため、かえって直列化される)。
+"""
+
+from app.core.async_views import AsyncReadOnlyViewSetView
+
+from .cache import cached_hit_response, lookup_response, mark_miss, store_response
+from .search import ProductSearchFilter
+from .search_backends import get_search_backend
+from .views import ProductViewSet
+
+
+class ProductAsyncView(AsyncReadOnlyViewSetView):
+    viewset_class = ProductViewSet
+
+    def run_filters_in_thread(self, request):
+        # 外部の検索インデックス (Elasticsearch) への問い合わせは同期の HTTP 通信
+        return bool(request.query_params.get(ProductSearchFilter.search_param)) and (
+            get_search_backend() is not None
+        )
+
+    async def list(self, viewset, request):
+        return await self.cached_response("list", super().list, viewset, request)
+
+    async def retrieve(self, viewset, request):
+        return await self.cached_response(
+            "retrieve", super().retrieve, viewset, request
+        )
+
+    async def cached_response(self, kind, handler, viewset, request):
+        # AnonymousResponseCacheMixin.cached_response の非同期版
+        if request.user.is_authenticated:
+            return await handler(viewset, request)
+
+        key, entry = lookup_response(request, kind)
+        if key is None:
+            return await handler(viewset, request)
+        if entry is not None:
+            return cached_hit_response(entry, viewset, request)
+
+        response = await handler(viewset, request)
+        store_response(key, response)
+        return mark_miss(response)
+
+
+class ProductListAsyncView(ProductAsyncView):
+    action = "list"
+
+
+class ProductDetailAsyncView(ProductAsyncView):
+    action = "retrieve"
@@ -0,0 +1,248 @@
+# backend/app/products/cache.py
+"""
+匿名ユーザー向け商品一覧・詳細のレスポンスキャッシュ
+
+キャッシュキーに「世代番号」を含め、商品の保存・削除時に世代を進めることで
+古いエントリをまとめて無効化する (個々のキーを探して削除する必要がない)。
+参照されなくなった古い世代のエントリはタイムアウトで消える。
+絞り込み用の件数 (facets) は世代に含めず、短い有効期間 (PRODUCT_FACETS_CACHE_TIMEOUT) で
+期限切れにする (商品の保存のたびに全件の集計をやり直さないため)。
+
+使用するキャッシュは settings.PRODUCT_CACHE_ALIAS (テストは locmem、本番は Redis など
+プロセス間で共有できるバックエンド)。キャッシュの障害時はキャッシュなしで応答する。
+"""
+
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings  # type: ignore
+from django.core.cache import caches  # type: ignore
+from django.db import transaction  # type: ignore
+from django.utils.http import parse_http_date_safe  # type: ignore
+from rest_framework.response import Response
+
+from app.core.conditional import Validators
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "products"
+# キャッシュするエントリの形式 (変更したら上げる。古い形式のエントリを読まないため)
+ENTRY_VERSION = 2
+# データと一緒に保存する応答ヘッダー (条件付き GET の検証子)
+STORED_HEADERS = ("ETag", "Last-Modified")
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+# 世代を含めないキー (lookup_response の versioned=False) の世代の位置に入れる値
+UNVERSIONED = "ttl"
+STATS_KEYS = {
+    "hits": f"{KEY_PREFIX}:stats:hits",
+    "misses": f"{KEY_PREFIX}:stats:misses",
+}
+
+
+def get_cache():
+    return caches[settings.PRODUCT_CACHE_ALIAS]
+
+
+def get_generation():
+    """
+    現在の世代番号を返す。
+    初期値は時刻から作るため、世代キーが追い出されても過去の世代と重ならない。
+    """
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """世代を進め、キャッシュ済みのレスポンスをすべて無効にする"""
+    cache = get_cache()
+    try:
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:  # 世代キーがまだない (または追い出された)
+            cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+    except Exception:
+        logger.warning("Failed to bump product cache generation", exc_info=True)
+
+
+def invalidate_product_cache():
+    """
+    コミット後に世代を進める。
+    コミット前に進めると、その間に古いデータを読んだリクエストが
+    新しい世代でキャッシュしてしまうため。
+    """
+    transaction.on_commit(bump_generation)
+
+
+def _increment(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats():
+    """ヒット・ミス件数 (全プロセス合計) と現在の世代"""
+    cache = get_cache()
+    values = cache.get_many(STATS_KEYS.values())
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    total = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = stats["hits"] / total if total else None
+    stats["generation"] = cache.get(GENERATION_KEY)
+    return stats
+
+
+def reset_stats():
+    get_cache().delete_many(STATS_KEYS.values())
+
+
+def response_cache_key(request, kind, generation, ignore=()):
+    """
+    クエリパラメータを正規化したキャッシュキー。
+    パラメータの順序と空の値 (?category= など、フィルタとしては無指定と同じ) は無視する。
+    ignore のパラメータ (結果に影響しない並び順など) も無視する。
+    画像やページングのリンクは絶対 URL のため、ホストもキーに含める。
+    保存する ETag はレスポンス形式ごとに異なるため、Accept ヘッダーで決まった
+    レンダラーの形式 (json / api など) もキーに含める。
+    """
+    params = sorted(
+        (name, [value for value in values if value != ""])
+        for name, values in request.query_params.lists()
+        if name not in ignore
+    )
+    params = [(name, values) for name, values in params if values]
+    renderer = getattr(request, "accepted_renderer", None)
+    source = json.dumps(
+        [
+            request.get_host(),
+            request.path,
+            renderer.format if renderer else None,
+            params,
+        ],
+        ensure_ascii=False,
+    ).encode("utf-8")
+    digest = hashlib.sha1(source).hexdigest()
+    return f"{KEY_PREFIX}:{generation}:{kind}:v{ENTRY_VERSION}:{digest}"
+
+
+def lookup_response(request, kind, ignore=(), versioned=True):
+    """
+    (キャッシュキー, キャッシュ済みのデータ) を返す。
+    キャッシュにない場合のデータは None、キャッシュが使えない場合はキーも None。
+    versioned=False のキーは世代を含まず、商品の保存・削除では無効にならない
+    (保存時の timeout で期限切れになる)。
+    """
+    try:
+        generation = get_generation() if versioned else UNVERSIONED
+        key = response_cache_key(request, kind, generation, ignore)
+        return key, get_cache().get(key)
+    except Exception:
+        logger.warning("Product cache unavailable", exc_info=True)
+        return None, None
+
+
+def store_response(key, response, timeout=None):
+    """
+    レスポンスデータ (シリアライズ済み) と検証子のヘッダーを保存する。
+    timeout を省略すると PRODUCT_CACHE_TIMEOUT。
+    """
+    if key is None or response.status_code != 200:
+        return
+    entry = {
+        "data": response.data,
+        "headers": {
+            header: response[header]
+            for header in STORED_HEADERS
+            if response.has_header(header)
+        },
+    }
+    try:
+        get_cache().set(
+            key,
+            entry,
+            timeout=settings.PRODUCT_CACHE_TIMEOUT if timeout is None else timeout,
+        )
+    except Exception:
+        logger.warning("Failed to store product cache", exc_info=True)
+
+
+def cached_validators(entry):
+    etag = entry["headers"].get("ETag")
+    if etag is None:
+        return None
+    return Validators(
+        etag, parse_http_date_safe(entry["headers"].get("Last-Modified"))
+    )
+
+
+def cached_hit_response(entry, view=None, request=None):
+    """
+    キャッシュ済みのエントリの応答。view (ConditionalGetMixin) を渡すと、
+    保存した検証子が一致する場合は 304 を返し、Cache-Control / Vary も付ける。
+    """
+    record_stat("hits")
+    response = None
+    validators = cached_validators(entry)
+    if view is not None and validators is not None:
+        response = view.not_modified_response(request, validators)
+    if response is None:
+        response = Response(entry["data"])
+        for header, value in entry["headers"].items():
+            response[header] = value
+        if view is not None:
+            view.patch_response(request, response)
+    response["X-Cache"] = "HIT"
+    return response
+
+
+def mark_miss(response):
+    record_stat("misses")
+    response["X-Cache"] = "MISS"
+    return response
+
+
+def record_stat(name):
+    try:
+        _increment(STATS_KEYS[name])
+    except Exception:
+        logger.debug("Failed to record product cache stats", exc_info=True)
+
+
+class AnonymousResponseCacheMixin:
+    """
+    ViewSet 用: 未ログインの list / retrieve のレスポンスデータ (シリアライズ済み) を
+    キャッシュする。レンダリングはリクエストごとに行うため、形式の切り替えには影響しない。
+    レスポンスヘッダ X-Cache に HIT / MISS を付ける。
+    ConditionalGetMixin と併用すると検証子も保存し、キャッシュにあれば DB を読まずに 304 を返す。
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response("list", super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            "retrieve", super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, kind, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key, entry = lookup_response(request, kind)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        if entry is not None:
+            return cached_hit_response(
+                entry, self if hasattr(self, "not_modified_response") else None, request
+            )
+
+        response = handler(request, *args, **kwargs)
+        store_response(key, response)
+        return mark_miss(response)
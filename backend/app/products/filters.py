@@ -26,6 +26,7 @@ class ProductFilter(django_filters.FilterSet):
     # 栽培方法 (複数選択可能にする場合 - MultipleChoiceFilter)
     cultivation_method = django_filters.MultipleChoiceFilter(
         choices=Product.CULTIVATION_CHOICES,
+        distinct=False,  # 自テーブルの列なので重複は出ない (全列の DISTINCT を避ける)
         # widget=django_filters.widgets.CheckboxSelectMultiple # DRFでは通常不要
     )
 
@@ -0,0 +1,66 @@
+# backend/app/products/indexing.py
+"""
+外部検索インデックスへの反映 (インクリメンタルインデックス)
+
+商品の保存・削除時にトランザクションのコミット後に反映する。
+検索バックエンドの障害で商品の保存 API を失敗させないよう、エラーはログのみ。
+"""
+
+import logging
+
+from django.db import transaction  # type: ignore
+
+from .search_backends import SearchBackendError, get_search_backend, product_document
+
+logger = logging.getLogger(__name__)
+
+
+def document_queryset():
+    """インデックス用ドキュメントの作成に必要な関連を取得するクエリセット"""
+    from .models import Product
+
+    return Product.objects.select_related("producer", "producer__profile")
+
+
+def index_products(product_ids):
+    """指定 ID の商品を再インデックスする (存在しない ID はインデックスから削除)"""
+    backend = get_search_backend()
+    if backend is None or not product_ids:
+        return
+    product_ids = set(product_ids)
+    products = list(document_queryset().filter(pk__in=product_ids))
+    missing = product_ids - {product.pk for product in products}
+    try:
+        backend.index_documents([product_document(product) for product in products])
+        if missing:
+            backend.delete_documents(missing)
+    except SearchBackendError:
+        logger.warning(
+            "Failed to index products %s", sorted(product_ids), exc_info=True
+        )
+
+
+def schedule_index(product_ids):
+    """コミット後に index_products を実行する"""
+    if get_search_backend() is None:
+        return
+    product_ids = list(product_ids)
+    transaction.on_commit(lambda: index_products(product_ids))
+
+
+def schedule_delete(product_ids):
+    """コミット後にインデックスからドキュメントを削除する"""
+    backend = get_search_backend()
+    if backend is None:
+        return
+    product_ids = list(product_ids)
+
+    def delete():
+        try:
+            backend.delete_documents(product_ids)
+        except SearchBackendError:
+            logger.warning(
+                "Failed to delete products %s from index", product_ids, exc_info=True
+            )
+
+    transaction.on_commit(delete)
@@ -0,0 +1,273 @@
+# backend/app/products/inventory.py
+"""
+スプレッドシート (.xlsx / CSV) による在庫・価格の一括更新
+
+生産者が自分の商品の価格・数量・単位・栽培方法・ステータスを 1 枚のシートでまとめて変更する。
+(商品 API の inventory-upload アクションと update_inventory コマンドで使用)
+
+シートの 1 行目は見出し。id 列 (商品 ID) は必須で、それ以外は INVENTORY_FIELDS のうち
+シートにある列だけを更新する (見出しはフィールド名・表示名のどちらでもよい)。
+空のセルは「変更しない」。単位・栽培方法・ステータスは値 ("kg") と表示名 ("キログラム")
+のどちらでも指定できる。
+
+- .xlsx は openpyxl の read_only モードで 1 行ずつ読み、ブック全体をメモリに展開しない。
+- 全行を検証してからまとめて反映する。1 行でもエラーがあれば何も変更しない。
+- 反映は 1 トランザクションで、対象の商品を SELECT … FOR UPDATE で読み、
+  変更がある商品だけを BATCH_SIZE 件ずつまとめて UPDATE する (bulk_update)。
+- 一括の UPDATE は save() やシグナルを通らないため、updated_at の更新・外部検索インデックスへの
+  反映 (schedule_index)・レスポンスキャッシュの破棄は明示的に行う。
+"""
+
+import csv
+import io
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError  # type: ignore
+from django.db import connection, transaction  # type: ignore
+from django.utils import timezone  # type: ignore
+from django.utils.encoding import force_str  # type: ignore
+
+from .cache import invalidate_product_cache
+from .indexing import schedule_index
+from .models import Product
+
+# 更新できる列
+INVENTORY_FIELDS = ["price", "quantity", "unit", "cultivation_method", "status"]
+BATCH_SIZE = 1000
+# 1 回のアップロードで扱う行数の上限
+MAX_ROWS = 50_000
+
+ROW_UPDATED = "updated"
+ROW_UNCHANGED = "unchanged"
+ROW_ERROR = "error"
+
+
+class SheetError(ValueError):
+    """シート全体が読めない場合 (形式・見出しの誤りなど)"""
+
+
+@dataclass
+class InventoryReport:
+    rows: list = field(default_factory=list)  # [{"row", "id", "result", "errors"?}]
+    applied: bool = False
+
+    def count(self, result):
+        return sum(1 for row in self.rows if row["result"] == result)
+
+    @property
+    def has_errors(self):
+        return any(row["result"] == ROW_ERROR for row in self.rows)
+
+    def as_dict(self):
+        return {
+            "applied": self.applied,
+            "updated": self.count(ROW_UPDATED),
+            "unchanged": self.count(ROW_UNCHANGED),
+            "errors": self.count(ROW_ERROR),
+            "rows": self.rows,
+        }
+
+
+def _column_aliases():
+    aliases = {"id": "id", "商品id": "id"}
+    for name in INVENTORY_FIELDS:
+        model_field = Product._meta.get_field(name)
+        aliases[name] = name
+        aliases[force_str(model_field.verbose_name).lower()] = name
+    return aliases
+
+
+def _choice_values(name):
+    """{値または表示名: 値} (選択肢のないフィールドは None)"""
+    model_field = Product._meta.get_field(name)
+    if not model_field.choices:
+        return None
+    values = {}
+    for value, label in model_field.flatchoices:
+        values[value] = value
+        values[force_str(label)] = value
+    return values
+
+
+def read_sheet(file, filename):
+    """(行番号, {列名: 値}) を順に返す。列名は id と INVENTORY_FIELDS に揃える"""
+    if filename.lower().endswith(".xlsx"):
+        rows = _xlsx_rows(file)
+    elif filename.lower().endswith(".csv"):
+        rows = _csv_rows(file)
+    else:
+        raise SheetError("対応しているファイル形式は .xlsx と .csv です。")
+
+    header = next(rows, None)
+    if header is None:
+        raise SheetError("シートが空です。")
+    aliases = _column_aliases()
+    columns = [aliases.get(str(cell or "").strip().lower()) for cell in header]
+    if "id" not in columns:
+        raise SheetError("id 列がありません。")
+    if not any(column in INVENTORY_FIELDS for column in columns):
+        raise SheetError(
+            f"更新する列がありません (使用できる列: {', '.join(INVENTORY_FIELDS)})。"
+        )
+
+    for number, cells in enumerate(rows, start=2):
+        if number - 1 > MAX_ROWS:
+            raise SheetError(f"行数が上限 ({MAX_ROWS:,} 行) を超えています。")
+        row = {
+            column: value
+            for column, value in zip(columns, cells)
+            if column and value not in (None, "")
+        }
+        if row:  # 空行は無視する
+            yield number, row
+
+
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:  # pragma: no cover
+        raise SheetError(".xlsx を読み込むには openpyxl が必要です。")
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as exc:
+        raise SheetError(f".xlsx を読み込めません: {exc}")
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _csv_rows(file):
+    # アップロードされたファイル (バイナリ) をテキストとして読む。Excel の BOM は読み飛ばす
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.reader(text)
+    except UnicodeDecodeError:
+        raise SheetError("CSV は UTF-8 で保存してください。")
+    finally:
+        text.detach()
+
+
+def clean_row(row, choices):
+    """(商品 ID, {フィールド: 値}, {列: エラー}) を返す"""
+    errors = {}
+    product_id = None
+    try:
+        product_id = int(row.get("id"))
+    except (TypeError, ValueError):
+        errors["id"] = "商品 ID を整数で指定してください。"
+
+    values = {}
+    for name in INVENTORY_FIELDS:
+        if name not in row:
+            continue
+        raw = row[name]
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if choices[name] is not None:
+            raw = choices[name].get(raw, raw)
+        try:
+            values[name] = Product._meta.get_field(name).clean(raw, None)
+        except ValidationError as exc:
+            errors[name] = " ".join(exc.messages)
+    return product_id, values, errors
+
+
+def bulk_update(products, fields):
+    """
+    products の fields を BATCH_SIZE 件ずつ UPDATE … FROM unnest(列ごとの配列) で更新する。
+    QuerySet.bulk_update は行 × フィールドごとに CASE WHEN 式を組み立てるため、
+    1 万行では式の組み立て (Python 側) だけで 10 秒以上かかる。
+    """
+    model_fields = [
+        Product._meta.pk,
+        *(Product._meta.get_field(name) for name in fields),
+    ]
+    columns = [connection.ops.quote_name(f.column) for f in model_fields]
+    pk_column = columns[0]
+    sql = (
+        f"UPDATE {connection.ops.quote_name(Product._meta.db_table)} AS p "
+        f"SET {', '.join(f'{column} = v.{column}' for column in columns[1:])} "
+        f"FROM unnest({', '.join(f'%s::{f.db_type(connection)}[]' for f in model_fields)})"
+        f" AS v({', '.join(columns)}) "
+        f"WHERE p.{pk_column} = v.{pk_column}"
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(products), BATCH_SIZE):
+            batch = products[start : start + BATCH_SIZE]
+            cursor.execute(
+                sql,
+                [
+                    [
+                        f.get_db_prep_save(getattr(product, f.attname), connection)
+                        for product in batch
+                    ]
+                    for f in model_fields
+                ],
+            )
+
+
+def update_inventory(producer_id, rows, dry_run=False):
+    """
+    rows (read_sheet の戻り値) を検証し、エラーがなければ反映する。
+    dry_run の場合は検証と変更の有無の判定だけを行う。
+    """
+    report = InventoryReport()
+    choices = {name: _choice_values(name) for name in INVENTORY_FIELDS}
+    changes = {}  # 商品 ID -> (レポートの行, {フィールド: 値})
+    for number, row in rows:
+        product_id, values, errors = clean_row(row, choices)
+        entry = {"row": number, "id": product_id}
+        report.rows.append(entry)
+        if product_id in changes:
+            errors["id"] = f"{changes[product_id][0]['row']} 行目と同じ商品です。"
+        if errors:
+            entry.update(result=ROW_ERROR, errors=errors)
+            continue
+        changes[product_id] = (entry, values)
+
+    with transaction.atomic():
+        updated_fields = set()
+        to_update = []
+        ids = list(changes)
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start : start + BATCH_SIZE]
+            products = (
+                Product.objects.select_for_update()
+                .filter(producer_id=producer_id, pk__in=batch)
+                .only("pk", *INVENTORY_FIELDS)
+            )
+            found = set()
+            for product in products:
+                found.add(product.pk)
+                entry, values = changes[product.pk]
+                changed = [
+                    name
+                    for name, value in values.items()
+                    if getattr(product, name) != value
+                ]
+                if not changed:
+                    entry["result"] = ROW_UNCHANGED
+                    continue
+                for name in changed:
+                    setattr(product, name, values[name])
+                updated_fields.update(changed)
+                entry["result"] = ROW_UPDATED
+                to_update.append(product)
+            for product_id in set(batch) - found:
+                # 他の生産者の商品も「見つからない」として扱う
+                changes[product_id][0].update(
+                    result=ROW_ERROR, errors={"id": "商品が見つかりません。"}
+                )
+
+        if report.has_errors or dry_run or not to_update:
+            return report
+
+        now = timezone.now()
+        for product in to_update:
+            product.updated_at = now
+        bulk_update(to_update, [*sorted(updated_fields), "updated_at"])
+        schedule_index([product.pk for product in to_update])
+        report.applied = True
+    invalidate_product_cache()
+    return report
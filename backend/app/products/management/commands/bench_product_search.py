@@ -0,0 +1,172 @@
+# backend/app/products/management/commands/bench_product_search.py
+"""
+商品検索のベンチマーク
+
+旧来の SearchFilter (name/description/category の ILIKE '%…%' OR) と
+ProductSearchFilter (search_vector の GIN インデックス) のレイテンシを比較する。
+合成データはトランザクション内で投入し、計測後にロールバックする。
+
+    python manage.py bench_product_search --sizes 10000 100000 1000000
+"""
+
+import random
+import statistics
+import time
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.contrib.postgres.search import SearchRank  # type: ignore
+from django.core.management.base import BaseCommand  # type: ignore
+from django.db import connection, transaction  # type: ignore
+from django.db.models import F, Q  # type: ignore
+
+from app.products.models import Product
+from app.products.search import build_search_query
+
+WORDS = [
+    "トマト",
+    "レタス",
+    "きゅうり",
+    "なす",
+    "ピーマン",
+    "ほうれん草",
+    "小松菜",
+    "にんじん",
+    "じゃがいも",
+    "玉ねぎ",
+    "白菜",
+    "キャベツ",
+    "大根",
+    "かぼちゃ",
+    "いちご",
+    "りんご",
+    "みかん",
+    "白桃",
+    "ぶどう",
+    "メロン",
+    "コシヒカリ",
+    "玄米",
+    "有機",
+    "朝採れ",
+    "甘熟",
+    "産直",
+    "訳あり",
+    "贈答用",
+    "新鮮",
+    "シャキシャキ",
+    "ジューシー",
+    "農薬不使用",
+    "無農薬",
+    "特別栽培",
+    "旬",
+]
+CATEGORIES = ["野菜", "果物", "米・穀物", "加工品", "セット"]
+QUERIES = [
+    "トマト",
+    "白桃",
+    "有機 いちご",
+    "コシヒカリ",
+    "農薬不使用",
+    "存在しない商品",
+]
+
+
+class StopBenchmark(Exception):
+    """計測後にロールバックさせるための例外"""
+
+
+class Command(BaseCommand):
+    help = "旧 SearchFilter と ProductSearchFilter の検索レイテンシを比較する"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000]
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for size in sorted(options["sizes"]):
+            try:
+                with transaction.atomic():
+                    self._seed(size, options["batch_size"])
+                    self._run(size, options["repeat"])
+                    raise StopBenchmark
+            except StopBenchmark:
+                pass
+
+    def _seed(self, size, batch_size):
+        User = get_user_model()
+        producer = User.objects.create(username=f"bench_search_{size}")
+        rng = random.Random(size)
+        created = 0
+        started = time.perf_counter()
+        while created < size:
+            batch = []
+            for _ in range(min(batch_size, size - created)):
+                product = Product(
+                    producer=producer,
+                    name=" ".join(rng.sample(WORDS, 3)),
+                    description="。".join(rng.sample(WORDS, 12)),
+                    category=rng.choice(CATEGORIES),
+                    price=rng.randint(100, 10000),
+                    quantity=rng.randint(1, 100),
+                    unit="kg",
+                    status=Product.STATUS_ACTIVE,
+                )
+                product.search_vector = product.get_search_vector()
+                batch.append(product)
+            Product.objects.bulk_create(batch)
+            created += len(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Product._meta.db_table}")
+        self.stdout.write(
+            f"\n== {size:,} products (seeded in {time.perf_counter() - started:.1f}s)"
+        )
+
+    def _run(self, size, repeat):
+        base = Product.objects.filter(status=Product.STATUS_ACTIVE).select_related(
+            "producer"
+        )
+        self.stdout.write(
+            f"{'query':<16}{'icontains p50/p95 ms':>24}{'tsvector p50/p95 ms':>24}"
+        )
+        for text in QUERIES:
+            terms = text.split()
+            legacy = base
+            for term in terms:
+                legacy = legacy.filter(
+                    reduce(
+                        or_,
+                        (
+                            Q(**{f"{field}__icontains": term})
+                            for field in ("name", "description", "category")
+                        ),
+                    )
+                )
+            legacy = legacy.order_by("-created_at")
+
+            query = build_search_query(text)
+            indexed = (
+                base.filter(search_vector=query)
+                .annotate(search_rank=SearchRank(F("search_vector"), query))
+                .order_by("-search_rank", "-created_at")
+            )
+            self.stdout.write(
+                f"{text:<16}{self._measure(legacy, repeat):>24}"
+                f"{self._measure(indexed, repeat):>24}"
+            )
+
+    def _measure(self, queryset, repeat):
+        # 一覧 API と同じく件数 (COUNT) と 1 ページ目 (12 件) を取得する
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset.count()
+            list(queryset[:12])
+            timings.append((time.perf_counter() - started) * 1000)
+        p95 = (
+            statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        )
+        return f"{statistics.median(timings):.1f} / {p95:.1f}"
@@ -0,0 +1,115 @@
+# backend/app/products/management/commands/bench_product_serializer.py
+"""
+商品一覧のシリアライズのマイクロベンチマーク
+
+1 ページ分の商品について、従来の変換 (モデルインスタンス + ProductSerializer の
+フィールドごとの変換) と、一覧用の高速パス (values() + ProductListSerializer) の
+1 行あたりのコスト (クエリ + 変換 + JSON レンダリング) を比較する。
+両者の JSON がバイト単位で一致することも確認する。
+合成データはトランザクション内で投入し、計測後にロールバックする。
+
+    python manage.py bench_product_serializer --page-sizes 12 100 --repeat 50
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+from django.db import transaction  # type: ignore
+from django.test.utils import override_settings  # type: ignore
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from app.products.models import Product
+from app.products.serializers import ProductSerializer
+
+
+class StopBenchmark(Exception):
+    """計測後にロールバックさせるための例外"""
+
+
+class Command(BaseCommand):
+    help = "商品一覧の従来のシリアライズと values() による高速パスを比較する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-sizes", nargs="+", type=int, default=[12, 100])
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        page_sizes = sorted(options["page_sizes"])
+        try:
+            # 画像の絶対 URL を生成するため testserver を許可する
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=["*"]):
+                self._seed(page_sizes[-1])
+                self._run(page_sizes, options["repeat"])
+                raise StopBenchmark
+        except StopBenchmark:
+            pass
+
+    def _seed(self, size):
+        producer = get_user_model().objects.create(username="bench_serializer")
+        rng = random.Random(size)
+        units = [choice for choice, _ in Product.UNIT_CHOICES]
+        methods = [choice for choice, _ in Product.CULTIVATION_CHOICES]
+        Product.objects.bulk_create(
+            Product(
+                producer=producer,
+                name=f"商品 {i}",
+                description="説明" * rng.randint(5, 50),
+                category=rng.choice(["野菜", "果物", "米・穀物"]),
+                price=rng.randint(100, 10000),
+                quantity=rng.randint(1, 100),
+                unit=rng.choice(units),
+                image=f"products/bench_{i}.jpg" if i % 2 else None,
+                standard="A品" if i % 3 else None,
+                cultivation_method=rng.choice(methods),
+                status=Product.STATUS_ACTIVE,
+            )
+            for i in range(size)
+        )
+        self.producer = producer
+
+    def _run(self, page_sizes, repeat):
+        request = Request(APIRequestFactory().get("/api/products/"))
+        context = {"request": request}
+        renderer = JSONRenderer()
+        base = Product.objects.filter(producer=self.producer).order_by("-created_at")
+
+        def legacy(page_size):
+            page = list(base.select_related("producer")[:page_size])
+            return renderer.render(
+                ProductSerializer(page, many=True, context=context).data
+            )
+
+        def fast(page_size):
+            serializer = ProductSerializer(context=context)
+            page = list(serializer.list_values(base)[:page_size])
+            return renderer.render(
+                ProductSerializer(page, many=True, context=context).data
+            )
+
+        self.stdout.write(
+            f"{'rows':>6}{'instance us/row':>18}{'values us/row':>16}{'speedup':>10}"
+        )
+        for page_size in page_sizes:
+            if legacy(page_size) != fast(page_size):
+                raise CommandError("JSON output differs between the two paths")
+            legacy_cost = self._measure(legacy, page_size, repeat)
+            fast_cost = self._measure(fast, page_size, repeat)
+            self.stdout.write(
+                f"{page_size:>6}{legacy_cost:>18.1f}{fast_cost:>16.1f}"
+                f"{legacy_cost / fast_cost:>9.1f}x"
+            )
+
+    @staticmethod
+    def _measure(render_page, page_size, repeat):
+        # 1 行あたりのコストの中央値 (マイクロ秒)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render_page(page_size)
+            timings.append((time.perf_counter() - started) * 1_000_000 / page_size)
+        return statistics.median(timings)
@@ -0,0 +1,64 @@
+# backend/app/products/management/commands/export_products.py
+"""
+商品を JSON Lines / CSV / JSON に書き出す (import_products で読み込める形式)
+
+    python manage.py export_products products.jsonl
+    python manage.py export_products - --format csv --status active > products.csv
+
+テーブルはサーバーサイドカーソルで chunk_size 行ずつ読み出す (全件をメモリに載せない)。
+"""
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+
+from app.products.models import Product
+from app.products.transfer import (
+    DEFAULT_CHUNK_SIZE,
+    FORMATS,
+    detect_format,
+    export_queryset,
+    write_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "商品を JSON Lines / CSV / JSON に書き出す"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="出力ファイル (- は標準出力)")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--status",
+            nargs="+",
+            choices=[value for value, _ in Product.STATUS_CHOICES],
+            help="書き出すステータス (既定: すべて)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            fmt = detect_format(path, options["format"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        started = time.perf_counter()
+        rows = export_queryset(options["status"]).iterator(
+            chunk_size=options["chunk_size"]
+        )
+        if path == "-":
+            count = write_rows(sys.stdout, fmt, rows)
+            out = self.stderr  # 標準出力はデータに使う
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                count = write_rows(file, fmt, rows)
+            out = self.stdout
+        elapsed = time.perf_counter() - started
+        out.write(
+            self.style.SUCCESS(
+                f"Exported {count:,} products in {elapsed:.1f}s "
+                f"({count / elapsed if elapsed else 0:,.0f} rows/s)"
+            )
+        )
@@ -0,0 +1,91 @@
+# backend/app/products/management/commands/import_products.py
+"""
+商品を JSON Lines / CSV / JSON から一括で登録・更新する (app/products/transfer.py)
+
+    python manage.py import_products products.jsonl --chunk-size 5000
+    python manage.py import_products - --format csv < products.csv
+    # 初期データ (画像はフロントエンドのダミー画像のパスなので取り込まない)
+    python manage.py import_products app/initial_data/products.json --exclude image
+
+id がある行は同じ id の商品を上書きし、ない行は新規に登録する。
+生産者 (producer_username) が存在しない行や値が不正な行はスキップして行番号を表示する。
+チャンクごとにコミットするため、途中で失敗した場合もそれまでのチャンクは登録済みになる。
+"""
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+
+from app.products.transfer import (
+    DEFAULT_CHUNK_SIZE,
+    FORMATS,
+    MODEL_FIELDS,
+    ProductImporter,
+    detect_format,
+    read_rows,
+)
+
+# スキップした行のうち表示する件数
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = "商品を JSON Lines / CSV / JSON から一括で登録・更新する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="入力ファイル (- は標準入力)")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--exclude",
+            nargs="+",
+            default=[],
+            choices=MODEL_FIELDS,
+            help="取り込まない列 (既存の商品の値はそのまま残る)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            fmt = detect_format(path, options["format"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        started = time.perf_counter()
+
+        def report(imported):
+            if options["verbosity"] >= 2:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"  {imported:,} rows ({imported / elapsed:,.0f} rows/s)"
+                )
+
+        importer = ProductImporter(
+            chunk_size=options["chunk_size"],
+            exclude=options["exclude"],
+            on_chunk=report,
+        )
+        try:
+            if path == "-":
+                result = importer.run(read_rows(sys.stdin, fmt))
+            else:
+                # utf-8-sig: Excel で保存した CSV の BOM を読み飛ばす
+                with open(path, encoding="utf-8-sig", newline="") as file:
+                    result = importer.run(read_rows(file, fmt))
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        elapsed = time.perf_counter() - started
+        for number, message in result.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f"line {number}: {message}")
+        if len(result.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(
+                f"... and {len(result.errors) - MAX_REPORTED_ERRORS} more"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.imported:,} products (skipped {result.skipped:,}) "
+                f"in {elapsed:.1f}s ({result.imported / elapsed if elapsed else 0:,.0f} rows/s)"
+            )
+        )
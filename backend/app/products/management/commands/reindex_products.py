@@ -0,0 +1,74 @@
+# backend/app/products/management/commands/reindex_products.py
+"""
+商品テーブル全件を外部検索インデックスに再投入する
+
+テーブルはサーバーサイドカーソルでチャンクごとに読み出し (全件をメモリに載せない)、
+バルクリクエストを複数スレッドで並列送信する。
+
+    python manage.py reindex_products --chunk-size 1000 --workers 4 --reset
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+
+from app.products.indexing import document_queryset
+from app.products.search_backends import get_search_backend, product_document
+
+
+class Command(BaseCommand):
+    help = "商品を検索バックエンドに一括で再インデックスする"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="インデックスを削除・再作成してから投入する",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            raise CommandError("PRODUCT_SEARCH_BACKEND が設定されていません。")
+
+        chunk_size = options["chunk_size"]
+        workers = options["workers"]
+        if options["reset"]:
+            backend.reset()
+
+        started = time.perf_counter()
+        indexed = 0
+        pending = set()
+        chunk = []
+        products = document_queryset().order_by("pk").iterator(chunk_size=chunk_size)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for product in products:
+                chunk.append(product_document(product))
+                if len(chunk) < chunk_size:
+                    continue
+                # 送信中のリクエストが workers の 2 倍を超えたら完了を待つ (メモリ上限)
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    indexed += sum(future.result() for future in done)
+                pending.add(executor.submit(self._send, backend, chunk))
+                chunk = []
+            if chunk:
+                pending.add(executor.submit(self._send, backend, chunk))
+            done, _ = wait(pending)
+            indexed += sum(future.result() for future in done)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {indexed:,} products in {elapsed:.1f}s "
+                f"({indexed / elapsed if elapsed else 0:,.0f} docs/s)"
+            )
+        )
+
+    @staticmethod
+    def _send(backend, documents):
+        backend.index_documents(documents)
+        return len(documents)
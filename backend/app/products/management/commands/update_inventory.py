@@ -0,0 +1,64 @@
+# backend/app/products/management/commands/update_inventory.py
+"""
+生産者の商品の価格・数量・ステータスなどをシート (.xlsx / CSV) で一括更新する
+(app/products/inventory.py。商品 API の inventory-upload と同じ処理)
+
+    python manage.py update_inventory yamada_farm inventory.xlsx
+    python manage.py update_inventory yamada_farm inventory.csv --dry-run
+
+エラーのある行が 1 つでもあれば何も変更せず、エラーの行を表示する。
+"""
+
+import time
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+
+from app.products.inventory import ROW_ERROR, SheetError, read_sheet, update_inventory
+
+
+class Command(BaseCommand):
+    help = "生産者の商品の価格・数量・ステータスなどをシートで一括更新する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("producer", help="生産者のユーザー名")
+        parser.add_argument("path", help=".xlsx または .csv")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="検証だけを行い、変更しない"
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            producer = User.objects.get(username=options["producer"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['producer']!r} does not exist.")
+
+        started = time.perf_counter()
+        try:
+            with open(options["path"], "rb") as file:
+                report = update_inventory(
+                    producer.pk,
+                    read_sheet(file, options["path"]),
+                    dry_run=options["dry_run"],
+                )
+        except (OSError, SheetError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        for row in report.rows:
+            if row["result"] == ROW_ERROR:
+                errors = ", ".join(f"{k}: {v}" for k, v in row["errors"].items())
+                self.stderr.write(f"row {row['row']}: {errors}")
+        summary = report.as_dict()
+        message = (
+            f"updated={summary['updated']} unchanged={summary['unchanged']} "
+            f"errors={summary['errors']} in {elapsed:.2f}s"
+        )
+        if report.has_errors:
+            raise CommandError(f"No changes were applied ({message})")
+        self.stdout.write(
+            self.style.SUCCESS(
+                message if report.applied else f"{message} (not applied)"
+            )
+        )
@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-17 19:58
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+from app.products.search import build_search_vector
+
+
+def backfill_search_vector(apps, schema_editor):
+    # 既存の商品に検索ドキュメントを設定する
+    Product = apps.get_model("products", "Product")
+    batch = []
+    for product in Product.objects.only("name", "category", "description").iterator(
+        chunk_size=1000
+    ):
+        product.search_vector = build_search_vector(
+            product.name, product.category, product.description
+        )
+        batch.append(product)
+        if len(batch) >= 1000:
+            Product.objects.bulk_update(batch, ["search_vector"])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ["search_vector"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_alter_product_allergy_info_alter_product_standard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
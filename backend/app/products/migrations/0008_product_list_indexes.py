@@ -0,0 +1,87 @@
+# Generated by Django 5.2 on 2026-10-17 20:03
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0007_product_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="producer",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="products",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="生産者",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("draft", "下書き"),
+                    ("pending", "審査中"),
+                    ("active", "販売中"),
+                    ("inactive", "販売停止"),
+                ],
+                default="draft",
+                max_length=10,
+                verbose_name="ステータス",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["status", "-created_at", "-id"],
+                name="product_status_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["status", "price", "id"], name="product_status_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["status", "cultivation_method", "-created_at"],
+                name="product_status_cultiv_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                models.F("status"),
+                django.db.models.functions.text.Upper("category"),
+                models.OrderBy(models.F("created_at"), descending=True),
+                name="product_status_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["producer", "status"], name="product_producer_status_idx"
+            ),
+        ),
+        # producer_username (username__iexact) は UPPER(username) の比較になるため、
+        # auth_user 側に式インデックスを作成して生産者の特定をインデックスで行う
+        migrations.RunSQL(
+            sql=(
+                "CREATE INDEX IF NOT EXISTS auth_user_username_upper_idx "
+                "ON auth_user (UPPER(username));"
+            ),
+            reverse_sql="DROP INDEX IF EXISTS auth_user_username_upper_idx;",
+        ),
+    ]
@@ -1,5 +1,16 @@
 from django.db import models  # type: ignore
 from django.conf import settings  # type: ignore # settings.AUTH_USER_MODEL を参照するため
+from django.contrib.postgres.indexes import GinIndex  # type: ignore
+from django.contrib.postgres.search import SearchVectorField  # type: ignore
+from django.db.models import F  # type: ignore
+from django.db.models.functions import Upper  # type: ignore
+from django.db.models.signals import post_delete, post_save  # type: ignore
+from django.dispatch import receiver  # type: ignore
+from app.core.images import PENDING_IMAGE_VARIANTS, reset_stale_variants
+
+from .cache import invalidate_product_cache
+from .indexing import schedule_delete, schedule_index
+from .search import build_search_vector
 
 # settings.AUTH_USER_MODEL を参照してユーザーモデルを取得
 # (カスタムユーザーモデルに対応しやすいため推奨)
@@ -39,9 +50,15 @@ class Product(models.Model):
         ("natural", "自然栽培"),
         # 必要に応じて追加
     ]
+    # search_vector の元になるフィールド
+    SEARCH_FIELDS = frozenset({"name", "category", "description"})
 
     producer = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="products", verbose_name="生産者"
+        User,
+        on_delete=models.CASCADE,
+        related_name="products",
+        verbose_name="生産者",
+        db_index=False,  # Meta.indexes の (producer, status) で代用
     )
     name = models.CharField(max_length=255, verbose_name="商品名")
     description = models.TextField(verbose_name="商品説明")
@@ -58,6 +75,8 @@ class Product(models.Model):
     image = models.ImageField(
         upload_to="products/", blank=True, null=True, verbose_name="商品画像"
     )  # Pillow が必要 pip install Pillow
+    # 派生画像 (サムネイル・カード・詳細) の保存先 (app/core/images.py, process_images が生成)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     # video = models.FileField(upload_to='products_video/', blank=True, null=True, verbose_name='商品動画') # 必要であれば
     standard = models.CharField(
         max_length=100, blank=True, null=True, verbose_name="規格"
@@ -81,21 +100,91 @@ class Product(models.Model):
         max_length=10,
         choices=STATUS_CHOICES,
         default=STATUS_DRAFT,  # デフォルトステータスを下書きに
-        db_index=True,  # 検索・フィルタのためにインデックスを張る
+        # 検索・フィルタ用のインデックスは Meta.indexes の複合インデックス (status が先頭)
         verbose_name="ステータス",
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="作成日時")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
+    # 全文検索用ドキュメント (商品名・カテゴリ・説明のバイグラム, save 時に更新)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "商品"
         verbose_name_plural = "商品"
         ordering = ["-created_at"]  # 新しい順に並べる
+        # 商品一覧 (ProductFilter / ordering_fields) のクエリに合わせた複合インデックス
+        # id はキーセットページングの同値順序用
+        indexes = [
+            GinIndex(fields=["search_vector"], name="product_search_vector_gin"),
+            # status='active' ORDER BY -created_at (デフォルトの一覧)
+            models.Index(
+                fields=["status", "-created_at", "-id"],
+                name="product_status_created_idx",
+            ),
+            # min_price / max_price と ordering=price
+            models.Index(
+                fields=["status", "price", "id"], name="product_status_price_idx"
+            ),
+            # cultivation_method IN (...)
+            models.Index(
+                fields=["status", "cultivation_method", "-created_at"],
+                name="product_status_cultiv_idx",
+            ),
+            # category__iexact (Django は UPPER(category) = UPPER(%s) を生成する)
+            models.Index(
+                "status",
+                Upper("category"),
+                F("created_at").desc(),
+                name="product_status_category_idx",
+            ),
+            # producer_username / owner=me (生産者の FK インデックスを兼ねる)
+            models.Index(
+                fields=["producer", "status"], name="product_producer_status_idx"
+            ),
+            # 派生画像の生成待ち (process_images)
+            models.Index(
+                fields=["id"],
+                condition=PENDING_IMAGE_VARIANTS,
+                name="product_image_pending_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.producer.username})"
 
+    def save(self, *args, **kwargs):
+        # 画像が差し替えられた場合は派生画像を作り直す
+        update_fields = reset_stale_variants(self, kwargs.get("update_fields"))
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
+        # 検索対象フィールドが保存される場合のみ search_vector を作り直す
+        if update_fields is None:
+            self.search_vector = self.get_search_vector()
+        elif self.SEARCH_FIELDS.intersection(update_fields):
+            self.search_vector = self.get_search_vector()
+            kwargs["update_fields"] = {*update_fields, "search_vector"}
+        super().save(*args, **kwargs)
+
+    def get_search_vector(self):
+        """search_vector に保存する式 (bulk_create / bulk_update でも使用)"""
+        return build_search_vector(self.name, self.category, self.description)
+
     # 公開中かどうかを判定するプロパティ
     @property
     def is_active(self):
         return self.status == self.STATUS_ACTIVE
+
+
+# 商品の保存 (change_status を含む)・削除を外部検索インデックスと
+# 匿名向けレスポンスキャッシュに反映する
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, raw=False, **kwargs):
+    invalidate_product_cache()
+    if not raw:  # loaddata 時は対象外
+        schedule_index([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_deleted_product(sender, instance, **kwargs):
+    invalidate_product_cache()
+    schedule_delete([instance.pk])
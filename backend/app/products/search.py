@@ -0,0 +1,206 @@
+# backend/app/products/search.py
+"""
+商品の全文検索 (PostgreSQL tsvector + バイグラム)
+
+日本語は単語の区切り (スペース) がないため、PostgreSQL の標準パーサや
+pg_trgm (単語単位のトライグラム) では部分一致検索ができない。
+そこで文字のバイグラム (2-gram) を 'simple' 設定の tsvector に格納し、
+検索語も同じ方法でバイグラムに分解して隣接演算子 (<->) で繋ぐことで、
+ILIKE '%…%' と同等の部分一致を GIN インデックス経由で行う。
+"""
+
+import logging
+import unicodedata
+
+from django.contrib.postgres.fields import ArrayField  # type: ignore
+from django.contrib.postgres.search import (  # type: ignore
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+)
+from django.db.models import (  # type: ignore
+    BigIntegerField,
+    F,
+    FloatField,
+    Func,
+    IntegerField,
+    Value,
+)
+from django.db.models.expressions import RawSQL  # type: ignore
+from django.db.models.functions import Cast  # type: ignore
+from rest_framework import filters
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "simple"
+
+# 外部検索バックエンドから取得する検索結果の上限件数
+# ヒット件数がこれを超える場合は全件の順位を取得できないため、PostgreSQL で検索する
+EXTERNAL_SEARCH_LIMIT = 1000
+
+# 検索ドキュメントに含めるフィールドと重み (A が最も高い)
+SEARCH_DOCUMENT_FIELDS = (
+    ("name", "A"),
+    ("category", "B"),
+    ("description", "C"),
+)
+
+
+def _normalize(text):
+    """全角英数の半角化・大文字小文字の統一 (NFKC + casefold)"""
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+def _runs(text):
+    """英数字・かな・漢字が連続する部分 (記号や空白以外) を順に返す"""
+    run = []
+    for char in _normalize(text):
+        if char.isalnum():
+            run.append(char)
+        elif run:
+            yield "".join(run)
+            run = []
+    if run:
+        yield "".join(run)
+
+
+def tokenize(text):
+    """
+    テキストをバイグラムに分解する。
+    各連続部分の末尾には 1 文字のユニグラムを加え、1 文字の検索語
+    (例: 「桃」) が語末にあってもヒットするようにする。
+    """
+    tokens = []
+    for run in _runs(text):
+        tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    return tokens
+
+
+# build_search_vector の SQL (setweight(to_tsvector(...), 'A') || ... をフィールドの順に連結)
+# SearchVector を組み合わせた式と同じ値になるが、コンパイルが軽いため
+# bulk_create で数千行をまとめて登録する場合にも SQL の組み立てに時間がかからない
+SEARCH_VECTOR_SQL = " || ".join(
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, %s), '{weight}')"
+    for _, weight in SEARCH_DOCUMENT_FIELDS
+)
+
+
+def build_search_vector(name, category, description):
+    """Product.search_vector に保存する tsvector 式を組み立てる"""
+    values = {"name": name, "category": category, "description": description}
+    return RawSQL(
+        SEARCH_VECTOR_SQL,
+        [
+            " ".join(tokenize(values[field_name]))
+            for field_name, _ in SEARCH_DOCUMENT_FIELDS
+        ],
+        output_field=SearchVectorField(),
+    )
+
+
+def build_search_query(text):
+    """
+    検索文字列を tsquery に変換する。
+    スペース区切りの語は AND、語の中のバイグラムは隣接 (<->) で繋ぐ。
+    検索可能な文字が無ければ None を返す。
+    """
+    clauses = []
+    for run in _runs(text):
+        if len(run) == 1:
+            clauses.append(f"'{run}':*")  # 1 文字は前方一致
+        else:
+            bigrams = (run[i : i + 2] for i in range(len(run) - 1))
+            clauses.append("(" + " <-> ".join(f"'{b}'" for b in bigrams) + ")")
+    if not clauses:
+        return None
+    return SearchQuery(" & ".join(clauses), config=SEARCH_CONFIG, search_type="raw")
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter の置き換え。?search= を search_vector の GIN インデックスで検索し、
+    関連度 (search_rank) を付与する。
+    ?ordering= の指定がない場合は関連度順に並べるため、
+    filter_backends では OrderingFilter の後ろに置くこと。
+    settings.PRODUCT_SEARCH_BACKEND が設定されていれば外部インデックスで検索し、
+    障害時とヒット件数が EXTERNAL_SEARCH_LIMIT を超える場合は PostgreSQL で検索する。
+    外部インデックスには ProductFilter の絞り込みと、ビューの search_backend_filters()
+    (get_queryset と同じ status などの絞り込み) を渡す。
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        # 検索できる文字がない (記号だけなど) 場合はどちらの検索でも 0 件にする
+        query = build_search_query(" ".join(search_terms))
+        if query is None:
+            return queryset.none()
+
+        from .search_backends import SearchBackendError, get_search_backend
+
+        backend = get_search_backend()
+        if backend is not None:
+            try:
+                filtered = self._filter_with_backend(
+                    backend, request, queryset, view, search_terms
+                )
+            except SearchBackendError:
+                logger.warning(
+                    "Search backend failed, falling back to PostgreSQL", exc_info=True
+                )
+            else:
+                if filtered is not None:
+                    return self._order_by_rank(request, filtered)
+
+        # ts_rank は real 型のため、キーセットページングで値を正確に比較できるよう
+        # double precision にキャストしておく
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+        )
+        return self._order_by_rank(request, queryset)
+
+    def _filter_with_backend(self, backend, request, queryset, view, search_terms):
+        """
+        外部インデックスで関連度順の ID を取得し、その順位を search_rank とする。
+        ヒットした全件を取得できない場合は None (PostgreSQL で検索する)。
+        """
+        from .filters import ProductFilter
+
+        filterset = ProductFilter(request.query_params, queryset=queryset.none())
+        backend_filters = filterset.form.cleaned_data if filterset.is_valid() else {}
+        if hasattr(view, "search_backend_filters"):
+            backend_filters = {**backend_filters, **view.search_backend_filters()}
+        # ファセットは絞り込み後の行を facets.py で数えるため、外部インデックスでは集計しない
+        result = backend.search(
+            " ".join(search_terms),
+            backend_filters,
+            limit=EXTERNAL_SEARCH_LIMIT,
+            facets=False,
+        )
+        if result.total > len(result.ids):
+            logger.info(
+                "Search backend returned %d of %d hits, using PostgreSQL",
+                len(result.ids),
+                result.total,
+            )
+            return None
+        if not result.ids:
+            return queryset.none()
+        # 配列内の位置 (1 始まり) を順位にする (ID ごとの CASE WHEN を組み立てない)
+        position = Func(
+            Value(result.ids, output_field=ArrayField(BigIntegerField())),
+            F("pk"),
+            function="array_position",
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=result.ids).annotate(
+            search_rank=Value(len(result.ids) + 1) - position
+        )
+
+    @staticmethod
+    def _order_by_rank(request, queryset):
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.order_by("-search_rank", *queryset.query.order_by)
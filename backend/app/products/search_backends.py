@@ -0,0 +1,469 @@
+# backend/app/products/search_backends.py
+"""
+商品検索の外部インデックス (検索バックエンド)
+
+settings.PRODUCT_SEARCH_BACKEND で実装クラスを切り替える。
+    - ElasticsearchBackend: docker-compose の search サービス (Elasticsearch 8) を使う
+    - InMemorySearchBackend: プロセス内の簡易実装 (テスト・クラスタなしの開発用)
+未設定 (None) の場合は外部インデックスを使わず、PostgreSQL の search_vector で検索する。
+"""
+
+import json
+import logging
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings  # type: ignore
+from django.utils.module_loading import import_string  # type: ignore
+
+from .search import _normalize, _runs
+
+logger = logging.getLogger(__name__)
+
+
+class SearchBackendError(Exception):
+    """検索バックエンドとの通信・応答エラー"""
+
+
+@dataclass
+class SearchResult:
+    """検索結果 (関連度順の商品 ID・総件数・ファセット集計)"""
+
+    ids: list
+    total: int
+    facets: dict = field(default_factory=dict)
+
+
+# 価格ファセットの区切り (円)
+PRICE_RANGES = [(None, 500), (500, 1000), (1000, 3000), (3000, 5000), (5000, None)]
+
+
+def product_document(product):
+    """Product インスタンスを検索インデックス用のドキュメントに変換する"""
+    producer = product.producer
+    try:
+        prefecture = producer.profile.location_prefecture
+    except Exception:  # Profile が無いユーザーなど
+        prefecture = ""
+    return {
+        "id": product.pk,
+        "name": product.name,
+        "description": product.description,
+        "category": product.category,
+        "producer_username": producer.username,
+        "producer_prefecture": prefecture,
+        "price": int(product.price),
+        "unit": product.unit,
+        "cultivation_method": product.cultivation_method,
+        "status": product.status,
+        "created_at": product.created_at.isoformat(),
+        "updated_at": product.updated_at.isoformat(),
+    }
+
+
+class BaseSearchBackend:
+    """検索バックエンドの共通インターフェース"""
+
+    def __init__(self, **options):
+        self.options = options
+
+    def index_documents(self, documents):
+        """ドキュメントを追加・更新する"""
+        raise NotImplementedError
+
+    def delete_documents(self, ids):
+        """ドキュメントを削除する"""
+        raise NotImplementedError
+
+    def search(self, text, filters=None, limit=1000, facets=True):
+        """
+        キーワード検索を行い SearchResult を返す。
+        filters: status, category, cultivation_method (リスト), min_price, max_price,
+                 producer_username
+        facets=False の場合はファセットを集計しない (SearchResult.facets は空)。
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """インデックスを作り直す (全件再インデックスの前に呼ぶ)"""
+        raise NotImplementedError
+
+
+class InMemorySearchBackend(BaseSearchBackend):
+    """
+    プロセス内の検索バックエンド。
+    ILIKE と同じ部分一致で、商品名 > カテゴリ > 説明 の順にスコアを付ける。
+    """
+
+    FIELD_WEIGHTS = (("name", 3), ("category", 2), ("description", 1))
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def index_documents(self, documents):
+        with self._lock:
+            for document in documents:
+                self._documents[document["id"]] = document
+
+    def delete_documents(self, ids):
+        with self._lock:
+            for pk in ids:
+                self._documents.pop(pk, None)
+
+    def reset(self):
+        with self._lock:
+            self._documents = {}
+
+    def search(self, text, filters=None, limit=1000, facets=True):
+        filters = filters or {}
+        terms = [_normalize(term) for term in (text or "").split()]
+        with self._lock:
+            documents = list(self._documents.values())
+
+        hits = []
+        for document in documents:
+            if not self._matches_filters(document, filters):
+                continue
+            score = 0
+            for term in terms:
+                term_score = sum(
+                    weight
+                    for field_name, weight in self.FIELD_WEIGHTS
+                    if term in _normalize(document[field_name])
+                )
+                if not term_score:
+                    break
+                score += term_score
+            else:
+                hits.append((score, document["created_at"], document))
+
+        hits.sort(key=lambda hit: (hit[0], hit[1]), reverse=True)
+        matched = [document for _, _, document in hits]
+        return SearchResult(
+            ids=[document["id"] for document in matched[:limit]],
+            total=len(matched),
+            facets=self._facets(matched) if facets else {},
+        )
+
+    @staticmethod
+    def _matches_filters(document, filters):
+        if filters.get("status") and document["status"] != filters["status"]:
+            return False
+        if filters.get("category") and (
+            document["category"].lower() != filters["category"].lower()
+        ):
+            return False
+        if filters.get("cultivation_method") and (
+            document["cultivation_method"] not in filters["cultivation_method"]
+        ):
+            return False
+        if (
+            filters.get("min_price") is not None
+            and document["price"] < filters["min_price"]
+        ):
+            return False
+        if (
+            filters.get("max_price") is not None
+            and document["price"] > filters["max_price"]
+        ):
+            return False
+        if filters.get("producer_username") and (
+            document["producer_username"].lower()
+            != filters["producer_username"].lower()
+        ):
+            return False
+        return True
+
+    @staticmethod
+    def _facets(documents):
+        price_counts = Counter()
+        for document in documents:
+            for low, high in PRICE_RANGES:
+                if (low is None or document["price"] >= low) and (
+                    high is None or document["price"] < high
+                ):
+                    price_counts[(low, high)] += 1
+                    break
+        return {
+            "category": dict(Counter(d["category"] for d in documents)),
+            "cultivation_method": dict(
+                Counter(d["cultivation_method"] for d in documents)
+            ),
+            "producer_prefecture": dict(
+                Counter(d["producer_prefecture"] for d in documents)
+            ),
+            "price": [
+                {"min": low, "max": high, "count": price_counts[(low, high)]}
+                for low, high in PRICE_RANGES
+            ],
+        }
+
+
+class ElasticsearchBackend(BaseSearchBackend):
+    """
+    Elasticsearch 8 互換の REST API を使う検索バックエンド (追加ライブラリ不要)。
+    日本語の部分一致のため、文字バイグラムの ngram トークナイザでインデックスし、
+    match_phrase で検索語のバイグラムが連続するドキュメントを探す。
+    1 文字の語 (例: 「桃」) はバイグラムにならないため、1 文字ずつの
+    サブフィールド (.unigram) で探す (PostgreSQL の検索の 'x':* と同じく、その文字を含む)。
+    マッピングを変更した場合は reindex_products --reset でインデックスを作り直すこと。
+    """
+
+    # 検索するフィールドと重み
+    SEARCH_FIELDS = {"name": 3, "category": 2, "description": 1}
+
+    INDEX_SETTINGS = {
+        "settings": {
+            "analysis": {
+                "tokenizer": {
+                    "bigram": {
+                        "type": "ngram",
+                        "min_gram": 2,
+                        "max_gram": 2,
+                        "token_chars": ["letter", "digit"],
+                    },
+                    "unigram": {
+                        "type": "ngram",
+                        "min_gram": 1,
+                        "max_gram": 1,
+                        "token_chars": ["letter", "digit"],
+                    },
+                },
+                "analyzer": {
+                    "bigram": {
+                        "type": "custom",
+                        "tokenizer": "bigram",
+                        "filter": ["cjk_width", "lowercase"],
+                    },
+                    "unigram": {
+                        "type": "custom",
+                        "tokenizer": "unigram",
+                        "filter": ["cjk_width", "lowercase"],
+                    },
+                },
+                "normalizer": {
+                    "lowercase": {"type": "custom", "filter": ["lowercase"]}
+                },
+            }
+        },
+        "mappings": {
+            "properties": {
+                "id": {"type": "long"},
+                "name": {
+                    "type": "text",
+                    "analyzer": "bigram",
+                    "fields": {"unigram": {"type": "text", "analyzer": "unigram"}},
+                },
+                "description": {
+                    "type": "text",
+                    "analyzer": "bigram",
+                    "fields": {"unigram": {"type": "text", "analyzer": "unigram"}},
+                },
+                "category": {
+                    "type": "text",
+                    "analyzer": "bigram",
+                    "fields": {
+                        "keyword": {"type": "keyword", "normalizer": "lowercase"},
+                        "raw": {"type": "keyword"},
+                        "unigram": {"type": "text", "analyzer": "unigram"},
+                    },
+                },
+                "producer_username": {"type": "keyword", "normalizer": "lowercase"},
+                "producer_prefecture": {"type": "keyword"},
+                "price": {"type": "long"},
+                "unit": {"type": "keyword"},
+                "cultivation_method": {"type": "keyword"},
+                "status": {"type": "keyword"},
+                "created_at": {"type": "date"},
+                "updated_at": {"type": "date"},
+            }
+        },
+    }
+
+    FACET_AGGREGATIONS = {
+        "category": {"terms": {"field": "category.raw", "size": 100}},
+        "cultivation_method": {"terms": {"field": "cultivation_method", "size": 20}},
+        "producer_prefecture": {"terms": {"field": "producer_prefecture", "size": 50}},
+        "price": {
+            "range": {
+                "field": "price",
+                "ranges": [
+                    {
+                        **({"from": low} if low is not None else {}),
+                        **({"to": high} if high is not None else {}),
+                    }
+                    for low, high in PRICE_RANGES
+                ],
+            }
+        },
+    }
+
+    def __init__(
+        self, url="http://localhost:9200", index="products", timeout=2.0, **options
+    ):
+        super().__init__(**options)
+        self.url = url.rstrip("/")
+        self.index = index
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None, content_type="application/json"):
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.url}/{path}",
+            data=body,
+            method=method,
+            headers={"Content-Type": content_type},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            if method == "DELETE" and e.code == 404:
+                return {}
+            raise SearchBackendError(
+                f"{method} {path} failed: {e.code} {e.read()[:500]!r}"
+            ) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise SearchBackendError(f"{method} {path} failed: {e}") from e
+
+    def index_documents(self, documents):
+        lines = []
+        for document in documents:
+            lines.append(
+                json.dumps({"index": {"_index": self.index, "_id": document["id"]}})
+            )
+            lines.append(json.dumps(document, ensure_ascii=False))
+        if not lines:
+            return
+        self._bulk(lines)
+
+    def delete_documents(self, ids):
+        lines = [
+            json.dumps({"delete": {"_index": self.index, "_id": pk}}) for pk in ids
+        ]
+        if lines:
+            self._bulk(lines)
+
+    def _bulk(self, lines):
+        body = ("\n".join(lines) + "\n").encode("utf-8")
+        result = self._request("POST", "_bulk", body, "application/x-ndjson")
+        if result.get("errors"):
+            failed = [
+                item
+                for item in result.get("items", [])
+                for action in item.values()
+                if action.get("error") and action.get("status") != 404
+            ]
+            if failed:
+                raise SearchBackendError(f"bulk request had errors: {failed[:3]}")
+
+    def reset(self):
+        self._request("DELETE", self.index)
+        self._request("PUT", self.index, self.INDEX_SETTINGS)
+
+    def search(self, text, filters=None, limit=1000, facets=True):
+        filters = filters or {}
+        body = {
+            "size": limit,
+            "_source": False,
+            "track_total_hits": True,
+            "query": {
+                "bool": {
+                    "must": self._match_clauses(text),
+                    "filter": self._filter_clauses(filters),
+                }
+            },
+            "sort": ["_score", {"created_at": "desc"}],
+        }
+        if facets:
+            body["aggs"] = self.FACET_AGGREGATIONS
+        result = self._request("POST", f"{self.index}/_search", body)
+        hits = result.get("hits", {})
+        return SearchResult(
+            ids=[int(hit["_id"]) for hit in hits.get("hits", [])],
+            total=hits.get("total", {}).get("value", 0),
+            facets=self._facets(result.get("aggregations", {})) if facets else {},
+        )
+
+    @classmethod
+    def _match_clauses(cls, text):
+        """
+        検索語を PostgreSQL の検索 (search.build_search_query) と同じく英数字・かな・漢字の
+        連続部分に分け、それぞれを含むこと (AND) を条件にする
+        """
+        clauses = []
+        for run in _runs(text):
+            suffix = ".unigram" if len(run) == 1 else ""
+            fields = [
+                f"{name}{suffix}^{boost}" for name, boost in cls.SEARCH_FIELDS.items()
+            ]
+            clauses.append(
+                {"multi_match": {"query": run, "type": "phrase", "fields": fields}}
+            )
+        return clauses
+
+    @staticmethod
+    def _facets(aggregations):
+        facets = {
+            name: {
+                bucket["key"]: bucket["doc_count"]
+                for bucket in aggregations.get(name, {}).get("buckets", [])
+            }
+            for name in ("category", "cultivation_method", "producer_prefecture")
+        }
+        facets["price"] = [
+            {
+                "min": int(bucket["from"]) if "from" in bucket else None,
+                "max": int(bucket["to"]) if "to" in bucket else None,
+                "count": bucket["doc_count"],
+            }
+            for bucket in aggregations.get("price", {}).get("buckets", [])
+        ]
+        return facets
+
+    @staticmethod
+    def _filter_clauses(filters):
+        clauses = []
+        if filters.get("status"):
+            clauses.append({"term": {"status": filters["status"]}})
+        if filters.get("category"):
+            clauses.append({"term": {"category.keyword": filters["category"]}})
+        if filters.get("cultivation_method"):
+            clauses.append(
+                {"terms": {"cultivation_method": list(filters["cultivation_method"])}}
+            )
+        price_range = {}
+        if filters.get("min_price") is not None:
+            price_range["gte"] = float(filters["min_price"])
+        if filters.get("max_price") is not None:
+            price_range["lte"] = float(filters["max_price"])
+        if price_range:
+            clauses.append({"range": {"price": price_range}})
+        if filters.get("producer_username"):
+            clauses.append(
+                {"term": {"producer_username": filters["producer_username"]}}
+            )
+        return clauses
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """設定された検索バックエンドを返す (未設定なら None)"""
+    global _backend
+    config = getattr(settings, "PRODUCT_SEARCH_BACKEND", None)
+    if not config:
+        return None
+    with _backend_lock:
+        if _backend is None or _backend.options.get("_config") is not config:
+            backend_class = import_string(config["BACKEND"])
+            _backend = backend_class(_config=config, **config.get("OPTIONS", {}))
+        return _backend
@@ -1,8 +1,34 @@
+from django.db.models import QuerySet  # type: ignore
+from django.utils.encoding import force_str  # type: ignore
 from rest_framework import serializers
 from .models import Product
 from app.accounts.serializers import UserSerializer # 生産者情報を表示するため
+from app.core.serializers import ImageVariantsField
 # from apps.accounts.serializers import UserSerializer # 不要になるかも
 
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    商品一覧 (many=True) 用の高速パス。
+    values() の行 (dict) を受け取った場合、インスタンスごとのフィールドの bind や
+    属性の辿り・get_FOO_display を行わず、事前に組み立てた変換関数で dict にする。
+    出力は ProductSerializer で 1 件ずつ変換した場合と同一 (JSON もバイト単位で一致)。
+    モデルインスタンスを受け取った場合は通常どおり変換する。
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, QuerySet) and data._fields is None:
+            data = self.child.list_values(data)  # モデルのクエリセットは必要な列だけ取得
+        rows = data.all() if isinstance(data, QuerySet) else data
+        rows = list(rows)
+        if not rows or not isinstance(rows[0], dict):
+            return super().to_representation(rows)
+        converters = self.child.row_converters()
+        return [
+            {name: convert(row) for name, convert in converters}
+            for row in rows
+        ]
+
+
 class ProductSerializer(serializers.ModelSerializer):
     producer_username = serializers.CharField(source='producer.username', read_only=True) # 読み取り時にユーザー名を表示
 
@@ -10,6 +36,8 @@ class ProductSerializer(serializers.ModelSerializer):
     unit_display = serializers.CharField(source='get_unit_display', read_only=True)
     cultivation_method_display = serializers.CharField(source='get_cultivation_method_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    # 派生画像 (サムネイル・カード・詳細) の URL。生成前は None
+    image_urls = ImageVariantsField()
 
     class Meta:
         model = Product
@@ -24,6 +52,7 @@ class ProductSerializer(serializers.ModelSerializer):
             'unit',
             'unit_display',
             'image',
+            'image_urls',
             'standard',
             'cultivation_method',
             'cultivation_method_display',
@@ -43,4 +72,101 @@ class ProductSerializer(serializers.ModelSerializer):
             'unit_display',
             'cultivation_method_display',
             'status_display',
-        ]
\ No newline at end of file
+            'image_urls',
+        ]
+        list_serializer_class = ProductListSerializer
+
+    @staticmethod
+    def _choice_field_name(source):
+        # 'get_unit_display' -> 'unit'
+        if source.startswith('get_') and source.endswith('_display'):
+            return source[len('get_'):-len('_display')]
+        return None
+
+    def readable_fields(self):
+        return [field for field in self.fields.values() if not field.write_only]
+
+    def list_columns(self):
+        """一覧の変換に必要な values() の列 (リレーションは 'producer__username' の形)"""
+        columns = []
+        for field in self.readable_fields():
+            choice_field = self._choice_field_name(field.source)
+            column = choice_field or field.source.replace('.', '__')
+            if column not in columns:
+                columns.append(column)
+        return columns
+
+    def list_values(self, queryset):
+        """
+        一覧用の values() クエリセット。
+        並び替えやキーセットページングで参照するアノテーション (search_rank など) も含める。
+        """
+        return queryset.values(*self.list_columns(), *queryset.query.annotations)
+
+    def row_converters(self):
+        """[(出力キー, values() の行 -> 値 の関数)] をフィールドの定義順に返す"""
+        converters = []
+        for field in self.readable_fields():
+            choice_field = self._choice_field_name(field.source)
+            if choice_field:
+                converters.append((field.field_name, self._display_converter(choice_field)))
+            else:
+                converters.append(
+                    (field.field_name, self._value_converter(field, field.source.replace('.', '__')))
+                )
+        return converters
+
+    @staticmethod
+    def _display_converter(field_name):
+        # Model.get_FOO_display と同じく、選択肢にない値はそのまま返す
+        labels = {
+            value: force_str(label, strings_only=True)
+            for value, label in Product._meta.get_field(field_name).flatchoices
+        }
+
+        def convert(row):
+            value = row[field_name]
+            if value is None:
+                return None
+            return labels.get(value, value)
+
+        return convert
+
+    @staticmethod
+    def _value_converter(field, column):
+        if isinstance(field, (serializers.CharField, serializers.IntegerField)):
+            # DB から取得した str / int はそのまま (to_representation は str() / int() のみ)
+            return lambda row: row[column]
+        if isinstance(field, serializers.FileField):
+            model_field = Product._meta.get_field(column)
+
+            def convert(row):
+                # FieldFile を組み立てて URL の生成はフィールドに任せる
+                name = row[column]
+                if not name:
+                    return None
+                return field.to_representation(model_field.attr_class(None, model_field, name))
+
+            return convert
+
+        def convert(row):
+            value = row[column]
+            return None if value is None else field.to_representation(value)
+
+        return convert
+
+
+class ProductBulkStatusSerializer(serializers.Serializer):
+    """複数の商品のステータス変更 (ProductViewSet.bulk_change_status) の入力"""
+
+    MAX_IDS = 1000
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS,
+    )
+    status = serializers.ChoiceField(choices=Product.STATUS_CHOICES)
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))  # 重複を除く (順序は保つ)
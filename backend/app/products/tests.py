@@ -1,3 +1,1145 @@
-from django.test import TestCase
+import datetime
+import io
+import posixpath
+import shutil
+from decimal import Decimal
+import tempfile
+import time
+from unittest import mock
+from urllib.parse import quote
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.files.base import ContentFile  # type: ignore
+from django.core.files.storage import default_storage  # type: ignore
+from django.db import connection  # type: ignore
+from django.test import TestCase  # type: ignore
+from django.test.utils import override_settings  # type: ignore
+from django.utils import timezone  # type: ignore
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from PIL import Image
+from rest_framework.test import APIClient, APIRequestFactory
+
+from app.accounts.authentication import RoleClaimsRefreshToken
+from app.core.images import build_variants_safely, pending_rows, save_variants
+from app.profiles.async_views import ProfileDetailAsyncView, ProfileListAsyncView
+from app.profiles.models import Profile
+from app.profiles.views import ProfileViewSet
+
+from .async_views import ProductDetailAsyncView, ProductListAsyncView
+from .cache import get_cache, get_generation, get_stats, reset_stats
+from .models import Product
+from .search import build_search_query
+from .search_backends import (
+    ElasticsearchBackend,
+    InMemorySearchBackend,
+    get_search_backend,
+    product_document,
+)
+from .serializers import ProductSerializer
+from .transfer import ProductImporter, export_queryset, read_rows, write_rows
+from .views import ProductViewSet
+
+User = get_user_model()
+
+
+class ProductListIndexPlanTests(TestCase):
+    """
+    商品一覧の各フィルタ条件が Seq Scan ではなくインデックスで実行されることを
+    EXPLAIN で確認する回帰テスト。
+    テストデータは少量のため enable_seqscan = off にして、使えるインデックスが
+    あるかどうか (= プランナが選べるか) を検証する。
+    """
+
+    CASES = [
+        "",
+        "?ordering=price",
+        "?ordering=-updated_at",
+        "?min_price=500&max_price=3000",
+        "?min_price=500&ordering=price",
+        "?category=野菜",
+        "?category=野菜&ordering=price",
+        "?cultivation_method=organic&cultivation_method=natural",
+        "?producer_username=farmer_0",
+        "?search=商品",
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        producers = [User.objects.create(username=f"farmer_{i}") for i in range(5)]
+        methods = [choice for choice, _ in Product.CULTIVATION_CHOICES]
+        statuses = [choice for choice, _ in Product.STATUS_CHOICES]
+        Product.objects.bulk_create(
+            Product(
+                producer=producers[i % len(producers)],
+                name=f"商品{i}",
+                description="説明",
+                category=["野菜", "果物", "米"][i % 3],
+                price=100 * (i % 50),
+                quantity=10,
+                unit="kg",
+                cultivation_method=methods[i % len(methods)],
+                status=statuses[i % len(statuses)],
+            )
+            for i in range(2000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Product._meta.db_table}")
+
+    def list_queryset(self, query_string):
+        # ProductViewSet.list と同じ get_queryset + filter_backends を通す
+        view = ProductViewSet(action="list", format_kwarg=None)
+        view.request = Request(APIRequestFactory().get(f"/api/products/{query_string}"))
+        # 1 ページ目 (12 件) の取得クエリ
+        return view.filter_queryset(view.get_queryset())[:12]
+
+    def test_list_filters_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        # 主キーの全件インデックススキャンではなく、Meta.indexes のいずれかを使うこと
+        index_names = {index.name for index in Product._meta.indexes}
+        for query_string in self.CASES:
+            with self.subTest(query_string=query_string or "(default)"):
+                plan = self.list_queryset(query_string).explain()
+                self.assertNotIn(f"Seq Scan on {Product._meta.db_table}", plan)
+                self.assertTrue(
+                    any(name in plan for name in index_names),
+                    f"no product index used:\n{plan}",
+                )
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class AsyncCatalogViewTests(TestCase):
+    """非同期ビュー (async_views.py) が同期の ViewSet と同じレスポンスを返すこと"""
+
+    LIST_CASES = [
+        "",
+        "?page=2&page_size=5",
+        "?page=99",
+        "?pagination=cursor&page_size=3&ordering=price",
+        "?cursor=invalid",
+        "?category=野菜&min_price=200&ordering=-price",
+        "?search=トマト",
+        "?owner=me",
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producer = User.objects.create(
+            username="async_farmer", email="f@example.com"
+        )
+        Profile.objects.create(user=cls.producer, is_producer=True, farm_name="農園")
+        Profile.objects.create(user=User.objects.create(username="buyer"))
+        Product.objects.bulk_create(
+            Product(
+                producer=cls.producer,
+                name=f"トマト{i}" if i % 2 else f"りんご{i}",
+                description="説明",
+                category=["野菜", "果物"][i % 2],
+                price=100 * i,
+                quantity=10,
+                unit="kg",
+                image=f"products/{i}.jpg" if i % 3 else None,
+                status=Product.STATUS_ACTIVE if i % 4 else Product.STATUS_DRAFT,
+            )
+            for i in range(1, 16)
+        )
+        # bulk_create は save() を通らないため検索ベクトルをここで設定する
+        Product.objects.bulk_update(
+            [
+                Product(pk=product.pk, search_vector=product.get_search_vector())
+                for product in Product.objects.all()
+            ],
+            ["search_vector"],
+        )
+        cls.token = str(RoleClaimsRefreshToken.for_user(cls.producer).access_token)
+
+    def assertSameResponse(self, sync_view, async_view, path, authenticated, **kwargs):
+        factory = APIRequestFactory()
+        headers = (
+            {"HTTP_AUTHORIZATION": f"Bearer {self.token}"} if authenticated else {}
+        )
+        get_cache().clear()
+        expected = sync_view(factory.get(path, **headers), **kwargs).render()
+        get_cache().clear()
+        actual = async_to_sync(async_view)(factory.get(path, **headers), **kwargs)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+
+    def test_product_list(self):
+        sync_view = ProductViewSet.as_view({"get": "list"}, basename="product")
+        async_view = ProductListAsyncView.as_view()
+        for query_string in self.LIST_CASES:
+            for authenticated in (False, True):
+                with self.subTest(query_string=query_string, auth=authenticated):
+                    path = "/api/products/" + quote(query_string, safe="?=&")
+                    self.assertSameResponse(sync_view, async_view, path, authenticated)
+
+    def test_product_detail(self):
+        sync_view = ProductViewSet.as_view({"get": "retrieve"}, basename="product")
+        async_view = ProductDetailAsyncView.as_view()
+        for pk in [Product.objects.order_by("pk").first().pk, 0]:
+            with self.subTest(pk=pk):
+                self.assertSameResponse(
+                    sync_view, async_view, f"/api/products/{pk}/", False, pk=pk
+                )
+
+    def test_profiles(self):
+        self.assertSameResponse(
+            ProfileViewSet.as_view({"get": "list"}, basename="profile-list"),
+            ProfileListAsyncView.as_view(),
+            "/api/profiles/",
+            False,
+        )
+        detail = ProfileViewSet.as_view({"get": "retrieve"}, basename="profile-list")
+        for username in ["async_farmer", "buyer"]:
+            with self.subTest(username=username):
+                self.assertSameResponse(
+                    detail,
+                    ProfileDetailAsyncView.as_view(),
+                    f"/api/profiles/{username}/",
+                    False,
+                    username=username,
+                )
+
+    def test_invalid_token_is_rejected(self):
+        response = async_to_sync(ProductListAsyncView.as_view())(
+            APIRequestFactory().get(
+                "/api/products/", HTTP_AUTHORIZATION="Bearer invalid"
+            )
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+
+class ImageVariantsTests(TestCase):
+    """派生画像の生成 (app/core/images.py) と image_urls の出力"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # 横長の画像 + EXIF (右に 90 度回転して表示する指定とカメラ名)
+        image = Image.new("RGB", (2000, 1000), (200, 30, 30))
+        exif = image.getexif()
+        exif[0x0112] = 6
+        exif[0x010F] = "camera"
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", exif=exif)
+
+        producer = User.objects.create_user(username="image_producer", password="pw")
+        self.product = Product(
+            producer=producer,
+            name="トマト",
+            description="説明",
+            price=100,
+            quantity=1,
+            unit="kg",
+            status=Product.STATUS_ACTIVE,
+        )
+        self.product.image.save("photo.jpg", ContentFile(buffer.getvalue()), save=False)
+        self.product.save()
+
+    def process_pending(self):
+        for pk, name in pending_rows(Product, 10):
+            save_variants(Product, pk, name, build_variants_safely(name))
+        self.product.refresh_from_db()
+
+    def test_variants_and_normalized_original(self):
+        request = Request(APIRequestFactory().get("/", HTTP_HOST="testserver"))
+        self.assertIsNone(
+            ProductSerializer(self.product, context={"request": request}).data[
+                "image_urls"
+            ]
+        )
+
+        original = self.product.image.name
+        self.process_pending()
+        self.assertEqual(pending_rows(Product, 10), [])
+        self.assertNotEqual(self.product.image.name, original)
+        self.assertFalse(default_storage.exists(original))
+        with default_storage.open(self.product.image.name) as f:
+            normalized = Image.open(f)
+            self.assertEqual(normalized.size, (1000, 2000))  # 向きを画素に反映
+            self.assertEqual(dict(normalized.getexif()), {})  # メタデータは除去
+
+        variants = self.product.image_variants
+        self.assertEqual(
+            (variants["card"]["width"], variants["card"]["height"]), (240, 480)
+        )
+        with default_storage.open(variants["thumbnail"]["webp"]) as f:
+            self.assertEqual(Image.open(f).format, "WEBP")
+
+        # 一覧の高速パス (values()) と 1 件ずつの変換で同じ URL を返す
+        data = ProductSerializer(self.product, context={"request": request}).data
+        rows = ProductSerializer(
+            Product.objects.filter(pk=self.product.pk),
+            many=True,
+            context={"request": request},
+        ).data
+        self.assertEqual(rows[0]["image_urls"], data["image_urls"])
+        self.assertEqual(
+            data["image_urls"]["card"]["webp"],
+            f"http://testserver/media/{variants['card']['webp']}",
+        )
+
+    def test_clean_original_is_kept_as_uploaded(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 600), (30, 120, 30)).save(buffer, "JPEG")
+        self.product.image.save("clean.jpg", ContentFile(buffer.getvalue()), save=False)
+        self.product.image_variants = {}
+        self.product.save()
+        original = self.product.image.name
+
+        self.process_pending()
+        # 向きの指定もメタデータもないため、保存し直さない (名前も内容も同じ)
+        self.assertEqual(self.product.image.name, original)
+        self.assertEqual(self.product.image_variants["source"], original)
+        with default_storage.open(original) as f:
+            self.assertEqual(f.read(), buffer.getvalue())
+        self.assertEqual(
+            sorted(default_storage.listdir(posixpath.dirname(original))[1]),
+            ["clean.jpg", "photo.jpg"],
+        )
+
+    def test_replacing_image_regenerates_variants(self):
+        self.process_pending()
+        old_variants = self.product.image_variants
+
+        self.product.image.save("new.png", ContentFile(b""), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save(update_fields=["image"])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_variants, {})
+        self.assertFalse(default_storage.exists(old_variants["card"]["webp"]))
+
+        # 読めない画像はエラーを記録して再処理しない
+        self.process_pending()
+        self.assertIn("error", self.product.image_variants)
+        self.assertEqual(pending_rows(Product, 10), [])
+
+
+class ProductImportExportTests(TestCase):
+    """import_products / export_products (app/products/transfer.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producer = User.objects.create_user(username="import_farm", password="pw")
+
+    def import_csv(self, text, **kwargs):
+        return ProductImporter(chunk_size=2, **kwargs).run(
+            read_rows(io.StringIO(text), "csv")
+        )
+
+    def test_round_trip_and_upsert(self):
+        header = "id,producer_username,name,description,price,quantity,unit,status\n"
+        result = self.import_csv(
+            header
+            + "10,import_farm,完熟トマト,説明,500,1,kg,active\n"
+            + ",import_farm,レタス,説明,200,2,ko,draft\n"
+            + ",unknown_farm,なす,説明,100,1,kg,active\n"
+            + ",import_farm,きゅうり,説明,abc,1,kg,active\n"
+        )
+        self.assertEqual((result.imported, result.skipped), (2, 2))
+        self.assertEqual([number for number, _ in result.errors], [4, 5])
+
+        # search_vector も save() と同じ値で登録される
+        tomato = Product.objects.get(pk=10)
+        self.assertTrue(
+            Product.objects.filter(
+                pk=10, search_vector=build_search_query("トマト")
+            ).exists()
+        )
+
+        # 書き出した CSV を読み込むと id が同じ商品を上書きする
+        buffer = io.StringIO()
+        self.assertEqual(write_rows(buffer, "csv", export_queryset()), 2)
+        exported = buffer.getvalue().replace("完熟トマト", "桃太郎トマト")
+        result = self.import_csv(exported)
+        self.assertEqual((result.imported, result.skipped), (2, 0))
+        self.assertEqual(Product.objects.count(), 2)
+        tomato.refresh_from_db()
+        self.assertEqual(tomato.name, "桃太郎トマト")
+
+        # id を指定して登録した後も、新規の商品は既存の id と重ならない
+        created = Product.objects.create(
+            producer=self.producer,
+            name="白菜",
+            description="説明",
+            price=300,
+            quantity=1,
+            unit="ko",
+        )
+        self.assertGreater(created.pk, 10)
+
+    def test_excluded_search_fields_keep_the_search_vector(self):
+        header = "id,producer_username,name,description,price,quantity,unit,status\n"
+        self.import_csv(header + "10,import_farm,トマト,甘いフルーツ,500,1,kg,active\n")
+        self.import_csv(
+            header
+            + "10,import_farm,トマト大玉,,450,1,kg,active\n"
+            + "11,import_farm,レタス,,200,1,ko,active\n",
+            exclude=["description"],
+        )
+        tomato = Product.objects.get(pk=10)
+        self.assertEqual(
+            (tomato.name, tomato.description), ("トマト大玉", "甘いフルーツ")
+        )
+        # 保存済みの説明と、取り込んだ商品名の両方で検索できる
+        for text in ("フルーツ", "大玉"):
+            with self.subTest(text=text):
+                self.assertEqual(
+                    list(
+                        Product.objects.filter(
+                            search_vector=build_search_query(text)
+                        ).values_list("pk", flat=True)
+                    ),
+                    [10],
+                )
+        self.assertEqual(Product.objects.get(pk=11).description, "")
+
+
+class InventoryUploadTests(TestCase):
+    """シートによる在庫の一括更新 (inventory-upload, app/products/inventory.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producer = User.objects.create_user(username="sheet_farm", password="pw")
+        other = User.objects.create_user(username="other_farm", password="pw")
+        cls.products = Product.objects.bulk_create(
+            Product(
+                producer=producer,
+                name=name,
+                description="説明",
+                price=100,
+                quantity=1,
+                unit="kg",
+                status=Product.STATUS_ACTIVE,
+            )
+            for producer, name in [
+                (cls.producer, "トマト"),
+                (cls.producer, "なす"),
+                (other, "きゅうり"),
+            ]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def upload(self, name, content, query=""):
+        upload = ContentFile(content, name=name)
+        return self.client.post(
+            f"/api/products/inventory-upload/{query}", {"file": upload}
+        )
+
+    def test_xlsx_updates_rows_in_one_go(self):
+        from openpyxl import Workbook
+
+        tomato, eggplant, _ = self.products
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["id", "価格 (円)", "数量", "単位", "ステータス"])
+        sheet.append([tomato.pk, 250, 3.5, "袋", "販売停止"])
+        sheet.append([eggplant.pk, 100, None, "kg", None])  # 変更なし
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        response = self.upload("inventory.xlsx", buffer.getvalue())
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [row["result"] for row in response.data["rows"]], ["updated", "unchanged"]
+        )
+        tomato.refresh_from_db()
+        self.assertEqual(
+            (tomato.price, tomato.quantity, tomato.unit, tomato.status),
+            (250, Decimal("3.5"), "fukuro", Product.STATUS_INACTIVE),
+        )
+        self.assertGreater(tomato.updated_at, eggplant.updated_at)
+
+    def test_errors_reject_the_whole_sheet(self):
+        tomato, eggplant, others = self.products
+        csv_text = (
+            "id,price,unit,cultivation_method\n"
+            f"{tomato.pk},300,kg,organic\n"
+            f"{eggplant.pk},abc,ton,\n"
+            f"{others.pk},300,kg,\n"
+        )
+        response = self.upload("inventory.csv", csv_text.encode())
+        self.assertEqual(response.status_code, 400)
+        rows = response.data["rows"]
+        self.assertEqual([row["result"] for row in rows], ["updated", "error", "error"])
+        self.assertEqual(set(rows[1]["errors"]), {"price", "unit"})
+        self.assertIn("id", rows[2]["errors"])  # 他の生産者の商品
+        self.assertFalse(response.data["applied"])
+        tomato.refresh_from_db()
+        self.assertEqual(tomato.price, 100)
+
+        # dry_run は検証だけ行う
+        response = self.upload(
+            "inventory.csv", f"id,price\n{tomato.pk},300\n".encode(), "?dry_run=true"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["applied"])
+        tomato.refresh_from_db()
+        self.assertEqual(tomato.price, 100)
+
+
+class BulkChangeStatusTests(TestCase):
+    """複数の商品のステータス変更 (bulk-change-status)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producer = User.objects.create_user(username="bulk_farm", password="pw")
+        other = User.objects.create_user(username="bulk_other", password="pw")
+        cls.products = Product.objects.bulk_create(
+            Product(
+                producer=producer,
+                name=f"商品{i}",
+                description="説明",
+                price=100,
+                quantity=1,
+                unit="kg",
+                status=product_status,
+            )
+            for i, (producer, product_status) in enumerate(
+                [
+                    (cls.producer, Product.STATUS_ACTIVE),
+                    (cls.producer, Product.STATUS_ACTIVE),
+                    (cls.producer, Product.STATUS_INACTIVE),
+                    (other, Product.STATUS_ACTIVE),
+                ]
+            )
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def post(self, ids, new_status=Product.STATUS_INACTIVE):
+        return self.client.post(
+            "/api/products/bulk-change-status/",
+            {"ids": ids, "status": new_status},
+            format="json",
+        )
+
+    def test_single_update_and_hooks(self):
+        first, second, inactive, _ = self.products
+        generation = get_generation()
+        # 所有者の確認 + UPDATE (+ SAVEPOINT) のクエリ数は件数によらない
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(4):
+            response = self.post([first.pk, second.pk, inactive.pk])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["updated"], [first.pk, second.pk])
+        self.assertEqual(response.data["unchanged"], [inactive.pk])
+        self.assertEqual(
+            Product.objects.filter(status=Product.STATUS_INACTIVE).count(), 3
+        )
+        self.assertNotEqual(get_generation(), generation)
+
+    def test_other_producers_products_are_rejected(self):
+        first, _, _, others = self.products
+        response = self.post([first.pk, others.pk])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["not_found"], [others.pk])
+        first.refresh_from_db()
+        self.assertEqual(first.status, Product.STATUS_ACTIVE)
+
+        self.assertEqual(self.post([first.pk], "unknown").status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+
+
+class ProductFacetsTests(TestCase):
+    """絞り込み用の件数 (facets)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        nagano = User.objects.create_user(username="facet_nagano", password="pw")
+        Profile.objects.create(user=nagano, location_prefecture="長野県")
+        unknown = User.objects.create_user(username="facet_unknown", password="pw")
+        products = [
+            Product(
+                producer=producer,
+                name=name,
+                description="説明",
+                category=category,
+                price=price,
+                quantity=1,
+                unit="kg",
+                cultivation_method=method,
+                status=product_status,
+            )
+            for producer, name, category, price, method, product_status in [
+                (nagano, "トマト", "野菜", 300, "organic", Product.STATUS_ACTIVE),
+                (nagano, "レタス", "野菜", 500, "organic", Product.STATUS_ACTIVE),
+                (nagano, "りんご", "果物", 1200, "", Product.STATUS_ACTIVE),
+                (unknown, "トマト", "野菜", 8000, "natural", Product.STATUS_ACTIVE),
+                (unknown, "みかん", "果物", 100, "natural", Product.STATUS_DRAFT),
+            ]
+        ]
+        for product in products:
+            product.search_vector = product.get_search_vector()
+        Product.objects.bulk_create(products)
+
+    def setUp(self):
+        get_cache().clear()
+
+    def get(self, **params):
+        response = self.client.get("/api/products/facets/", params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            data = self.get().data
+        self.assertEqual(data["total"], 4)  # 販売中のみ
+        self.assertEqual(
+            data["category"],
+            [{"value": "野菜", "count": 3}, {"value": "果物", "count": 1}],
+        )
+        self.assertEqual(
+            data["cultivation_method"],
+            [
+                {"value": "organic", "count": 2, "label": "有機栽培 (JAS認証なし)"},
+                {"value": None, "count": 1, "label": None},
+                {"value": "natural", "count": 1, "label": "自然栽培"},
+            ],
+        )
+        self.assertEqual([bucket["count"] for bucket in data["price"]], [1, 1, 1, 0, 1])
+        self.assertEqual(data["price"][0], {"min": None, "max": 500, "count": 1})
+        self.assertEqual(
+            data["producer_prefecture"],
+            [{"value": "長野県", "count": 3}, {"value": None, "count": 1}],
+        )
+
+    def test_same_filters_as_list_and_cache(self):
+        data = self.get(search="トマト", max_price=1000).data
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["category"], [{"value": "野菜", "count": 1}])
+
+        response = self.get(category="野菜", ordering="price")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["total"], 3)
+        # 並び順やパラメータの順序は結果に影響しないため、同じキャッシュを使う
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/api/products/facets/?ordering=-created_at&category=野菜&min_price="
+            )
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["total"], 3)
+
+    @override_settings(PRODUCT_FACETS_CACHE_TIMEOUT=60)
+    def test_cache_expires_by_timeout_not_by_product_save(self):
+        self.assertEqual(self.get()["X-Cache"], "MISS")
+        # 商品の保存では無効にならない (件数は有効期間内は古いまま)
+        generation = get_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(name="レタス").get().delete()
+        self.assertNotEqual(get_generation(), generation)
+        response = self.get()
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["total"], 4)
+
+        now = time.time()
+        with mock.patch("time.time", return_value=now + 61):
+            response = self.get()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["total"], 3)
+
+
+class ConditionalGetTests(TestCase):
+    """商品・プロフィールの条件付き GET (ETag / Last-Modified) と Cache-Control"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producer = User.objects.create_user(username="etag_farmer", password="pw")
+        Profile.objects.create(user=cls.producer, is_producer=True, farm_name="農園")
+        cls.product = Product.objects.create(
+            producer=cls.producer,
+            name="トマト",
+            description="説明",
+            price=300,
+            quantity=10,
+            unit="kg",
+            status=Product.STATUS_ACTIVE,
+        )
+        cls.token = str(RoleClaimsRefreshToken.for_user(cls.producer).access_token)
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_anonymous_list_and_cache_hit(self):
+        response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(
+            set(response["Cache-Control"].split(", ")),
+            {"public", "max-age=0", "s-maxage=60"},
+        )
+        self.assertLessEqual(
+            {"Accept", "Authorization"}, set(response["Vary"].split(", "))
+        )
+
+        # キャッシュに保存した検証子で、DB を読まずに 304 を返す
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("s-maxage=60", response["Cache-Control"])
+        response = self.client.get("/api/products/?ordering=price")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)  # クエリパラメータごとに異なる
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 350
+            self.product.save()
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_authenticated_list_and_detail(self):
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}
+        path = f"/api/products/{self.product.pk}/"
+        response = self.client.get(path, **auth)
+        self.assertEqual(
+            set(response["Cache-Control"].split(", ")), {"private", "no-cache"}
+        )
+        etag = response["ETag"]
+        with self.assertNumQueries(1):  # 商品の取得のみ (シリアライズしない)
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag, **auth)
+        self.assertEqual(response.status_code, 304)
+
+        # 未ログインとは検証子を共有しない
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get("/api/products/?owner=me", **auth)
+        with self.assertNumQueries(1):  # max(updated_at) と件数の集計のみ
+            response = self.client.get(
+                "/api/products/?owner=me", HTTP_IF_NONE_MATCH=response["ETag"], **auth
+            )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            "/api/products/?owner=me",
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+            **auth,
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_keyset_list_validators_come_from_the_page(self):
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}
+        path = "/api/products/?owner=me&pagination=cursor"
+        response = self.client.get(path, **auth)
+        etag = response["ETag"]
+        # 全体の集計 (max(updated_at)・件数) をせず、ページの取得のみ
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag, **auth)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn("COUNT(", queries.captured_queries[0]["sql"])
+
+        # ページの行が変わると検証子も変わる
+        Product.objects.filter(pk=self.product.pk).update(updated_at=timezone.now())
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag, **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        etag = response["ETag"]
+
+        view = async_to_sync(ProductListAsyncView.as_view())
+        request = APIRequestFactory().get(path, HTTP_IF_NONE_MATCH=etag, **auth)
+        with self.assertNumQueries(1):
+            response = view(request)
+        self.assertEqual(response.status_code, 304)
+
+    def test_async_views_and_profiles(self):
+        factory = APIRequestFactory()
+        path = f"/api/products/{self.product.pk}/"
+        view = async_to_sync(ProductDetailAsyncView.as_view())
+        for headers in ({}, {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}):
+            with self.subTest(authenticated=bool(headers)):
+                etag = self.client.get(path, **headers)["ETag"]
+                response = view(
+                    factory.get(path, HTTP_IF_NONE_MATCH=etag, **headers),
+                    pk=self.product.pk,
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get("/api/profiles/")
+        self.assertIn("s-maxage=60", response["Cache-Control"])
+        response = async_to_sync(ProfileListAsyncView.as_view())(
+            factory.get("/api/profiles/", HTTP_IF_NONE_MATCH=response["ETag"])
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+IN_MEMORY_SEARCH = {"BACKEND": "app.products.search_backends.InMemorySearchBackend"}
+
+
+class InMemorySearchBackendTests(TestCase):
+    """外部検索バックエンドの簡易実装 (InMemorySearchBackend)"""
+
+    def setUp(self):
+        self.backend = InMemorySearchBackend()
+        base = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        documents = [
+            # (id, 名前, カテゴリ, 説明, 価格, 栽培方法, 状態, 生産者)
+            (1, "トマトジュース", "加工品", "完熟", 800, "", "active", "Farm_A"),
+            (2, "ミニトマト", "野菜", "甘い", 400, "organic", "active", "farm_b"),
+            (
+                3,
+                "きゅうり",
+                "野菜",
+                "トマトと一緒に",
+                300,
+                "organic",
+                "active",
+                "farm_a",
+            ),
+            (4, "トマト", "野菜", "大玉", 600, "natural", "draft", "farm_b"),
+            (5, "りんご", "果物", "蜜入り", 1200, "", "active", "farm_a"),
+        ]
+        self.backend.index_documents(
+            {
+                "id": pk,
+                "name": name,
+                "category": category,
+                "description": description,
+                "price": price,
+                "cultivation_method": method,
+                "status": product_status,
+                "producer_username": producer,
+                "producer_prefecture": "長野県",
+                "created_at": (base + datetime.timedelta(days=pk)).isoformat(),
+            }
+            for pk, name, category, description, price, method, product_status, producer in documents
+        )
+
+    def test_ranking(self):
+        # 商品名 (3) > カテゴリ (2) > 説明 (1)。同じ点数は新しい順
+        result = self.backend.search("トマト")
+        self.assertEqual(result.ids, [4, 2, 1, 3])
+        self.assertEqual(result.total, 4)
+        # 複数の語は AND で、点数を合計する
+        self.assertEqual(self.backend.search("トマト 野菜").ids, [4, 2, 3])
+        # 全角・半角、大文字・小文字を区別しない
+        self.assertEqual(self.backend.search("ﾄﾏﾄｼﾞｭｰｽ").ids, [1])
+        # 1 文字の語も部分一致する
+        self.assertEqual(self.backend.search("蜜").ids, [5])
+
+    def test_filters(self):
+        for filters, expected in [
+            ({"status": "active"}, [2, 1, 3]),
+            ({"category": "野菜"}, [4, 2, 3]),
+            ({"cultivation_method": ["organic"]}, [2, 3]),
+            ({"min_price": 400, "max_price": 600}, [4, 2]),
+            ({"producer_username": "FARM_A"}, [1, 3]),
+            ({"status": "active", "category": "野菜", "max_price": 350}, [3]),
+        ]:
+            with self.subTest(filters=filters):
+                self.assertEqual(self.backend.search("トマト", filters).ids, expected)
+
+    def test_empty_query_limit_and_facets(self):
+        result = self.backend.search("", limit=2)
+        self.assertEqual(result.ids, [5, 4])  # 語がなければ全件を新しい順に
+        self.assertEqual(result.total, 5)
+        self.assertEqual(result.facets["category"], {"加工品": 1, "野菜": 3, "果物": 1})
+        self.assertEqual(
+            [bucket["count"] for bucket in result.facets["price"]], [2, 2, 1, 0, 0]
+        )
+        self.assertEqual(self.backend.search("", facets=False).facets, {})
+        self.assertEqual(self.backend.search("メロン").ids, [])
+
+        self.backend.delete_documents([5])
+        self.assertEqual(self.backend.search("").total, 4)
+
+
+@override_settings(PRODUCT_SEARCH_BACKEND=IN_MEMORY_SEARCH)
+class ProductSearchBackendTests(TestCase):
+    """?search= を外部検索バックエンドで検索する場合 (ProductSearchFilter)"""
+
+    def setUp(self):
+        get_cache().clear()
+        producer = User.objects.create_user(username="search_farm", password="pw")
+        self.producer = producer
+        # 下書き (公開前) の商品の方が関連度が高い (商品名に一致する)
+        rows = [
+            ("トマト", "下書き", Product.STATUS_DRAFT),
+            ("トマト大玉", "下書き", Product.STATUS_DRAFT),
+            ("ミニトマト", "公開中", Product.STATUS_ACTIVE),
+            ("サラダセット", "トマト入り", Product.STATUS_ACTIVE),
+            ("りんご", "公開中", Product.STATUS_ACTIVE),
+        ]
+        self.products = []
+        for name, description, product_status in rows:
+            product = Product(
+                producer=producer,
+                name=name,
+                description=description,
+                category="野菜",
+                price=300,
+                quantity=1,
+                unit="kg",
+                status=product_status,
+            )
+            product.search_vector = product.get_search_vector()
+            self.products.append(product)
+        Product.objects.bulk_create(self.products)
+        backend = get_search_backend()
+        backend.reset()
+        backend.index_documents(
+            product_document(product)
+            for product in Product.objects.select_related("producer")
+        )
+
+    def search_names(self, **params):
+        response = self.client.get("/api/products/", params)
+        self.assertEqual(response.status_code, 200)
+        return [product["name"] for product in response.data]
+
+    def test_backend_is_scoped_like_the_queryset(self):
+        with mock.patch.object(
+            InMemorySearchBackend, "search", wraps=get_search_backend().search
+        ) as search:
+            names = self.search_names(search="トマト")
+        self.assertEqual(names, ["ミニトマト", "サラダセット"])
+        self.assertEqual(search.call_args.args[1]["status"], Product.STATUS_ACTIVE)
+        self.assertIs(search.call_args.kwargs["facets"], False)
+
+        # 自分の商品一覧では下書きも対象 (商品名に一致する 3 件は新しい順)
+        token = RoleClaimsRefreshToken.for_user(self.producer).access_token
+        response = self.client.get(
+            "/api/products/",
+            {"search": "トマト", "owner": "me"},
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(
+            [product["name"] for product in response.data],
+            ["ミニトマト", "トマト大玉", "トマト", "サラダセット"],
+        )
+
+    def test_falls_back_to_postgres_when_hits_exceed_the_limit(self):
+        with mock.patch("app.products.search.EXTERNAL_SEARCH_LIMIT", 1):
+            names = self.search_names(search="トマト")
+        self.assertEqual(sorted(names), ["サラダセット", "ミニトマト"])
+
+    def test_symbols_only_match_nothing(self):
+        self.assertEqual(self.search_names(search="!!"), [])
+
+
+class ElasticsearchQueryTests(TestCase):
+    """Elasticsearch に送る検索条件 (サーバーには接続しない)"""
+
+    def test_single_character_terms_use_the_unigram_fields(self):
+        clauses = ElasticsearchBackend._match_clauses("桃  ﾄﾏﾄ・ジュース")
+        self.assertEqual(
+            [clause["multi_match"]["query"] for clause in clauses],
+            ["桃", "トマト", "ジュース"],
+        )
+        self.assertEqual(
+            clauses[0]["multi_match"]["fields"],
+            ["name.unigram^3", "category.unigram^2", "description.unigram^1"],
+        )
+        self.assertEqual(
+            clauses[1]["multi_match"]["fields"],
+            ["name^3", "category^2", "description^1"],
+        )
+        mappings = ElasticsearchBackend.INDEX_SETTINGS["mappings"]["properties"]
+        for name in ElasticsearchBackend.SEARCH_FIELDS:
+            self.assertEqual(mappings[name]["fields"]["unigram"]["analyzer"], "unigram")
+
+
+class AnonymousResponseCacheTests(TestCase):
+    """未ログインの商品一覧・詳細のレスポンスキャッシュ (app/products/cache.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producer = User.objects.create_user(username="cache_farm", password="pw")
+        cls.product = Product.objects.create(
+            producer=cls.producer,
+            name="トマト",
+            description="説明",
+            price=300,
+            quantity=10,
+            unit="kg",
+            status=Product.STATUS_ACTIVE,
+        )
+
+    def setUp(self):
+        get_cache().clear()
+        reset_stats()
+
+    def get(self, path, **extra):
+        response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_miss_and_stats(self):
+        for path in ["/api/products/", f"/api/products/{self.product.pk}/"]:
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)["X-Cache"], "MISS")
+                with self.assertNumQueries(0):
+                    response = self.get(path)
+                self.assertEqual(response["X-Cache"], "HIT")
+        # パラメータの順序と空の値は同じキーになる
+        self.assertEqual(self.get("/api/products/?page=1&category=")["X-Cache"], "MISS")
+        self.assertEqual(self.get("/api/products/?category=&page=1")["X-Cache"], "HIT")
+
+        stats = get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 3))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_save_and_delete_invalidate_after_commit(self):
+        path = f"/api/products/{self.product.pk}/"
+        self.get(path)
+        self.get("/api/products/")
+        generation = get_generation()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "ミニトマト"
+            self.product.save()
+        self.assertNotEqual(get_generation(), generation)
+        response = self.get(path)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["name"], "ミニトマト")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        response = self.get("/api/products/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data, [])
+
+    def test_commit_is_required(self):
+        self.get("/api/products/")
+        # コミット前 (on_commit が実行されない) は世代を進めない
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.product.save()
+        self.assertTrue(callbacks)
+        self.assertEqual(self.get("/api/products/")["X-Cache"], "HIT")
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.get("/api/products/")
+        token = RoleClaimsRefreshToken.for_user(self.producer).access_token
+        response = self.get("/api/products/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertNotIn("X-Cache", response)
+        stats = get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (0, 1))
+
+    def test_formats_are_cached_separately(self):
+        path = f"/api/products/{self.product.pk}/"
+        json_response = self.get(path, HTTP_ACCEPT="application/json")
+        self.assertEqual(json_response["X-Cache"], "MISS")
+        html_response = self.get(path, HTTP_ACCEPT="text/html")
+        self.assertEqual(html_response["X-Cache"], "MISS")
+        self.assertTrue(html_response["Content-Type"].startswith("text/html"))
+        self.assertNotEqual(html_response["ETag"], json_response["ETag"])
+
+        response = self.get(path, HTTP_ACCEPT="application/json")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response["ETag"], json_response["ETag"])
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ProductListSerializerTests(TestCase):
+    """一覧の高速パス (values() + ProductListSerializer) と ProductSerializer の出力の一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        with_profile = User.objects.create_user(username="list_farm", password="pw")
+        Profile.objects.create(
+            user=with_profile, is_producer=True, location_prefecture="長野県"
+        )
+        without_profile = User.objects.create_user(username="list_plain", password="pw")
+        variants = {
+            "source": "products/full.jpg",
+            **{
+                size: {
+                    "webp": f"products/variants/full_{size}.webp",
+                    "jpeg": f"products/variants/full_{size}.jpg",
+                    "width": 160,
+                    "height": 120,
+                }
+                for size in ("thumbnail", "card", "detail")
+            },
+        }
+        rows = [
+            # 画像・派生画像あり、任意項目もすべて入力
+            dict(
+                producer=with_profile,
+                image="products/full.jpg",
+                image_variants=variants,
+                standard="A品",
+                cultivation_method="organic_jas",
+                allergy_info="なし",
+                harvest_時期="7月",
+                shipping_available_時期="3日以内",
+                storage_method="冷蔵",
+                category="野菜",
+            ),
+            # 画像なし、NULL 可の項目は NULL、選択肢は空
+            dict(producer=without_profile, standard=None, allergy_info=None),
+            # 画像はあるが派生画像は生成待ち
+            dict(producer=with_profile, image="products/pending.jpg"),
+            # 派生画像の生成に失敗
+            dict(
+                producer=without_profile,
+                image="products/broken.jpg",
+                image_variants={"source": "products/broken.jpg", "error": "壊れた画像"},
+            ),
+            # 選択肢にない単位・状態 (get_FOO_display はそのまま返す)
+            dict(producer=with_profile, unit="dozen", status="legacy"),
+        ]
+        for index, fields in enumerate(rows):
+            Product.objects.create(
+                **{
+                    "name": f"商品{index}",
+                    "description": "説明",
+                    "price": Decimal("1200"),
+                    "quantity": Decimal("2.50"),
+                    "unit": "kg",
+                    "status": Product.STATUS_ACTIVE,
+                    **fields,
+                }
+            )
+
+    def test_fast_path_output_is_identical(self):
+        request = Request(APIRequestFactory().get("/api/products/"))
+        context = {"request": request}
+        queryset = Product.objects.order_by("pk")
+
+        instances = list(queryset.select_related("producer"))
+        expected = [
+            ProductSerializer(product, context=context).data for product in instances
+        ]
+        rows = list(ProductSerializer(context=context).list_values(queryset))
+        self.assertIsInstance(rows[0], dict)
+        fast = ProductSerializer(rows, many=True, context=context).data
+
+        self.assertEqual(len(fast), 5)
+        self.assertEqual(fast, expected)
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(fast), renderer.render(expected))
+        # 出力のキーの順序も同じ
+        self.assertEqual([list(row) for row in fast], [list(row) for row in expected])
+        self.assertIsNone(fast[1]["image"])
+        self.assertIsNone(fast[2]["image_urls"])
+        self.assertEqual(fast[4]["unit_display"], "dozen")
+
+    def test_list_endpoint_uses_the_same_output(self):
+        response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        request = Request(APIRequestFactory().get("/api/products/"))
+        expected = [
+            ProductSerializer(product, context={"request": request}).data
+            for product in Product.objects.filter(
+                status=Product.STATUS_ACTIVE
+            ).order_by("-created_at")
+        ]
+        self.assertEqual(response.content, JSONRenderer().render(expected))
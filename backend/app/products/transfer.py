@@ -0,0 +1,280 @@
+# backend/app/products/transfer.py
+"""
+商品データの一括インポート / エクスポート (import_products / export_products コマンド)
+
+形式は JSON Lines (1 行 1 商品)・CSV・JSON (配列)。
+JSON Lines と CSV は 1 行ずつ読み書きし、ファイル全体をメモリに載せない。
+JSON (配列) は json.load で読むため、app/initial_data/products.json のような小さなファイル向け。
+
+インポートは chunk_size 行ごとに 1 トランザクションで処理する。
+- 生産者 (producer_username) はチャンク内の未知のユーザー名だけを 1 クエリで解決する。
+- id がある行は INSERT … ON CONFLICT (id) DO UPDATE (bulk_create(update_conflicts=True))、
+  id がない行は INSERT で登録する。
+- bulk_create は save() やシグナルを通らないため、search_vector はここで計算し、
+  外部検索インデックスへの反映 (schedule_index) とレスポンスキャッシュの破棄は明示的に行う。
+  検索対象の列 (Product.SEARCH_FIELDS) を --exclude した場合、既存の商品はその列を
+  上書きしないため、search_vector も上書きせず、更新後に保存済みの値から作り直す。
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.exceptions import ValidationError  # type: ignore
+from django.core.management.color import no_style  # type: ignore
+from django.db import connection, transaction  # type: ignore
+
+from .cache import invalidate_product_cache
+from .indexing import schedule_index
+from .models import Product
+
+FORMATS = ("jsonl", "csv", "json")
+DEFAULT_CHUNK_SIZE = 2000
+
+# 入出力する列 (producer は producer_username で表す)
+TRANSFER_FIELDS = [
+    "id",
+    "producer_username",
+    "name",
+    "description",
+    "category",
+    "price",
+    "quantity",
+    "unit",
+    "image",
+    "standard",
+    "cultivation_method",
+    "harvest_時期",
+    "shipping_available_時期",
+    "allergy_info",
+    "storage_method",
+    "status",
+]
+# Product のフィールドとして値を取り込む列
+MODEL_FIELDS = [
+    name for name in TRANSFER_FIELDS if name not in ("id", "producer_username")
+]
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)  # [(行番号, メッセージ)]
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    for candidate in FORMATS:
+        if str(path).endswith(f".{candidate}"):
+            return candidate
+    raise ValueError(f"Cannot detect the format of {path}; use --format")
+
+
+def read_rows(file, fmt):
+    """(行番号, dict) を順に返す"""
+    if fmt == "jsonl":
+        for number, line in enumerate(file, start=1):
+            if line.strip():
+                yield number, json.loads(line)
+    elif fmt == "csv":
+        reader = csv.DictReader(file)
+        # 行番号はヘッダーを 1 行目として数える
+        for number, row in enumerate(reader, start=2):
+            yield number, row
+    else:
+        yield from enumerate(json.load(file), start=1)
+
+
+def _clean_value(model_field, value):
+    # CSV では空文字、JSON では null が「値なし」
+    if value in (None, ""):
+        if model_field.null:
+            return None
+        if model_field.has_default():
+            return model_field.get_default()
+        value = ""
+    if model_field.name == "image":
+        return value  # ストレージ上のファイル名をそのまま使う
+    try:
+        return model_field.clean(value, None)
+    except ValidationError as exc:
+        raise RowError(f"{model_field.name}: {' '.join(exc.messages)}")
+
+
+def build_product(row, fields, producer_ids):
+    """1 行分の Product (未保存) を作る。不正な行は RowError"""
+    username = row.get("producer_username")
+    if not username:
+        raise RowError("producer_username is missing")
+    producer_id = producer_ids.get(username)
+    if producer_id is None:
+        raise RowError(f"producer {username!r} does not exist")
+    product = Product(producer_id=producer_id)
+    raw_id = row.get("id")
+    if raw_id not in (None, ""):
+        try:
+            product.id = int(raw_id)
+        except (TypeError, ValueError):
+            raise RowError(f"id: invalid value {raw_id!r}")
+    for name in fields:
+        setattr(
+            product,
+            name,
+            _clean_value(Product._meta.get_field(name), row.get(name)),
+        )
+    product.search_vector = product.get_search_vector()
+    return product
+
+
+class ProductImporter:
+    """
+    行を chunk_size 件ずつ取り込む。
+
+        importer = ProductImporter(chunk_size=2000)
+        result = importer.run(read_rows(file, "jsonl"))
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, exclude=(), on_chunk=None):
+        self.chunk_size = chunk_size
+        self.fields = [name for name in MODEL_FIELDS if name not in set(exclude)]
+        # 検索対象の列を取り込まない場合、行の値だけでは既存の商品の search_vector を作れない
+        self.rebuild_search_vectors = not Product.SEARCH_FIELDS.issubset(self.fields)
+        self.on_chunk = on_chunk  # チャンクごとに (取り込み済み件数) で呼ぶ
+        self.producer_ids = {}  # username -> pk (見つからない場合は None)
+        self.explicit_ids = False
+
+    def run(self, rows):
+        result = ImportResult()
+        chunk = []
+        for number, row in rows:
+            chunk.append((number, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk, result)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk, result)
+        if self.explicit_ids:
+            self.reset_sequence()
+        invalidate_product_cache()
+        return result
+
+    def resolve_producers(self, usernames):
+        User = get_user_model()
+        missing = {name for name in usernames if name and name not in self.producer_ids}
+        if not missing:
+            return
+        found = dict(
+            User.objects.filter(username__in=missing).values_list("username", "pk")
+        )
+        for name in missing:
+            self.producer_ids[name] = found.get(name)
+
+    def _import_chunk(self, chunk, result):
+        self.resolve_producers({row.get("producer_username") for _, row in chunk})
+        with_id = {}  # id -> Product (同じ id が複数行あれば後の行を使う)
+        without_id = []
+        for number, row in chunk:
+            try:
+                product = build_product(row, self.fields, self.producer_ids)
+            except RowError as exc:
+                result.skipped += 1
+                result.errors.append((number, str(exc)))
+                continue
+            if product.id is None:
+                without_id.append(product)
+            else:
+                with_id[product.id] = product
+
+        update_fields = [*self.fields, "producer", "updated_at"]
+        if not self.rebuild_search_vectors:
+            update_fields.append("search_vector")
+        if "image" in self.fields:
+            update_fields.append("image_variants")  # 取り込んだ画像の派生画像を作り直す
+        with transaction.atomic():
+            saved = []
+            if with_id:
+                self.explicit_ids = True
+                saved += Product.objects.bulk_create(
+                    with_id.values(),
+                    update_conflicts=True,
+                    unique_fields=["id"],
+                    update_fields=update_fields,
+                )
+                if self.rebuild_search_vectors:
+                    self.refresh_search_vectors(with_id)
+            if without_id:
+                saved += Product.objects.bulk_create(without_id)
+            schedule_index([product.pk for product in saved])
+        result.imported += len(saved)
+        if self.on_chunk:
+            self.on_chunk(result.imported)
+
+    @staticmethod
+    def refresh_search_vectors(ids):
+        """保存済みの name / category / description から search_vector を作り直す"""
+        products = list(
+            Product.objects.filter(pk__in=ids).only("pk", *Product.SEARCH_FIELDS)
+        )
+        for product in products:
+            product.search_vector = product.get_search_vector()
+        Product.objects.bulk_update(products, ["search_vector"])
+
+    @staticmethod
+    def reset_sequence():
+        """id を指定して登録した後、id の採番を既存の最大値の次から始める"""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Product]):
+                cursor.execute(sql)
+
+
+def export_queryset(status=None):
+    queryset = Product.objects.order_by("pk")
+    if status:
+        queryset = queryset.filter(status__in=status)
+    return queryset.values_list(
+        *[
+            "producer__username" if name == "producer_username" else name
+            for name in TRANSFER_FIELDS
+        ]
+    )
+
+
+def _export_value(value):
+    # Decimal は API と同じく文字列で出力する
+    if value is None or isinstance(value, (str, int)):
+        return value
+    return str(value)
+
+
+def write_rows(file, fmt, rows):
+    """values_list の行を書き出し、件数を返す"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(file)
+        writer.writerow(TRANSFER_FIELDS)
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+            count += 1
+    elif fmt == "jsonl":
+        for row in rows:
+            record = dict(zip(TRANSFER_FIELDS, map(_export_value, row)))
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    else:
+        file.write("[\n")
+        for row in rows:
+            record = dict(zip(TRANSFER_FIELDS, map(_export_value, row)))
+            file.write(
+                ("  " if not count else ",\n  ")
+                + json.dumps(record, ensure_ascii=False)
+            )
+            count += 1
+        file.write("\n]\n")
+    return count
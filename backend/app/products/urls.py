@@ -1,6 +1,8 @@
 # backend/apps/products/urls.py
+from django.conf import settings # type: ignore
 from django.urls import path, include # type: ignore
 from rest_framework.routers import DefaultRouter
+from .async_views import ProductDetailAsyncView, ProductListAsyncView
 from .views import ProductViewSet
 
 app_name = "products"
@@ -23,3 +25,34 @@ urlpatterns = [
         "<int:pk>/change-status/", product_change_status, name="product-change-status"
     ),
 ]
+
+if settings.ASYNC_CATALOG_VIEWS:
+    # ASGI で動かす場合、一覧・詳細の GET は非同期ビューで処理する (app/products/async_views.py)
+    # 作成・更新・削除はルーターと同じ同期の ViewSet に渡す
+    urlpatterns = [
+        path(
+            "",
+            ProductListAsyncView.as_view(
+                fallback=ProductViewSet.as_view(
+                    {"get": "list", "post": "create"}, basename="product", detail=False
+                )
+            ),
+            name="product-list",
+        ),
+        path(
+            "<int:pk>/",
+            ProductDetailAsyncView.as_view(
+                fallback=ProductViewSet.as_view(
+                    {
+                        "get": "retrieve",
+                        "put": "update",
+                        "patch": "partial_update",
+                        "delete": "destroy",
+                    },
+                    basename="product",
+                    detail=True,
+                )
+            ),
+            name="product-detail",
+        ),
+    ] + urlpatterns
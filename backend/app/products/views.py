@@ -1,22 +1,44 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from django.conf import settings  # type: ignore
+from django.db import transaction  # type: ignore
+from django.utils import timezone  # type: ignore
 from .models import Product
-from .serializers import ProductSerializer
+from .serializers import ProductBulkStatusSerializer, ProductSerializer
 from django_filters.rest_framework import DjangoFilterBackend  # type: ignore
 import logging  # logging モジュールをインポート
+from .cache import (
+    AnonymousResponseCacheMixin,
+    cached_hit_response,
+    get_generation,
+    get_stats,
+    invalidate_product_cache,
+    lookup_response,
+    mark_miss,
+    store_response,
+)
+from .facets import facet_counts
 from .filters import ProductFilter
-from rest_framework.pagination import PageNumberPagination
+from .indexing import schedule_index
+from .inventory import SheetError, read_sheet, update_inventory
+from .search import ProductSearchFilter
+from app.core.conditional import ConditionalGetMixin
+from app.core.pagination import StandardResultsSetPagination
 
 logger = logging.getLogger(__name__)  # ロガーを取得
 
 
-class StandardResultsSetPagination(PageNumberPagination):  # クラスを定義
-    page_size = 12  # 1ページあたりのデフォルト件数
-    page_size_query_param = (
-        "page_size"  # クライアントが件数を指定できるようにするパラメータ名
-    )
-    max_page_size = 100  # 1ページあたりの最大件数
+class ProductPagination(StandardResultsSetPagination):
+    """
+    商品一覧のページネーション
+    - ?page= / ?page_size=: ページ番号方式 (count あり)
+    - ?pagination=cursor / ?cursor=: キーセット方式 (深いページでも一定速度)
+    - どちらも指定しない場合は従来どおり配列で返す (フロントエンドの互換性のため)
+    """
+
+    paginate_by_default = False
 
 
 class IsProducerOrReadOnly(permissions.BasePermission):
@@ -32,29 +54,36 @@ class IsProducerOrReadOnly(permissions.BasePermission):
 
         # 書き込みリクエストは、オブジェクトの producer とリクエストユーザーが一致する場合のみ許可
         # obj.producer が存在することを前提とする
-        return obj.producer == request.user
+        return obj.producer_id == request.user.pk
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(
+    AnonymousResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     """
     商品 API 用 ViewSet
     一覧取得 (list), 詳細取得 (retrieve), 作成 (create),
     更新 (update, partial_update), 削除 (destroy) を提供
+    未ログインの一覧・詳細はレスポンスをキャッシュする (app/products/cache.py)
+    一覧・詳細は条件付き GET (ETag / Last-Modified) に対応する (app/core/conditional.py)
     """
 
     queryset = Product.objects.all()  # 全ての商品を対象とし、権限でフィルタ
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsProducerOrReadOnly]
+    pagination_class = ProductPagination
+    public_max_age = settings.PUBLIC_CACHE_MAX_AGE
 
     # フィルタリング設定
+    # ProductSearchFilter は関連度順の並び替えを行うため OrderingFilter の後に置く
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        ProductSearchFilter,
     ]
     filterset_class = ProductFilter
 
-    search_fields = ["name", "description", "category"]  # キーワード検索対象
+    # キーワード検索対象は商品名・カテゴリ・説明 (Product.search_vector を参照)
     ordering_fields = ["price", "created_at", "updated_at"]  # 並び替え可能フィールド
     ordering = ["-created_at"]  # デフォルトの並び順
 
@@ -81,12 +110,37 @@ class ProductViewSet(viewsets.ModelViewSet):
             # if user.is_authenticated: return base_queryset.filter(producer=user)
             return base_queryset
         elif self.action == "list" and owner_param == "me" and user.is_authenticated:
-            # 自分の商品一覧
-            return base_queryset.filter(producer=user)
+            # 自分の商品一覧 (pk で絞り込み、トークンのクレームだけで判断する)
+            return base_queryset.filter(producer_id=user.pk)
         else:
             # デフォルトの商品一覧 (販売中)
             return base_queryset.filter(status=Product.STATUS_ACTIVE)
 
+    def search_backend_filters(self):
+        """
+        外部の検索インデックスに渡す、get_queryset と同じ絞り込み (app/products/search.py)。
+        渡さないと対象外の商品 (下書きなど) が上位を占め、対象の商品が検索結果から漏れる。
+        """
+        user = self.request.user
+        if (
+            self.action == "list"
+            and self.request.query_params.get("owner") == "me"
+            and user.is_authenticated
+        ):
+            return {"producer_username": user.username}
+        return {"status": Product.STATUS_ACTIVE}
+
+    def etag_parts(self):
+        # 在庫の引き当てなど updated_at を更新しない変更も、キャッシュの世代には反映される
+        return [get_generation()]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "list":
+            # 一覧は必要な列だけを values() で取得し、ProductListSerializer の高速パスで変換する
+            queryset = self.get_serializer().list_values(queryset)
+        return queryset
+
     def perform_create(self, serializer):
         if not self.request.user.is_authenticated:
             raise permissions.PermissionDenied("商品を作成するにはログインが必要です。")
@@ -171,6 +225,123 @@ class ProductViewSet(viewsets.ModelViewSet):
         # 例: 'draft' から 'active' にしか変更できない、など
 
         product.status = new_status
-        product.save()
+        # 保存時の post_save でキャッシュの世代が進む
+        product.save(update_fields=["status", "updated_at"])
         serializer = self.get_serializer(product)
         return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[permissions.IsAuthenticated],
+        url_path="bulk-change-status",
+    )
+    def bulk_change_status(self, request):
+        """
+        複数の商品のステータスをまとめて変更する
+            {"ids": [1, 2, 3], "status": "inactive"}
+        自分の商品でない (存在しない) ID が含まれる場合は何も変更せず 400 を返す。
+        変更は 1 回の UPDATE で行い、変更した ID と既にそのステータスだった ID を返す。
+        """
+        serializer = ProductBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+        new_status = serializer.validated_data["status"]
+
+        with transaction.atomic():
+            # 所有者の確認と現在のステータスの取得を 1 クエリで行う
+            current = dict(
+                Product.objects.select_for_update()
+                .filter(producer_id=request.user.pk, pk__in=ids)
+                .values_list("pk", "status")
+            )
+            not_found = [pk for pk in ids if pk not in current]
+            if not_found:
+                return Response(
+                    {
+                        "detail": "変更できない商品が含まれています。",
+                        "not_found": not_found,
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            updated = [pk for pk in ids if current[pk] != new_status]
+            if updated:
+                Product.objects.filter(
+                    producer_id=request.user.pk, pk__in=updated
+                ).update(status=new_status, updated_at=timezone.now())
+                # update() は post_save を送らないため、1 件ずつの変更 (change_status) の
+                # post_save と同じ処理を明示的に行う
+                invalidate_product_cache()
+                schedule_index(updated)
+        return Response(
+            {
+                "status": new_status,
+                "updated": updated,
+                "unchanged": [pk for pk in ids if current[pk] == new_status],
+            }
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[permissions.IsAuthenticated],
+        parser_classes=[MultiPartParser],
+        url_path="inventory-upload",
+    )
+    def inventory_upload(self, request):
+        """
+        自分の商品の価格・数量・ステータスなどをシート (.xlsx / CSV) で一括更新する
+        (app/products/inventory.py)。file にシートを指定する。
+        ?dry_run=true の場合は検証結果だけを返して変更しない。
+        エラーのある行が 1 つでもあれば何も変更せず 400 を返す (行ごとの結果は rows)。
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"detail": "file を指定してください。"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        dry_run = request.query_params.get("dry_run") in ("1", "true", "True")
+        try:
+            report = update_inventory(
+                request.user.pk, read_sheet(upload, upload.name), dry_run=dry_run
+            )
+        except SheetError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            report.as_dict(),
+            status=(
+                status.HTTP_400_BAD_REQUEST if report.has_errors else status.HTTP_200_OK
+            ),
+        )
+
+    # 件数に影響しない (一覧の並び順・ページング用の) パラメータ
+    FACET_IGNORED_PARAMS = ("ordering", "page", "page_size", "pagination", "cursor")
+
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request):
+        """
+        販売中の商品について、一覧と同じ絞り込み (?category= / ?search= など) の結果の
+        カテゴリ・栽培方法・価格帯・生産者の都道府県ごとの件数 (app/products/facets.py)。
+        ログインの有無によらず、正規化したクエリパラメータごとに
+        PRODUCT_FACETS_CACHE_TIMEOUT の間キャッシュする (商品の保存では無効にしない)。
+        """
+        key, entry = lookup_response(
+            request, "facets", self.FACET_IGNORED_PARAMS, versioned=False
+        )
+        if entry is not None:
+            return cached_hit_response(entry, self, request)
+        queryset = self.filter_queryset(self.get_queryset())
+        response = self.patch_response(request, Response(facet_counts(queryset)))
+        store_response(key, response, settings.PRODUCT_FACETS_CACHE_TIMEOUT)
+        return mark_miss(response)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[permissions.IsAdminUser],
+        url_path="cache-stats",
+    )
+    def cache_stats(self, request):
+        """匿名向けレスポンスキャッシュのヒット・ミス件数 (管理者のみ)"""
+        return Response(get_stats())
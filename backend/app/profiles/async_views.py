@@ -0,0 +1,16 @@
+# backend/app/profiles/async_views.py
+"""生産者プロフィール一覧・詳細の非同期ビュー (ASGI 用、app/core/async_views.py)"""
+
+from app.core.async_views import AsyncReadOnlyViewSetView
+
+from .views import ProfileViewSet
+
+
+class ProfileListAsyncView(AsyncReadOnlyViewSetView):
+    viewset_class = ProfileViewSet
+    action = "list"
+
+
+class ProfileDetailAsyncView(AsyncReadOnlyViewSetView):
+    viewset_class = ProfileViewSet
+    action = "retrieve"
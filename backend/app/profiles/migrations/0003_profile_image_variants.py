@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 20:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0002_profile_address1_profile_address2_profile_city_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                condition=models.Q(
+                    ("image_variants", {}),
+                    ("image__isnull", False),
+                    models.Q(("image", ""), _negated=True),
+                ),
+                fields=["id"],
+                name="profile_image_pending_idx",
+            ),
+        ),
+    ]
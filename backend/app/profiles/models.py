@@ -1,8 +1,7 @@
 from django.db import models  # type: ignore
 from django.conf import settings  # type: ignore
-from django.db.models.signals import post_save  # type: ignore # User作成時にProfileも自動作成するため
-from django.dispatch import receiver  # type: ignore # post_save シグナルを受け取るため
-from django.db import IntegrityError  # type: ignore
+
+from app.core.images import PENDING_IMAGE_VARIANTS, reset_stale_variants
 
 User = settings.AUTH_USER_MODEL
 
@@ -11,6 +10,9 @@ class Profile(models.Model):
     """
     ユーザープロフィールモデル (主に生産者向け情報を想定)
     User モデルと 1対1 で紐づく
+    ユーザー登録時 (RegisterSerializer.create) に同じトランザクションで作成する。
+    それ以外の経路 (createsuperuser など) で作られたユーザーは、
+    MyProfileView の初回アクセス時に作成される。
     """
 
     user = models.OneToOneField(
@@ -30,6 +32,8 @@ class Profile(models.Model):
     image = models.ImageField(
         upload_to="profiles/", blank=True, null=True, verbose_name="プロフィール画像"
     )  # Pillow が必要
+    # 派生画像 (サムネイル・カード・詳細) の保存先 (app/core/images.py, process_images が生成)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     website_url = models.URLField(blank=True, verbose_name="ウェブサイトURL")
     phone_number = models.CharField(
         max_length=20, blank=True, verbose_name="電話番号"
@@ -66,54 +70,21 @@ class Profile(models.Model):
     class Meta:
         verbose_name = "プロフィール"
         verbose_name_plural = "プロフィール"
+        indexes = [
+            # 派生画像の生成待ち (process_images)
+            models.Index(
+                fields=["id"],
+                condition=PENDING_IMAGE_VARIANTS,
+                name="profile_image_pending_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} のプロフィール"
 
-
-# User モデルが作成されたときに、対応する Profile も自動的に作成するシグナルハンドラ
-# これにより、既存ユーザー・新規ユーザーともに必ず Profile を持つようになる
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        print(
-            f"[Signal] User created with ID: {instance.id}. Trying to create Profile."
-        )
-        try:
-            # 念のため、この時点で User が DB に存在するか確認
-            user_exists = User.objects.filter(id=instance.id).exists()
-            print(
-                f"[Signal] Does User ID {instance.id} exist in DB before Profile create? {user_exists}"
-            )
-
-            # Profile 作成実行
-            profile, profile_created = Profile.objects.get_or_create(
-                user=instance,
-                # defaults={} # get_or_create なので defaults は通常不要だが、明示しても良い
-            )
-
-            if profile_created:
-                print(f"[Signal] Profile created for user ID: {instance.id}")
-            else:
-                # get_or_create で既存が見つかった場合 (通常は created=True の時は来ないはず)
-                print(f"[Signal] Profile already existed for user ID: {instance.id}")
-
-        except IntegrityError as e:
-            print(
-                f"[Signal] !!! IntegrityError creating Profile for User ID {instance.id}: {e}"
-            )
-            # ここでエラーの詳細を出力
-        except Exception as e:
-            print(
-                f"[Signal] !!! Unexpected Error creating Profile for User ID {instance.id}: {e}"
-            )
-
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    # User が更新されたときに Profile も念のため保存する (必須ではない)
-    try:
-        instance.profile.save()
-    except Profile.DoesNotExist:
-        # もし何らかの理由で Profile がなければ作成
-        Profile.objects.create(user=instance)
+    def save(self, *args, **kwargs):
+        # 画像が差し替えられた場合は派生画像を作り直す
+        update_fields = reset_stale_variants(self, kwargs.get("update_fields"))
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Profile
 from app.accounts.serializers import UserSerializer  # User情報も一部含める場合
+from app.core.serializers import ImageVariantsField
 
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -9,6 +10,8 @@ class ProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(
         source="user.email", read_only=True
     )  # 読み取り専用で表示
+    # 派生画像 (サムネイル・カード・詳細) の URL。生成前は None
+    image_urls = ImageVariantsField()
 
     class Meta:
         model = Profile
@@ -21,6 +24,7 @@ class ProfileSerializer(serializers.ModelSerializer):
             "location_city",
             "bio",
             "image",
+            "image_urls",
             "website_url",
             "phone_number",
             "certification_info",
@@ -43,4 +47,5 @@ class ProfileSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "is_producer",
+            "image_urls",
         ]
@@ -1,3 +1,43 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model  # type: ignore
+from django.test import TestCase  # type: ignore
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from app.accounts.authentication import RoleClaimsRefreshToken, get_cached_user
+
+from .models import Profile
+
+User = get_user_model()
+
+
+class MyProfileTests(TestCase):
+    """ログインユーザー自身のプロフィール (/api/profiles/me/)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="farmer", password="pw")
+        self.profile = Profile.objects.create(
+            user=self.user, is_producer=True, farm_name="山田農園"
+        )
+        self.client = APIClient()
+        token = RoleClaimsRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_update_does_not_write_back_cached_values(self):
+        # 認証のキャッシュにユーザー (プロフィールを含む) を載せてから、
+        # process_images と同じく update() (シグナルなし) で派生画像を書き込む
+        get_cached_user(self.user.pk)
+        variants = {
+            "source": "profiles/1.jpg",
+            "thumb": "profiles/variants/1/thumb.webp",
+        }
+        Profile.objects.filter(pk=self.profile.pk).update(
+            image="profiles/1.jpg", image_variants=variants
+        )
+
+        response = self.client.patch(
+            "/api/profiles/me/", {"bio": "有機栽培"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.bio, "有機栽培")
+        self.assertEqual(self.profile.image.name, "profiles/1.jpg")
+        self.assertEqual(self.profile.image_variants, variants)
@@ -1,7 +1,9 @@
-from django.urls import path, include  # type: ignore
+from django.conf import settings  # type: ignore
+from django.urls import path, include, re_path  # type: ignore
 from rest_framework.routers import DefaultRouter
 from .views import MyProfileView, ProfileViewSet
 from .views import MyProfileView
+from .async_views import ProfileDetailAsyncView, ProfileListAsyncView
 
 app_name = "profiles"
 # --- ViewSet 用のルーターを作成 ---
@@ -15,3 +17,26 @@ urlpatterns = [
     # --- /api/profiles/ や /api/profiles/{pk}/ へのルーティングを追加 ---
     path("", include(router.urls)),
 ]
+
+if settings.ASYNC_CATALOG_VIEWS:
+    # ASGI で動かす場合、一覧・詳細は非同期ビューで処理する (app/profiles/async_views.py)
+    urlpatterns[1:1] = [
+        path(
+            "",
+            ProfileListAsyncView.as_view(
+                fallback=ProfileViewSet.as_view(
+                    {"get": "list"}, basename="profile-list", detail=False
+                )
+            ),
+            name="profile-list-list",
+        ),
+        re_path(
+            r"^(?P<username>[^/.]+)/$",
+            ProfileDetailAsyncView.as_view(
+                fallback=ProfileViewSet.as_view(
+                    {"get": "retrieve"}, basename="profile-list", detail=True
+                )
+            ),
+            name="profile-list-detail",
+        ),
+    ]
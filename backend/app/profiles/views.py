@@ -1,21 +1,17 @@
 from rest_framework import generics, permissions, parsers, viewsets, filters
+from django.conf import settings  # type: ignore
 from .models import Profile
 from .serializers import ProfileSerializer
 from django.contrib.auth import get_user_model  # type: ignore
-from rest_framework.pagination import PageNumberPagination  # ページネーションを使う場合
+from app.accounts.authentication import check_user_is_active
+from app.core.conditional import ConditionalGetMixin
+from app.core.pagination import StandardResultsSetPagination  # ページネーション
 from django_filters.rest_framework import DjangoFilterBackend  # type: ignore # フィルタリングを使う場合
 
 # from django.contrib.auth import get_user_model # 必要なら
 User = get_user_model()
 
 
-# --- ページネーション設定 (任意) ---
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 12  # 1ページあたりの表示件数
-    page_size_query_param = "page_size"
-    max_page_size = 100
-
-
 # --- プロフィール一覧・詳細取得用 ViewSet ---
 class ProfileViewSet(viewsets.ReadOnlyModelViewSet):
     # is_producer=True のプロフィールのみを取得、ユーザー情報も結合
@@ -58,16 +54,26 @@ class MyProfileView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         # リクエストしてきたユーザーに紐づく Profile オブジェクトを返す
-        # シグナルにより Profile は必ず存在するため、get() で取得
-        profile, created = Profile.objects.get_or_create(user=self.request.user)
+        # 認証のキャッシュは Profile を含まず、古い Profile を保存すると process_images が
+        # update() で書いた画像を戻してしまうため、毎回 DB から取得する
+        # (ユーザーも結合して 1 クエリ、無効化されたユーザーはここで拒否する)
+        try:
+            profile = Profile.objects.select_related("user").get(
+                user_id=self.request.user.pk
+            )
+        except Profile.DoesNotExist:
+            # 登録 API 以外で作成されたユーザーは Profile がないため、ここで作成する
+            profile, created = Profile.objects.get_or_create(user=self.request.user)
+        check_user_is_active(profile.user)
         return profile
 
 
-class ProfileViewSet(viewsets.ReadOnlyModelViewSet):
+class ProfileViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     プロフィール一覧を取得するための ViewSet (読み取り専用)
     - is_producer=True のプロフィールのみを対象とする
     - デフォルトで作成日時の降順 (新しい順) で返す
+    - 条件付き GET (ETag / Last-Modified) に対応する (app/core/conditional.py)
     """
 
     # is_producer=True のプロフィールのみを取得
@@ -80,6 +86,7 @@ class ProfileViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [
         permissions.AllowAny
     ]  # プロフィール一覧は誰でも見れるように (変更可)
+    public_max_age = settings.PUBLIC_CACHE_MAX_AGE
     # ページネーション設定 (必要なら)
     # pagination_class = YourPaginationClass
     # フィルタリング (必要なら)
@@ -0,0 +1,218 @@
+# backend/benchmarks/http_load.py
+"""
+HTTP 負荷テスト (標準ライブラリのみ)
+
+起動済みのサーバーに対して、指定した並列数のクライアントが一定時間リクエストを送り続け、
+スループット (req/s) とレイテンシ (p50 / p90 / p99) を表示する。
+各クライアントは Keep-Alive で 1 本の HTTP 接続を使い回す。
+--target を複数指定すると、同じ条件で順番に計測して並べて表示する。
+
+例: DB 接続の使い回し (config/settings_production.py) の効果を比較する
+
+    # 接続をリクエストごとに張り直す (開発用の設定)
+    DJANGO_SETTINGS_MODULE=config.settings \\
+        gunicorn config.wsgi --workers 2 --threads 4 --bind 127.0.0.1:8001 &
+    # 持続的接続 + ヘルスチェック (本番用の設定)
+    DJANGO_SETTINGS_MODULE=config.settings_production \\
+        gunicorn config.wsgi --workers 2 --threads 4 --bind 127.0.0.1:8002 &
+
+    python benchmarks/http_load.py --path "/api/products/" \\
+        --target connect-per-request=http://127.0.0.1:8001 \\
+        --target persistent=http://127.0.0.1:8002 \\
+        --auth bench:password --concurrency 8 --duration 20
+
+未ログインの商品一覧はレスポンスキャッシュ (app/products/cache.py) に当たり DB を使わないため、
+DB を含めて計測する場合は --auth でログインしたユーザーとしてリクエストする。
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def parse_target(value):
+    label, sep, url = value.partition("=")
+    if not sep:
+        label, url = value, value
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise argparse.ArgumentTypeError(f"invalid target URL: {url}")
+    return label, parts
+
+
+def open_connection(base):
+    cls = (
+        http.client.HTTPSConnection
+        if base.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    return cls(base.hostname, base.port, timeout=30)
+
+
+def obtain_token(base, credentials):
+    """/api/accounts/token/ でアクセストークンを取得する"""
+    username, _, password = credentials.partition(":")
+    conn = open_connection(base)
+    try:
+        conn.request(
+            "POST",
+            "/api/accounts/token/",
+            body=json.dumps({"username": username, "password": password}),
+            headers={"Content-Type": "application/json"},
+        )
+        response = conn.getresponse()
+        body = response.read()
+    finally:
+        conn.close()
+    if response.status != 200:
+        sys.exit(f"login failed ({response.status}): {body[:200]!r}")
+    return json.loads(body)["access"]
+
+
+class Result:
+    def __init__(self):
+        self.latencies = []  # 秒
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def add(self, latencies, errors):
+        with self.lock:
+            self.latencies.extend(latencies)
+            self.errors += errors
+
+
+def worker(base, paths, headers, deadline, warmup_until, result):
+    conn = open_connection(base)
+    latencies = []
+    errors = 0
+    i = 0
+    while True:
+        started = time.perf_counter()
+        if started >= deadline:
+            break
+        path = paths[i % len(paths)]
+        i += 1
+        for attempt in range(2):
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+                if response.getheader("Connection", "").lower() == "close":
+                    conn.close()
+                break
+            except (OSError, http.client.HTTPException):
+                # サーバーが Keep-Alive の接続を閉じていた場合 (ワーカーの入れ替えなど) は
+                # 一般的な HTTP クライアントと同じく接続し直して 1 回だけ再送する
+                ok = False
+                conn.close()
+                conn = open_connection(base)
+        elapsed = time.perf_counter() - started
+        if started < warmup_until:
+            continue
+        if ok:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+    conn.close()
+    result.add(latencies, errors)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float("nan")
+    index = min(
+        len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1)))
+    )
+    return sorted_values[index]
+
+
+def run(base, paths, headers, concurrency, duration, warmup):
+    result = Result()
+    now = time.perf_counter()
+    warmup_until = now + warmup
+    deadline = warmup_until + duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(base, paths, headers, deadline, warmup_until, result),
+            daemon=True,
+        )
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(result.latencies)
+    return {
+        "requests": len(latencies),
+        "errors": result.errors,
+        "rps": len(latencies) / duration,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--target",
+        action="append",
+        type=parse_target,
+        required=True,
+        help="label=http://host:port (複数指定可)",
+    )
+    parser.add_argument(
+        "--path",
+        action="append",
+        help="リクエストするパス (複数指定すると順番に使う。既定: /api/products/)",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="計測時間 (秒)")
+    parser.add_argument(
+        "--warmup", type=float, default=3.0, help="計測前の慣らし時間 (秒)"
+    )
+    parser.add_argument("--auth", help="username:password (ログインして Bearer で送る)")
+    parser.add_argument(
+        "--header", action="append", default=[], help="'Name: value' (複数指定可)"
+    )
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args(argv)
+
+    paths = args.path or ["/api/products/"]
+    rows = []
+    for label, base in args.target:
+        headers = {"Accept": "application/json"}
+        for header in args.header:
+            name, _, value = header.partition(":")
+            headers[name.strip()] = value.strip()
+        if args.auth:
+            headers["Authorization"] = f"Bearer {obtain_token(base, args.auth)}"
+        stats = run(base, paths, headers, args.concurrency, args.duration, args.warmup)
+        rows.append({"target": label, **stats})
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(
+        f"{'target':<24}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}"
+        f"{'p99 ms':>10}{'errors':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['target']:<24}{row['rps']:>10.1f}{row['p50_ms']:>10.2f}"
+            f"{row['p90_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+# backend/benchmarks/load_mix.py
+"""
+閲覧・検索・購入を混ぜた HTTP 負荷テスト (標準ライブラリのみ)
+
+manage.py generate_synthetic_data で登録した合成データに対して、商品一覧・絞り込み・
+検索・詳細・ファセット・生産者プロフィール・注文 (POST /api/my-orders/)・
+購入履歴・受注一覧・お気に入りを重み付きの割合で送り、エンドポイントごとの
+スループット (req/s) とレイテンシ (p50 / p90 / p99) を表示する。
+
+    cd backend
+    python manage.py generate_synthetic_data --producers 1000 --buyers 5000 --orders 200000
+    gunicorn -c gunicorn.conf.py &
+    python benchmarks/load_mix.py --target http://127.0.0.1:8000 \\
+        --producers 1000 --buyers 5000 --concurrency 16 --duration 60
+
+- 各クライアント (スレッド) は計測前に購入者 1 人・生産者 1 人としてログインする
+  (ユーザー名は <prefix>_buyer<番号> / <prefix>_producer<番号>)。
+- カタログ (一覧・検索・詳細・ファセット・プロフィール) は --anonymous の割合で
+  未ログイン (レスポンスキャッシュに当たる)、それ以外は購入者としてリクエストする。
+- 商品 ID は起動時に商品一覧 (カーソル方式) から --sample-products 件を取得し、
+  人気商品に偏るように選ぶ。
+- checkout は実際に注文を登録する (在庫が減り、注文が増える)。
+  --mix checkout=0 で読み取りのみにできる。
+"""
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import quote, urlencode
+
+from http_load import obtain_token, open_connection, parse_target, percentile
+
+# ラベル: 重み (--mix で上書き)
+DEFAULT_MIX = {
+    "browse": 30,
+    "filter": 10,
+    "search": 15,
+    "detail": 20,
+    "facets": 5,
+    "profile": 5,
+    "checkout": 5,
+    "my_orders": 4,
+    "producer_orders": 3,
+    "favorites": 3,
+}
+
+SEARCH_WORDS = [
+    "トマト", "きゅうり", "じゃがいも", "玉ねぎ", "りんご", "みかん", "いちご",
+    "米", "卵", "はちみつ", "有機", "朝採れ", "訳あり", "北海道", "長野県",
+]  # fmt: skip
+CATEGORIES = ["野菜", "果物", "米・穀物", "畜産物", "加工品"]
+CULTIVATION_METHODS = ["conventional", "special", "organic", "organic_jas", "natural"]
+ORDERINGS = ["-created_at", "price", "-price", "name"]
+SHIPPING = {
+    "shipping_full_name": "負荷 太郎",
+    "shipping_postal_code": "100-0001",
+    "shipping_prefecture": "東京都",
+    "shipping_city": "千代田区",
+    "shipping_address1": "1-1",
+    "shipping_phone_number": "0300000000",
+    "payment_method": "bank_transfer",
+}
+
+
+def parse_mix(value):
+    """'browse=30,checkout=0' → DEFAULT_MIX を上書きした重み"""
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, value.split(",")):
+        label, sep, weight = item.partition("=")
+        label = label.strip()
+        if not sep or label not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(
+                f"invalid mix entry {item!r} (labels: {', '.join(DEFAULT_MIX)})"
+            )
+        try:
+            mix[label] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight in {item!r}")
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("the mix must have a positive weight")
+    return mix
+
+
+def sample_products(base, limit):
+    """公開中の商品を (id, 生産者のユーザー名) で最大 limit 件取得する"""
+    conn = open_connection(base)
+    products = []
+    path = f"/api/products/?pagination=cursor&page_size={min(limit, 100)}"
+    try:
+        while path and len(products) < limit:
+            conn.request("GET", path, headers={"Accept": "application/json"})
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 200:
+                sys.exit(f"product list failed ({response.status}): {body[:200]!r}")
+            data = json.loads(body)
+            products.extend(
+                (product["id"], product["producer_username"])
+                for product in data["results"]
+            )
+            # next は絶対 URL。同じ接続で送るためパス以降だけを使う
+            next_url = data.get("next")
+            path = next_url[next_url.index("/api/") :] if next_url else None
+    finally:
+        conn.close()
+    if not products:
+        sys.exit("no products found (run manage.py generate_synthetic_data first)")
+    return products[:limit]
+
+
+class Client:
+    """1 スレッド分の接続とログイン済みのトークン"""
+
+    def __init__(self, base, buyer_token, producer_token, rng, products, args):
+        self.base = base
+        self.conn = open_connection(base)
+        self.buyer = {"Authorization": f"Bearer {buyer_token}"}
+        self.producer = {"Authorization": f"Bearer {producer_token}"}
+        self.rng = rng
+        self.products = products
+        self.args = args
+        # 先頭ほど選ばれやすい (人気商品にアクセスが集中する)
+        self.weights = [1 / (rank + 1) for rank in range(len(products))]
+
+    def pick_product(self):
+        return self.rng.choices(self.products, weights=self.weights)[0]
+
+    def catalog_headers(self):
+        return {} if self.rng.random() < self.args.anonymous else self.buyer
+
+    def request(self, label):
+        """(メソッド, パス, ヘッダー, 本文) を組み立てる"""
+        rng = self.rng
+        if label == "browse":
+            page = 1 + min(int(rng.expovariate(0.7)), 9)
+            query = {"page": page}
+            if rng.random() < 0.3:
+                query["ordering"] = rng.choice(ORDERINGS)
+            return "GET", f"/api/products/?{urlencode(query)}", self.catalog_headers()
+        if label == "filter":
+            query = {"category": rng.choice(CATEGORIES)}
+            if rng.random() < 0.5:
+                query["cultivation_method"] = rng.choice(CULTIVATION_METHODS)
+            if rng.random() < 0.5:
+                query["max_price"] = rng.choice([500, 1000, 3000])
+            return "GET", f"/api/products/?{urlencode(query)}", self.catalog_headers()
+        if label == "search":
+            query = {"search": rng.choice(SEARCH_WORDS)}
+            if rng.random() < 0.3:
+                query["ordering"] = "price"
+            return "GET", f"/api/products/?{urlencode(query)}", self.catalog_headers()
+        if label == "detail":
+            product_id, _ = self.pick_product()
+            return "GET", f"/api/products/{product_id}/", self.catalog_headers()
+        if label == "facets":
+            query = {}
+            if rng.random() < 0.5:
+                query["search"] = rng.choice(SEARCH_WORDS)
+            path = "/api/products/facets/" + (f"?{urlencode(query)}" if query else "")
+            return "GET", path, self.catalog_headers()
+        if label == "profile":
+            _, username = self.pick_product()
+            return "GET", f"/api/profiles/{quote(username)}/", self.catalog_headers()
+        if label == "checkout":
+            count = min(1 + int(rng.expovariate(0.8)), 5, len(self.products))
+            chosen = {self.pick_product()[0] for _ in range(count)}
+            body = {
+                **SHIPPING,
+                "items": [
+                    {"product_id": product_id, "quantity": rng.randint(1, 3)}
+                    for product_id in chosen
+                ],
+            }
+            return "POST", "/api/my-orders/", self.buyer, json.dumps(body)
+        if label == "my_orders":
+            return "GET", "/api/my-orders/", self.buyer
+        if label == "producer_orders":
+            return "GET", "/api/producer-orders/", self.producer
+        if label == "favorites":
+            return "GET", "/api/favorites/products/", self.buyer
+        raise ValueError(label)
+
+    def send(self, method, path, headers, body=None):
+        headers = {"Accept": "application/json", **headers}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        for attempt in range(2):
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                response.read()
+                if response.getheader("Connection", "").lower() == "close":
+                    self.conn.close()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                # http_load.worker と同じく、閉じられた Keep-Alive の接続は 1 回だけ張り直す
+                self.conn.close()
+                self.conn = open_connection(self.base)
+        return None
+
+
+class Results:
+    def __init__(self):
+        self.latencies = {}  # ラベル → [秒]
+        self.errors = {}  # ラベル → {ステータス: 件数}
+        self.lock = threading.Lock()
+
+    def add(self, latencies, errors):
+        with self.lock:
+            for label, values in latencies.items():
+                self.latencies.setdefault(label, []).extend(values)
+            for label, statuses in errors.items():
+                merged = self.errors.setdefault(label, {})
+                for status, count in statuses.items():
+                    merged[status] = merged.get(status, 0) + count
+
+
+def worker(client, mix, warmup_until, deadline, results):
+    labels, weights = list(mix), list(mix.values())
+    latencies = {}
+    errors = {}
+    while True:
+        started = time.perf_counter()
+        if started >= deadline:
+            break
+        label = client.rng.choices(labels, weights=weights)[0]
+        status = client.send(*client.request(label))
+        elapsed = time.perf_counter() - started
+        if started < warmup_until:
+            continue
+        if status is not None and status < 400:
+            latencies.setdefault(label, []).append(elapsed)
+        else:
+            statuses = errors.setdefault(label, {})
+            statuses[status] = statuses.get(status, 0) + 1
+    client.conn.close()
+    results.add(latencies, errors)
+
+
+def summarize(label, latencies, errors, duration):
+    latencies = sorted(latencies)
+    return {
+        "endpoint": label,
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": {str(status): count for status, count in errors.items()},
+        "rps": len(latencies) / duration,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run(base, args):
+    rng = random.Random(args.seed)
+    products = sample_products(base, args.sample_products)
+    rng.shuffle(products)
+
+    # ログインは計測に含めない (パスワードのハッシュ計算が重いため)
+    clients = []
+    for index in range(args.concurrency):
+        buyer = f"{args.prefix}_buyer{rng.randrange(args.buyers)}"
+        producer = f"{args.prefix}_producer{rng.randrange(args.producers)}"
+        clients.append(
+            Client(
+                base,
+                obtain_token(base, f"{buyer}:{args.password}"),
+                obtain_token(base, f"{producer}:{args.password}"),
+                random.Random(args.seed * 1000 + index),
+                products,
+                args,
+            )
+        )
+
+    mix = {label: weight for label, weight in args.mix.items() if weight > 0}
+    results = Results()
+    warmup_until = time.perf_counter() + args.warmup
+    deadline = warmup_until + args.duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(client, mix, warmup_until, deadline, results),
+            daemon=True,
+        )
+        for client in clients
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    rows = [
+        summarize(
+            label,
+            results.latencies.get(label, []),
+            results.errors.get(label, {}),
+            args.duration,
+        )
+        for label in mix
+    ]
+    all_errors = {}
+    for statuses in results.errors.values():
+        for status, count in statuses.items():
+            all_errors[status] = all_errors.get(status, 0) + count
+    rows.append(
+        summarize(
+            "total",
+            [value for values in results.latencies.values() for value in values],
+            all_errors,
+            args.duration,
+        )
+    )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--target",
+        type=parse_target,
+        default=parse_target("http://127.0.0.1:8000"),
+        help="http://host:port (既定: http://127.0.0.1:8000)",
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=dict(DEFAULT_MIX),
+        help="label=重み をカンマ区切りで (例: checkout=0,search=30)。"
+        f"既定: {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="計測時間 (秒)")
+    parser.add_argument(
+        "--warmup", type=float, default=3.0, help="計測前の慣らし時間 (秒)"
+    )
+    parser.add_argument(
+        "--anonymous",
+        type=float,
+        default=0.5,
+        help="カタログを未ログインで見る割合 (0〜1)",
+    )
+    parser.add_argument(
+        "--prefix", default="synthetic", help="generate_synthetic_data の --prefix"
+    )
+    parser.add_argument("--password", default="password")
+    parser.add_argument(
+        "--producers", type=int, default=200, help="ログインに使う生産者の数"
+    )
+    parser.add_argument(
+        "--buyers", type=int, default=1000, help="ログインに使う購入者の数"
+    )
+    parser.add_argument(
+        "--sample-products", type=int, default=1000, help="詳細・注文に使う商品の数"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.producers < 1 or args.buyers < 1:
+        parser.error("--concurrency, --producers and --buyers must be at least 1")
+    if not 0 <= args.anonymous <= 1:
+        parser.error("--anonymous must be between 0 and 1")
+
+    _, base = args.target
+    rows = run(base, args)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(
+        f"{'endpoint':<18}{'requests':>10}{'req/s':>10}{'p50 ms':>10}"
+        f"{'p90 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['endpoint']:<18}{row['requests']:>10}{row['rps']:>10.1f}"
+            f"{row['p50_ms']:>10.2f}{row['p90_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            f"{row['errors']:>8}"
+        )
+    for row in rows[:-1]:
+        if row["error_statuses"]:
+            statuses = ", ".join(
+                f"{status}: {count}" for status, count in row["error_statuses"].items()
+            )
+            print(f"  {row['endpoint']} errors by status ({statuses})")
+
+
+if __name__ == "__main__":
+    main()
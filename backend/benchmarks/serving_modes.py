@@ -0,0 +1,131 @@
+# backend/benchmarks/serving_modes.py
+"""
+起動方法 (entrypoint.sh の SERVER_MODE) ごとのスループット比較
+
+モードごとに backend/ でサーバーを起動し、http_load.py で同じ負荷をかけて
+req/s とレイテンシを表示する。サーバーは計測後に SIGTERM で停止する。
+- dev:  manage.py runserver (比較用)
+- wsgi: gunicorn.conf.py (gthread)
+- asgi: gunicorn.conf.py (uvicorn ワーカー、商品・プロフィールは非同期ビュー)
+- asgi-sync: asgi と同じだが非同期ビューを使わない (ASYNC_CATALOG_VIEWS=False)
+
+    cd backend
+    python benchmarks/serving_modes.py --modes dev wsgi asgi \\
+        --settings config.settings_production --concurrency 16 --duration 20
+
+--concurrency に複数の値を渡すと、同時接続数ごとに計測する
+(1 ワーカーあたりの同時処理数を比べる場合は WEB_CONCURRENCY=1 で実行する)。
+
+ワーカー数などは環境変数 (WEB_CONCURRENCY, GUNICORN_THREADS など) でそのまま渡せる。
+DB を含めて計測する場合は http_load.py と同じく --auth を指定する。
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from http_load import obtain_token, run
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def command_for(mode, bind):
+    if mode == "dev":
+        return [sys.executable, "manage.py", "runserver", "--noreload", bind]
+    return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+
+
+def wait_for_port(host, port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not start listening on {host}:{port}")
+
+
+def benchmark_mode(mode, args):
+    """サーバーを起動し、同時接続数ごとの結果を返す"""
+    bind = f"127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": args.settings,
+        "SERVER_MODE": "asgi" if mode == "asgi-sync" else mode,
+        "ASYNC_CATALOG_VIEWS": "True" if mode == "asgi" else "False",
+        "GUNICORN_BIND": bind,
+        "GUNICORN_ACCESS_LOG": "/dev/null",  # アクセスログの出力を計測に含めない
+    }
+    process = subprocess.Popen(
+        command_for(mode, bind),
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port("127.0.0.1", args.port, process)
+        base = urlsplit(f"http://{bind}")
+        headers = {"Accept": "application/json"}
+        if args.auth:
+            headers["Authorization"] = f"Bearer {obtain_token(base, args.auth)}"
+        return [
+            (
+                concurrency,
+                run(base, args.path, headers, concurrency, args.duration, args.warmup),
+            )
+            for concurrency in args.concurrency
+        ]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["dev", "wsgi", "asgi", "asgi-sync"],
+        default=["wsgi", "asgi"],
+    )
+    parser.add_argument("--settings", default="config.settings_production")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--path", nargs="+", default=["/api/products/"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16])
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--auth", help="username:password (ログインして Bearer で送る)")
+    parser.add_argument(
+        "--verbose", action="store_true", help="サーバーのログを表示する"
+    )
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'mode':<10}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}"
+        f"{'p99 ms':>10}{'errors':>8}"
+    )
+    for mode in args.modes:
+        for concurrency, stats in benchmark_mode(mode, args):
+            print(
+                f"{mode:<10}{concurrency:>8}{stats['rps']:>10.1f}"
+                f"{stats['p50_ms']:>10.2f}{stats['p90_ms']:>10.2f}"
+                f"{stats['p99_ms']:>10.2f}{stats['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # 全文検索 (SearchVectorField, GinIndex)
     # --- Third Party ---
     "rest_framework",
     "rest_framework_simplejwt",
@@ -110,6 +111,58 @@ DATABASES = {
     }
 }
 
+# 商品検索の外部インデックス (app/products/search_backends.py)
+# ELASTICSEARCH_HOST が設定されていれば Elasticsearch を使い、
+# 未設定なら PostgreSQL の search_vector で検索する。
+# 初回は `python manage.py reindex_products --reset` でインデックスを作成すること。
+ELASTICSEARCH_HOST = os.environ.get("ELASTICSEARCH_HOST")
+ELASTICSEARCH_PORT = os.environ.get("ELASTICSEARCH_PORT", "9200")
+PRODUCT_SEARCH_BACKEND = (
+    {
+        "BACKEND": "app.products.search_backends.ElasticsearchBackend",
+        "OPTIONS": {
+            "url": f"http://{ELASTICSEARCH_HOST}:{ELASTICSEARCH_PORT}",
+            "index": os.environ.get("ELASTICSEARCH_PRODUCT_INDEX", "products"),
+        },
+    }
+    if ELASTICSEARCH_HOST
+    else None
+)
+
+# キャッシュ
+# REDIS_URL が設定されていれば Redis (全ワーカーで共有)、未設定ならプロセス内メモリ。
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# 匿名向け商品一覧・詳細のレスポンスキャッシュ (app/products/cache.py)
+PRODUCT_CACHE_ALIAS = "default"
+PRODUCT_CACHE_TIMEOUT = int(os.environ.get("PRODUCT_CACHE_TIMEOUT", "300"))  # 秒
+# 絞り込み用の件数 (facets)。キャッシュにない場合は絞り込み後の販売中の商品を全件集計するため、
+# 商品の保存では無効にせず、この時間で期限切れにする (app/products/facets.py)
+PRODUCT_FACETS_CACHE_TIMEOUT = int(
+    os.environ.get("PRODUCT_FACETS_CACHE_TIMEOUT", "60")
+)  # 秒
+# 公開カタログ (商品・生産者プロフィール) の未ログインの応答をリバースプロキシ・CDN が
+# キャッシュしてよい時間 (Cache-Control の s-maxage。app/core/conditional.py)
+PUBLIC_CACHE_MAX_AGE = int(os.environ.get("PUBLIC_CACHE_MAX_AGE", "60"))  # 秒
+# 商品・生産者プロフィールの一覧・詳細を非同期ビューで処理する (ASGI 用)
+# gunicorn.conf.py の SERVER_MODE=asgi では既定で有効になる
+ASYNC_CATALOG_VIEWS = os.environ.get("ASYNC_CATALOG_VIEWS", "False") == "True"
+
+# JWT 認証でモデルとしてのユーザーが必要になった時の取得結果のキャッシュ時間
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", "60"))  # 秒
 
 # Password validation
 # ... (既存のパスワードバリデータ設定)
@@ -143,8 +196,8 @@ REST_FRAMEWORK = {
         # 'rest_framework.permissions.IsAuthenticated', # 認証必須の場合
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        # JWT認証をデフォルトに設定
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWT認証をデフォルトに設定 (クレームから認証し、ユーザーは必要な時だけ取得)
+        "app.accounts.authentication.RoleClaimsJWTAuthentication",
         # 必要に応じてTokenAuthenticationなどを追加
         "rest_framework.authentication.SessionAuthentication",
     ],
@@ -210,8 +263,9 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
     # デフォルトのシリアライザ (必要に応じてカスタム可)
-    # "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    # "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    # username / is_producer をクレームに含める (app/accounts/authentication.py)
+    "TOKEN_OBTAIN_SERIALIZER": "app.accounts.serializers.RoleClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "app.accounts.serializers.RoleClaimsTokenRefreshSerializer",
     # "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     # "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
     # "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
@@ -0,0 +1,56 @@
+# backend/config/settings_production.py
+"""
+本番環境用の設定 (DJANGO_SETTINGS_MODULE=config.settings_production)
+
+config/settings.py を読み込み、データベース接続まわりを本番向けに上書きする。
+開発用の settings.py はリクエストごとに PostgreSQL へ接続し直す (CONN_MAX_AGE=0)。
+
+- 持続的接続: 接続をワーカーのスレッドごとに DB_CONN_MAX_AGE 秒使い回す。
+  CONN_HEALTH_CHECKS で再利用前に接続の生存を確認する (DB の再起動後も 1 回目から失敗しない)。
+- コネクションプール (DB_POOL=True): psycopg3 (psycopg[pool]) がインストールされていれば
+  プロセスごとにプールを作る。1 プロセスで同時に使う接続はスレッド数までなので、
+  max_size は GUNICORN_THREADS に合わせる。全体の接続数は
+  WEB_CONCURRENCY (プロセス数) × DB_POOL_MAX_SIZE になるため、PostgreSQL の
+  max_connections を超えないように設定すること。プールを使う場合は CONN_MAX_AGE=0 にする
+  (Django の制約)。
+- 文のタイムアウト: 1 文が DB_STATEMENT_TIMEOUT ミリ秒を超えたら PostgreSQL 側で中断する。
+  一括処理などの管理コマンドで長い文を流す場合は環境変数で延ばす (0 で無効)。
+"""
+
+import os
+from importlib.util import find_spec
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DEBUG = os.environ.get("DJANGO_DEBUG", "False") == "True"
+
+if os.environ.get("DJANGO_ALLOWED_HOSTS"):
+    ALLOWED_HOSTS = os.environ["DJANGO_ALLOWED_HOSTS"].split(",")
+
+# --- データベース接続 ---
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+DB_STATEMENT_TIMEOUT = int(os.environ.get("DB_STATEMENT_TIMEOUT", "5000"))  # ミリ秒
+DB_POOL = os.environ.get("DB_POOL", "False") == "True"
+if DB_POOL and find_spec("psycopg_pool") is None:
+    # psycopg2 ではプールを使えないため、持続的接続にフォールバックする
+    DB_POOL = False
+
+DATABASES["default"].update(
+    {
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # psycopg2 / psycopg3 のどちらでも接続時のパラメータとして渡せる
+            "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT}",
+        },
+    }
+)
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", str(GUNICORN_THREADS))),
+        "timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),  # 接続待ちの上限 (秒)
+    }
@@ -15,9 +15,32 @@ if [ "$DJANGO_DEBUG" = "True" ] ; then
     # python manage.py migrate --noinput
 fi
 
-# Django開発サーバーを起動 (本番環境では Gunicorn を使用)
-# docker-compose.yml の command を上書きしない場合はこちらで起動コマンドを指定
-# 例: gunicorn config.wsgi:application --bind 0.0.0.0:8000 --workers 3
-# 開発時は manage.py runserver が便利
-echo "Starting Django develop server..."
-exec python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# SERVER_MODE で起動方法を切り替える (既定: DEBUG なら dev、それ以外は wsgi)
+# - dev:  Django 開発サーバー (自動リロード)
+# - wsgi: gunicorn + gthread ワーカー (config.wsgi)
+# - asgi: gunicorn + uvicorn ワーカー (config.asgi)
+# ワーカー数などは gunicorn.conf.py を参照
+if [ -z "$SERVER_MODE" ]; then
+    # settings.py と同じく DJANGO_DEBUG 未設定は DEBUG とみなす
+    if [ "${DJANGO_DEBUG:-True}" = "True" ] ; then
+        SERVER_MODE=dev
+    else
+        SERVER_MODE=wsgi
+    fi
+fi
+
+case "$SERVER_MODE" in
+    dev)
+        echo "Starting Django develop server..."
+        exec python manage.py runserver 0.0.0.0:8000
+        ;;
+    wsgi|asgi)
+        echo "Starting gunicorn ($SERVER_MODE)..."
+        export SERVER_MODE
+        exec gunicorn -c gunicorn.conf.py
+        ;;
+    *)
+        echo "Unknown SERVER_MODE: $SERVER_MODE (dev, wsgi or asgi)" >&2
+        exit 1
+        ;;
+esac
@@ -0,0 +1,64 @@
+# backend/gunicorn.conf.py
+"""
+gunicorn の設定 (entrypoint.sh から `gunicorn -c gunicorn.conf.py` で起動)
+
+SERVER_MODE で起動方法を切り替える。
+- wsgi: config.wsgi を gthread ワーカーで動かす (プロセス × スレッド)
+- asgi: config.asgi を uvicorn のワーカーで動かす (非同期ビュー向け)
+
+プロセス数・スレッド数は CPU 数から決め、WEB_CONCURRENCY / GUNICORN_THREADS で上書きできる。
+決めた値は環境変数に書き戻し、config/settings_production.py のコネクションプールの
+サイズ (プロセスあたりスレッド数) と揃える。
+"""
+
+import multiprocessing
+import os
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+if SERVER_MODE not in ("wsgi", "asgi"):
+    raise RuntimeError(f"Unknown SERVER_MODE: {SERVER_MODE!r} (wsgi or asgi)")
+
+cpu_count = multiprocessing.cpu_count()
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    # イベントループで待ち時間を重ねるため、プロセスは CPU 数だけでよい
+    workers = int(os.environ.get("WEB_CONCURRENCY", cpu_count))
+    threads = 1
+    # 商品・プロフィールの一覧・詳細を非同期ビューで処理する (app/core/async_views.py)
+    os.environ.setdefault("ASYNC_CATALOG_VIEWS", "True")
+else:
+    wsgi_app = "config.wsgi:application"
+    worker_class = "gthread"
+    # DB や外部サービスの待ち時間をスレッドで重ねる
+    workers = int(os.environ.get("WEB_CONCURRENCY", cpu_count * 2 + 1))
+    threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+os.environ.setdefault("GUNICORN_THREADS", str(threads))
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# マスターで Django を読み込んでから fork する (起動が速く、メモリもプロセス間で共有される)
+preload_app = True
+
+# メモリの断片化やリークの影響を抑えるため、一定数のリクエストを処理したワーカーは入れ替える
+# (jitter で全ワーカーが同時に再起動しないようにする)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# 応答しないワーカーを強制終了するまでの秒数と、停止・再起動時に処理中のリクエストを待つ秒数
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # preload_app でマスターが DB に接続していた場合、その接続をワーカー間で共有しない
+    from django.db import connections  # type: ignore
+
+    connections.close_all()
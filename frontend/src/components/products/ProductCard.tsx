@@ -25,7 +25,8 @@ export default function ProductCard({ product, mediaBaseUrl }: ProductCardProps)
   const { isAuthenticated } = useAuth(); // ログイン状態を取得
   const router = useRouter();
 
-  const imageUrl = product.image ? `${product.image}` : null;
+  // カード用の派生画像 (WebP, 長辺 480px) があればそれを使い、なければ元画像
+  const imageUrl = product.image_urls?.card.webp ?? (product.image ? `${product.image}` : null);
 
   const handleActualAddToCart = (e: React.MouseEvent) => {
     e.preventDefault();
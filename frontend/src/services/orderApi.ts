@@ -1,6 +1,6 @@
 // frontend/src/services/orderApi.ts
 import apiClient from '@/lib/axios';
-import { Order, OrderPayload, PaginatedOrderResponse } from '@/types/order';
+import { Order, OrderPayload, PaginatedOrderResponse, SalesSummary } from '@/types/order';
 import { CartItem } from '@/types/cart';
 import axios from 'axios';
 
@@ -128,4 +128,25 @@ export const getProducerOrderByOrderId = async (orderId: string): Promise<Order
     console.error(`Error fetching producer order details for ${orderId}:`, error);
     throw error;
   }
-};
\ No newline at end of file
+};
+// 生産者の売上集計 (日別・商品別) を取得する関数。期間の省略時は直近 30 日
+export const getProducerSalesSummary = async (dateFrom?: string, dateTo?: string): Promise<SalesSummary> => {
+  const response = await apiClient.get<SalesSummary>('/producer-orders/sales-summary/', {
+    params: { date_from: dateFrom || undefined, date_to: dateTo || undefined },
+  });
+  return response.data;
+};
+
+// 生産者の受注を CSV / Excel (.xlsx) で書き出す関数 (1 行 = 1 明細)。絞り込みは受注一覧と同じ
+export const exportProducerOrders = async (fileFormat: 'csv' | 'xlsx', filters?: { order_status?: string; payment_status?: string; search?: string }): Promise<Blob> => {
+  const response = await apiClient.get<Blob>('/producer-orders/export/', {
+    params: {
+      file_format: fileFormat,
+      order_status: filters?.order_status || undefined,
+      payment_status: filters?.payment_status || undefined,
+      search: filters?.search || undefined,
+    },
+    responseType: 'blob',
+  });
+  return response.data;
+};
@@ -63,6 +63,42 @@ export const getProducts = async (filters?: ProductApiFilters): Promise<Product[
   }
 };
 
+// 絞り込み用の件数 (GET /products/facets/)。一覧と同じ条件を渡すと、その結果の内訳を返す
+export interface FacetValue {
+  value: string | null; // 未設定は null
+  count: number;
+  label?: string | null; // 栽培方法の表示名
+}
+
+export interface ProductFacets {
+  total: number;
+  category: FacetValue[];
+  cultivation_method: FacetValue[];
+  price: { min: number | null; max: number | null; count: number }[]; // min 以上 max 未満
+  producer_prefecture: FacetValue[];
+}
+
+export const getProductFacets = async (filters?: ProductApiFilters): Promise<ProductFacets | null> => {
+  try {
+    const params: ProductApiFilters = { ...filters };
+    if (!params.search) delete params.search;
+    if (!params.category) delete params.category;
+    if (!params.min_price || Number(params.min_price) <= 0) delete params.min_price;
+    if (!params.max_price || Number(params.max_price) >= 10000) delete params.max_price;
+    if (!params.cultivation_method || params.cultivation_method.length === 0) delete params.cultivation_method;
+    // 件数に影響しないパラメータは送らない (キャッシュを共有するため)
+    delete params.ordering;
+    delete params.page;
+    delete params.limit;
+    delete params.offset;
+    const response = await apiClient.get<ProductFacets>('/products/facets/', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching product facets:', error);
+    return null;
+  }
+};
+
 // 商品詳細を取得する関数
 export const getProductById = async (id: string | number): Promise<Product | null> => {
   try {
@@ -148,6 +184,28 @@ export const updateProductStatus = async (id: number | string, newStatus: Produc
   }
 };
 
+// 複数の商品のステータスをまとめて変更する関数 (1 回のリクエストで最大 1000 件)
+export interface BulkStatusResult {
+  status: Product['status'];
+  updated: number[]; // ステータスを変更した商品 ID
+  unchanged: number[]; // 既に指定のステータスだった商品 ID
+}
+
+export const updateProductsStatus = async (ids: number[], newStatus: Product['status']): Promise<BulkStatusResult> => {
+  try {
+    const response = await apiClient.post<BulkStatusResult>('/products/bulk-change-status/', { ids, status: newStatus });
+    return response.data;
+  } catch (error) {
+    if (axios.isAxiosError(error) && error.response) {
+      console.error('Error changing status for products:', error.response.data);
+      throw error;
+    } else {
+      console.error('Unexpected error changing status for products:', error);
+      throw new Error('ステータスの変更中に予期せぬエラーが発生しました。');
+    }
+  }
+};
+
 // 自分の商品一覧を取得する関数 (全ステータス)
 export const getMyProducts = async (): Promise<Product[]> => {
   // 認証トークンが必要
@@ -54,4 +54,18 @@ export interface PaginatedOrderResponse {
   next: string | null;
   previous: string | null;
   results: Order[];
-}
\ No newline at end of file
+}
+// 生産者の売上集計 (GET /producer-orders/sales-summary/)。金額は DecimalField と同じく文字列
+export interface SalesSummary {
+  date_from: string;
+  date_to: string;
+  totals: { quantity: number; revenue: string };
+  daily: { date: string; quantity: number; revenue: string }[];
+  products: {
+    product_id: number;
+    product_name: string;
+    order_count: number; // その商品を含む注文の数
+    quantity: number;
+    revenue: string;
+  }[];
+}
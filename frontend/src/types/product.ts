@@ -1,5 +1,19 @@
 // Django の Product モデルと ProductSerializer に合わせて定義
 
+// 派生画像の URL (ImageVariantsField)。生成前は null
+export interface ImageVariant {
+  webp: string;
+  jpeg: string;
+  width: number;
+  height: number;
+}
+
+export interface ImageUrls {
+  thumbnail: ImageVariant;
+  card: ImageVariant;
+  detail: ImageVariant;
+}
+
 export interface Product {
   id: number;
   producer_username: string; // 読み取り用のフィールド
@@ -11,6 +25,7 @@ export interface Product {
   unit: string;
   unit_display: string; // 読み取り用のフィールド
   image: string | null; // 画像 URL または null
+  image_urls?: ImageUrls | null; // サイズ別の派生画像 (一覧のカードは card を使う)
   standard: string | null;
   cultivation_method: string | null;
   cultivation_method_display: string | null; // 読み取り用のフィールド
@@ -1,3 +1,5 @@
+import { ImageUrls } from './product';
+
 export interface Profile {
   category: string;
   id: number;
@@ -8,6 +10,7 @@ export interface Profile {
   location_city: string | null;
   bio: string | null;
   image: string | null; // 画像 URL または null
+  image_urls?: ImageUrls | null; // サイズ別の派生画像
   website_url: string | null;
   phone_number: string | null;
   certification_info: string | null;